@@ -1,12 +1,13 @@
 
 # analysis/admin.py
 from django.contrib import admin
+from . import search
 from .models import Article
 
 
 @admin.register(Article)
 class ArticleAdmin(admin.ModelAdmin):
-    list_display = ['title', 'article_type', 'published_at', 'author', 'updated_at']
+    list_display = ['title', 'article_type', 'published_at', 'author', 'view_count', 'updated_at']
     list_filter = ['article_type', 'published_at', 'author']
     search_fields = ['title', 'content']
     prepopulated_fields = {'slug': ('title',)}
@@ -24,4 +25,11 @@ class ArticleAdmin(admin.ModelAdmin):
             'fields': ('published_at',)
         }),
     )
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Search through the full-text index instead of icontains scans of content"""
+        matching = search.filter_articles(queryset, search_term) if search_term else None
+        if matching is None:
+            return super().get_search_results(request, queryset, search_term)
+        return matching, False
 
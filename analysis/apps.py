@@ -6,3 +6,6 @@ class AnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analysis'
     verbose_name = 'Analysis & Opinion'
+
+    def ready(self):
+        from . import signals  # noqa: F401
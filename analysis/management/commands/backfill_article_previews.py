@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from analysis.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Compute Article preview, word_count and reading_time for existing articles, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                Article.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                    'id', 'content', *Article.DERIVED_FIELDS
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            for article in batch:
+                article.derive_fields()
+            with transaction.atomic():
+                Article.objects.bulk_update(batch, Article.DERIVED_FIELDS)
+            total += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {total} articles processed...')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled previews for {total} articles.'))
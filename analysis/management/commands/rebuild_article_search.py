@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from analysis import search
+from analysis.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for analysis articles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            self.stdout.write(self.style.WARNING('Full-text search is only available on SQLite.'))
+            return
+        articles = Article.objects.only('id', 'title', 'content', 'article_type').iterator(
+            chunk_size=options['batch_size']
+        )
+        with transaction.atomic():
+            total = search.rebuild_index(articles, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} articles.'))
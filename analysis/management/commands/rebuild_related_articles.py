@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from analysis import related
+from analysis.models import Article, ArticleTerms
+
+
+class Command(BaseCommand):
+    help = 'Recompute article term counts in batches, then every related-articles list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                Article.objects.filter(pk__gt=last_pk).order_by('pk').only('id', 'title', 'content')[:batch_size]
+            )
+            if not batch:
+                break
+            terms = [
+                ArticleTerms(article=article, counts=related.term_counts(article.title, article.content))
+                for article in batch
+            ]
+            with transaction.atomic():
+                ArticleTerms.objects.bulk_create(
+                    terms, update_conflicts=True, unique_fields=['article'], update_fields=['counts']
+                )
+            total += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {total} articles processed...')
+
+        # Every list at once, so all scores use the same IDF weights
+        rewritten = related.refresh(ArticleTerms.objects.values_list('article_id', flat=True))
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt related articles for {len(rewritten)} of {total} articles.'
+        ))
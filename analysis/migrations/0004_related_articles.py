@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0003_article_preview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTerms',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='terms', serialize=False, to='analysis.article')),
+                ('counts', models.JSONField(default=dict, help_text='term -> weighted occurrences')),
+            ],
+            options={
+                'verbose_name': 'Article Terms',
+                'verbose_name_plural': 'Article Terms',
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 for the most similar article')),
+                ('score', models.FloatField(help_text='Cosine similarity of the TF-IDF vectors')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='analysis.article')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='analysis.article')),
+            ],
+            options={
+                'verbose_name': 'Related Article',
+                'verbose_name_plural': 'Related Articles',
+                'ordering': ['article', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('article', 'rank'), name='analysis_related_rank_unique')],
+            },
+        ),
+    ]
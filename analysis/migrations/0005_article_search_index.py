@@ -0,0 +1,45 @@
+# Full-text search index for Article (SQLite FTS5 shadow table)
+
+from django.db import migrations
+
+
+FTS_TABLE = 'analysis_article_fts'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Article = apps.get_model('analysis', 'Article')
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"title, content, article_type UNINDEXED, "
+        f"tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    rows = [
+        (article.pk, article.title, article.content or '', article.article_type)
+        for article in Article.objects.only('id', 'title', 'content', 'article_type').iterator()
+    ]
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, article_type) "
+                f"VALUES (%s, %s, %s, %s)",
+                rows
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0004_related_articles'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
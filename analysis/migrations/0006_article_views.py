@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0005_article_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Page views, flushed in batches by culer/page_views.py'),
+        ),
+        migrations.CreateModel(
+            name='ArticleViewDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_days', to='analysis.article')),
+            ],
+            options={
+                'verbose_name': 'Article Views per Day',
+                'verbose_name_plural': 'Article Views per Day',
+                'indexes': [models.Index(fields=['day', 'article', 'views'], name='analysis_view_day_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('article', 'day'), name='analysis_view_day_unique')],
+            },
+        ),
+    ]
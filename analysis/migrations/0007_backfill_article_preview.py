@@ -0,0 +1,32 @@
+# 0003_article_preview added preview, word_count and reading_time but left
+# them empty for existing articles, so the list showed blank previews until
+# backfill_article_previews was run; fill them in as part of the migration
+
+from django.db import migrations
+
+from analysis.models import Article as CurrentArticle
+
+
+def derive_previews(apps, schema_editor):
+    Article = apps.get_model('analysis', 'Article')
+    fields = CurrentArticle.DERIVED_FIELDS
+    batch = []
+    for article in Article.objects.only('id', 'content', *fields).iterator():
+        # Historical models have no methods; derive on an unsaved current one
+        current = CurrentArticle(content=article.content)
+        current.derive_fields()
+        for name in fields:
+            setattr(article, name, getattr(current, name))
+        batch.append(article)
+    Article.objects.bulk_update(batch, fields, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0006_article_views'),
+    ]
+
+    operations = [
+        migrations.RunPython(derive_previews, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,8 @@ from django.urls import reverse
 from django.utils.text import slugify
 from django.utils import timezone
 
+from culer.text import reading_minutes
+
 
 class Article(models.Model):
     ARTICLE_TYPE_CHOICES = [
@@ -21,10 +23,23 @@ class Article(models.Model):
     published_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Computed from content on save so listings can defer the body
+    preview = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=1, editable=False, help_text="Minutes")
+    
+    view_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text="Page views, flushed in batches by culer/page_views.py"
+    )
+    
     class Meta:
         ordering = ['-published_at']
         verbose_name = 'Article'
         verbose_name_plural = 'Articles'
+        indexes = [
+            models.Index(fields=['-published_at', '-id']),
+            models.Index(fields=['article_type', '-published_at', '-id']),
+        ]
     
     def __str__(self):
         return self.title
@@ -32,12 +47,86 @@ class Article(models.Model):
     def get_absolute_url(self):
         return reverse('analysis:article_detail', kwargs={'slug': self.slug})
     
+    # Words kept in the stored preview
+    PREVIEW_WORDS = 30
+    
+    # Columns computed from the others on every save (see derive_fields)
+    DERIVED_FIELDS = ('preview', 'word_count', 'reading_time')
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        self.derive_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
         super().save(*args, **kwargs)
     
-    def get_content_preview(self, words=30):
+    def derive_fields(self):
+        """Fill the DERIVED_FIELDS from content (split once for all three)"""
+        words = (self.content or '').split()
+        self.preview = ' '.join(words[:self.PREVIEW_WORDS]) + '...'
+        self.word_count = len(words)
+        self.reading_time = reading_minutes(len(words))
+    
+    def get_content_preview(self, words=PREVIEW_WORDS):
         """Return a preview of the content (first 30 words)"""
+        if words == self.PREVIEW_WORDS:
+            return self.preview
         return ' '.join(self.content.split()[:words]) + '...'
 
+
+class ArticleViewDay(models.Model):
+    """Views of one article on one day; the rollup behind "most read" rankings"""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='view_days')
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Article Views per Day"
+        verbose_name_plural = "Article Views per Day"
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'day'], name='analysis_view_day_unique'),
+        ]
+        indexes = [
+            # Covers the most-read ranking: a day range summed per article
+            models.Index(fields=['day', 'article', 'views'], name='analysis_view_day_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.article_id} on {self.day}: {self.views}"
+
+
+class ArticleTerms(models.Model):
+    """Term counts of one article's title and content: the input to its TF-IDF vector"""
+    article = models.OneToOneField(
+        Article, on_delete=models.CASCADE, primary_key=True, related_name='terms'
+    )
+    counts = models.JSONField(default=dict, help_text="term -> weighted occurrences")
+    
+    class Meta:
+        verbose_name = "Article Terms"
+        verbose_name_plural = "Article Terms"
+    
+    def __str__(self):
+        return f"Terms of {self.article_id}"
+
+
+class RelatedArticle(models.Model):
+    """Precomputed content neighbour of an article (see analysis/related.py)"""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='neighbours')
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField(help_text="1 for the most similar article")
+    score = models.FloatField(help_text="Cosine similarity of the TF-IDF vectors")
+    
+    class Meta:
+        ordering = ['article', 'rank']
+        verbose_name = "Related Article"
+        verbose_name_plural = "Related Articles"
+        constraints = [
+            # Also the index that serves article_detail's lookup
+            models.UniqueConstraint(fields=['article', 'rank'], name='analysis_related_rank_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.article_id} -> {self.related_id} ({self.score:.3f})"
@@ -0,0 +1,7 @@
+# analysis/popularity.py
+from culer.page_views import ViewCounter
+from .models import Article, ArticleViewDay
+
+
+# Buffered article page views (see culer/page_views.py)
+article_views = ViewCounter(Article, ArticleViewDay, 'article')
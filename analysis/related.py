@@ -0,0 +1,275 @@
+# analysis/related.py
+"""
+Related articles by content similarity.
+
+Each article's title and content are reduced to term counts (stored in
+ArticleTerms, title terms weighted up), turned into L2-normalised TF-IDF
+vectors, and compared by cosine similarity. Similarities are computed as
+a sparse product over an inverted index (term -> postings) held in NumPy
+arrays, so an article is only ever compared with the articles it shares
+terms with, and without a Python loop per pair.
+
+The top neighbours are stored in RelatedArticle, which article_detail
+reads with one indexed lookup. When an article changes, refresh() only
+recomputes its own list and the lists it enters or drops out of; the IDF
+weights of untouched pairs are left as they were until the next full
+rebuild_related_articles run.
+
+refresh() still reads every article's term counts to rebuild the IDF
+weights, so saves don't run it: they schedule() the article, and a daemon
+thread refreshes everything scheduled within RELATED_ARTICLES_REFRESH_DELAY
+seconds in one pass. A burst of edits loads the corpus once, and the
+request that saved an article never waits for it. Refreshes still queued
+when the process exits are lost; the next edit or rebuild_related_articles
+catches the lists up.
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import ArticleTerms, RelatedArticle
+
+
+logger = logging.getLogger(__name__)
+
+# Related articles stored (and shown) per article
+RELATED_LIMIT = 3
+
+# A title word counts as much as this many body words
+TITLE_WEIGHT = 3
+
+# Pairs below this cosine similarity aren't considered related at all
+MIN_SIMILARITY = 0.05
+
+_WORD_RE = re.compile(r'[^\W\d_]{3,}', re.UNICODE)
+
+# Common English words that say nothing about what an article is about
+STOP_WORDS = frozenset('''
+    about after again against all also and any are because been before being
+    but can could did does doing down during each few for from further had
+    has have having her here hers him his how into its itself just more most
+    not now off once only other our ours out over own same she should some
+    such than that the their theirs them then there these they this those
+    through too under until very was were what when where which while who
+    whom why will with would you your yours
+'''.split())
+
+# Article ids waiting for the background refresh
+_pending = set()
+_pending_lock = threading.Lock()
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def tokenize(text):
+    """Lower-cased, accent-free words of three letters or more, stop words removed"""
+    decomposed = unicodedata.normalize('NFKD', (text or '').casefold())
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return [word for word in _WORD_RE.findall(stripped) if word not in STOP_WORDS]
+
+
+def term_counts(title, content):
+    counts = Counter(tokenize(content))
+    for word in tokenize(title):
+        counts[word] += TITLE_WEIGHT
+    return dict(counts)
+
+
+def update_terms(article):
+    """
+    Store the article's term counts; returns False when they did not change
+    (e.g. only the publishing date was edited), so nothing needs refreshing.
+    """
+    counts = term_counts(article.title, article.content)
+    terms, created = ArticleTerms.objects.get_or_create(article=article, defaults={'counts': counts})
+    if created:
+        return True
+    if terms.counts == counts:
+        return False
+    terms.counts = counts
+    terms.save(update_fields=['counts'])
+    return True
+
+
+class Corpus:
+    """
+    TF-IDF vectors of a set of articles as NumPy arrays: the rows of a
+    sparse article x term matrix (row_starts, term_ids, weights) and its
+    transpose, the postings (posting_starts, posting_rows,
+    posting_weights). One article's similarities to all the others are a
+    gather over its terms' postings plus a bincount, with no Python loop
+    over the articles it shares terms with.
+    """
+
+    def __init__(self, counts_by_article):
+        self.ids = np.array(sorted(counts_by_article), dtype=np.int64)
+        self.rows = {article_id: row for row, article_id in enumerate(self.ids.tolist())}
+        vocabulary = {}
+        term_ids, counts, lengths = [], [], []
+        for article_id in self.ids.tolist():
+            article_counts = {term: count for term, count in counts_by_article[article_id].items() if count > 0}
+            term_ids.extend(vocabulary.setdefault(term, len(vocabulary)) for term in article_counts)
+            counts.extend(article_counts.values())
+            lengths.append(len(article_counts))
+
+        # Sublinear TF, smoothed IDF, then every row scaled to unit length
+        self.term_ids = np.array(term_ids, dtype=np.int64)
+        rows = np.repeat(np.arange(len(self.ids)), lengths)
+        frequency = np.bincount(self.term_ids, minlength=len(vocabulary))
+        idf = np.log((1 + len(self.ids)) / (1 + frequency)) + 1
+        self.weights = (1 + np.log(np.array(counts, dtype=np.float64))) * idf[self.term_ids]
+        norms = np.sqrt(np.bincount(rows, weights=self.weights ** 2, minlength=len(self.ids)))
+        self.weights /= norms[rows]
+        self.row_starts = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+
+        order = np.argsort(self.term_ids, kind='stable')
+        self.posting_rows = rows[order]
+        self.posting_weights = self.weights[order]
+        self.posting_starts = np.searchsorted(self.term_ids[order], np.arange(len(vocabulary) + 1))
+
+    def __contains__(self, article_id):
+        return article_id in self.rows
+
+    def __len__(self):
+        return len(self.ids)
+
+    def similarities(self, article_id):
+        """Cosine similarity of one article to every article, by row (0 for itself)"""
+        row = self.rows[article_id]
+        start, end = self.row_starts[row], self.row_starts[row + 1]
+        terms = self.term_ids[start:end]
+        starts = self.posting_starts[terms]
+        lengths = self.posting_starts[terms + 1] - starts
+        # Positions of every posting of the article's terms, concatenated
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        scores = np.bincount(
+            self.posting_rows[positions],
+            weights=self.posting_weights[positions] * np.repeat(self.weights[start:end], lengths),
+            minlength=len(self.ids),
+        )
+        scores[row] = 0.0
+        return scores
+
+    def top_neighbours(self, scores, limit=RELATED_LIMIT):
+        """Best `limit` (article_id, score) pairs; ties go to the newer (higher) id"""
+        candidates = np.flatnonzero(scores >= MIN_SIMILARITY)
+        order = np.lexsort((-self.ids[candidates], -scores[candidates]))[:limit]
+        return [(int(self.ids[row]), float(scores[row])) for row in candidates[order]]
+
+
+def refresh(article_ids, limit=RELATED_LIMIT):
+    """
+    Recompute the neighbour lists of the given (changed) articles, plus
+    those of any other article whose list one of them now enters or
+    held a place in. Returns the ids whose lists were rewritten.
+    """
+    corpus = Corpus(dict(ArticleTerms.objects.values_list('article_id', 'counts')))
+    changed = {article_id for article_id in article_ids if article_id in corpus}
+    scores = {article_id: corpus.similarities(article_id) for article_id in changed}
+
+    # Per row: the score a newcomer has to beat to get onto the list, and
+    # whether the list holds a changed article
+    floors = np.full(len(corpus), MIN_SIMILARITY)
+    affected = np.zeros(len(corpus), dtype=bool)
+    current = defaultdict(list)
+    for article_id, related_id, score in RelatedArticle.objects.values_list(
+        'article_id', 'related_id', 'score'
+    ):
+        current[article_id].append(score)
+        if article_id in corpus and related_id in changed:
+            affected[corpus.rows[article_id]] = True
+    for article_id, neighbour_scores in current.items():
+        if article_id in corpus and len(neighbour_scores) >= limit:
+            floors[corpus.rows[article_id]] = min(neighbour_scores)
+    for article_id, article_scores in scores.items():
+        affected |= article_scores > floors
+        affected[corpus.rows[article_id]] = True
+
+    rewritten = set(corpus.ids[affected].tolist())
+    rows = []
+    for article_id in rewritten:
+        article_scores = scores.get(article_id)
+        if article_scores is None:
+            article_scores = corpus.similarities(article_id)
+        for rank, (related_id, score) in enumerate(corpus.top_neighbours(article_scores, limit), start=1):
+            rows.append(RelatedArticle(article_id=article_id, related_id=related_id, rank=rank, score=score))
+
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article_id__in=rewritten).delete()
+        RelatedArticle.objects.bulk_create(rows)
+    return rewritten
+
+
+def schedule(article_ids):
+    """
+    Queue a refresh of the given articles (called on commit). With
+    RELATED_ARTICLES_REFRESH_DELAY unset the refresh runs right away.
+    """
+    delay = getattr(settings, 'RELATED_ARTICLES_REFRESH_DELAY', 2)
+    if not delay:
+        refresh(article_ids)
+        return
+    with _pending_lock:
+        _pending.update(article_ids)
+    _ensure_worker(delay)
+    _wakeup.set()
+
+
+def pending():
+    with _pending_lock:
+        return set(_pending)
+
+
+def flush():
+    """Refresh every queued article in one pass; on failure they stay queued"""
+    with _pending_lock:
+        article_ids = set(_pending)
+        _pending.clear()
+    if not article_ids:
+        return set()
+    try:
+        return refresh(article_ids)
+    except Exception:
+        logger.exception('Failed to refresh related articles of %d articles', len(article_ids))
+        # Retried along with the next edit's refresh
+        with _pending_lock:
+            _pending.update(article_ids)
+        return set()
+
+
+def _ensure_worker(delay):
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=_run, args=(delay,), name='related-articles-refresh', daemon=True
+            )
+            _worker.start()
+
+
+def _run(delay):
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        # Let the rest of a burst of edits arrive, then refresh them together
+        time.sleep(delay)
+        close_old_connections()
+        flush()
+
+
+def related_articles(article, limit=RELATED_LIMIT):
+    """The stored neighbours of an article, most similar first (one indexed query)"""
+    rows = RelatedArticle.objects.filter(article=article).select_related('related').defer(
+        'related__content'
+    ).order_by('rank')[:limit]
+    return [row.related for row in rows]
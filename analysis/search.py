@@ -0,0 +1,50 @@
+# analysis/search.py
+from culer import fts
+from culer.fts import SEARCH_RESULT_LIMIT, fts_available  # noqa: F401
+
+
+# Name of the SQLite FTS5 shadow table that mirrors searchable Article text
+ARTICLE_FTS_TABLE = 'analysis_article_fts'
+
+# Title hits outweigh body hits; article_type is stored but not indexed
+article_index = fts.FtsIndex(
+    ARTICLE_FTS_TABLE,
+    ('title', 'content', 'article_type'),
+    weights=(10.0, 1.0),
+    snippet_column='content',
+    filter_column='article_type',
+)
+
+
+def _index_row(article):
+    return (article.pk, article.title, article.content or '', article.article_type)
+
+
+def index_article(article):
+    """Insert or refresh a single article in the full-text index"""
+    article_index.index([_index_row(article)])
+
+
+def unindex_article(article_id):
+    """Remove an article from the full-text index"""
+    article_index.unindex(article_id)
+
+
+def rebuild_index(articles, batch_size=500):
+    """Rebuild the whole index from an iterable of articles, in batches"""
+    return article_index.rebuild(map(_index_row, articles), batch_size)
+
+
+def search_articles(search_query, article_type=None, limit=SEARCH_RESULT_LIMIT):
+    """
+    Return ranked hits for a search query, best match first, optionally
+    restricted to one article type (before the limit is applied).
+    Returns None when the full-text index cannot serve the query, so callers
+    can fall back to a plain icontains filter.
+    """
+    return article_index.search(search_query, article_type, limit)
+
+
+def filter_articles(queryset, search_query):
+    """Narrow an Article queryset to every hit (admin search); None to fall back"""
+    return article_index.filter(queryset, search_query)
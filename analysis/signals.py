@@ -0,0 +1,46 @@
+# analysis/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from . import related, search
+from .models import Article, RelatedArticle
+
+
+@receiver(post_save, sender=Article)
+def index_article_on_save(sender, instance, raw=False, **kwargs):
+    """Keep the full-text index in sync when an article is created or edited"""
+    if raw:
+        return
+    search.index_article(instance)
+
+
+@receiver(post_delete, sender=Article)
+def unindex_article_on_delete(sender, instance, **kwargs):
+    """Drop deleted articles from the full-text index"""
+    search.unindex_article(instance.pk)
+
+
+@receiver(post_save, sender=Article)
+def refresh_related_on_save(sender, instance, raw=False, **kwargs):
+    """Recompute the neighbour lists an edited article's text can change"""
+    if raw:
+        return
+    if related.update_terms(instance):
+        pk = instance.pk
+        transaction.on_commit(lambda: related.schedule([pk]))
+
+
+@receiver(pre_delete, sender=Article)
+def remember_referrers(sender, instance, **kwargs):
+    """The articles listing this one, whose lists lose a place on delete"""
+    instance._related_referrers = list(
+        RelatedArticle.objects.filter(related=instance).values_list('article_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Article)
+def refresh_related_on_delete(sender, instance, **kwargs):
+    referrers = getattr(instance, '_related_referrers', [])
+    if referrers:
+        transaction.on_commit(lambda: related.schedule(referrers))
@@ -1,3 +1,291 @@
-from django.test import TestCase
+import math
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+
+from django.contrib.admin import AdminSite
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from culer import page_views
+from culer.query_plans import QueryPlanTestCase
+from . import related, search, views
+from .admin import ArticleAdmin
+from .models import Article, ArticleViewDay, RelatedArticle
+from .popularity import article_views
+
+
+class ArticleQueryPlanTests(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='writer')
+        cls.article = Article.objects.create(
+            title='Pressing triggers', author=user, content='...', article_type='tactical_analysis',
+        )
+        Article.objects.create(title='Why Pedri', author=user, content='...', article_type='opinion')
+
+    def test_article_list(self):
+        self.assertIndexedPlans(views.article_list)
+
+    def test_tactical_analysis_list(self):
+        self.assertIndexedPlans(views.tactical_analysis_list)
+
+    def test_opinion_list(self):
+        self.assertIndexedPlans(views.opinion_list)
+
+    def test_search(self):
+        # bm25() ranking sorts the (bounded) FTS hits; that sort is inherent
+        allowed = ('USE TEMP B-TREE FOR ORDER BY',)
+        self.assertIndexedPlans(views.article_list, {'search': 'pressing'}, allowed=allowed)
+        self.assertIndexedPlans(views.tactical_analysis_list, {'search': 'pressing'}, allowed=allowed)
+        self.assertIndexedPlans(views.opinion_list, {'search': 'pedri'}, allowed=allowed)
+
+    def test_article_detail(self):
+        self.assertIndexedPlans(views.article_detail, slug=self.article.slug)
+
+
+class RelatedArticleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='analyst')
+
+    def create(self, title, content, article_type='tactical_analysis'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Article.objects.create(
+                title=title, author=self.user, content=content, article_type=article_type,
+            )
+
+    def test_most_similar_articles_come_first(self):
+        press = self.create('Pressing triggers', 'The high press forces turnovers near the box. Press triggers.')
+        counter = self.create('Counter pressing', 'Counter press after losing the ball: pressing wins turnovers.')
+        self.create('Academy graduates', 'La Masia graduates promoted to the first team squad this season.')
+        loans = self.create('Loan market', 'Graduates sent on loan to gain first team minutes.', 'opinion')
+
+        self.assertEqual(related.related_articles(press)[0], counter)
+        self.assertEqual(related.related_articles(counter)[0], press)
+        self.assertNotIn(loans, related.related_articles(press))
+
+    def test_edits_and_deletes_update_neighbour_lists(self):
+        press = self.create('Pressing triggers', 'The high press forces turnovers near the box.')
+        other = self.create('Set pieces', 'Corner routines and near post flicks.')
+        self.assertEqual(related.related_articles(press), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.title = 'Pressing traps'
+            other.content = 'A pressing trap on the touchline forces turnovers.'
+            other.save()
+        self.assertEqual(related.related_articles(press), [other])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(related.related_articles(press), [])
+        self.assertFalse(RelatedArticle.objects.exists())
+
+    @override_settings(RELATED_ARTICLES_REFRESH_DELAY=60)
+    def test_edits_are_refreshed_together_in_the_background(self):
+        with mock.patch.object(related, '_ensure_worker') as ensure_worker, \
+                mock.patch.object(related, 'refresh', wraps=related.refresh) as refresh:
+            press = self.create('Pressing triggers', 'The high press forces turnovers near the box.')
+            counter = self.create('Counter pressing', 'Counter press wins turnovers near the box.')
+            self.assertEqual(ensure_worker.call_count, 2)
+            self.assertFalse(refresh.called)
+            self.assertEqual(related.pending(), {press.pk, counter.pk})
+
+            self.assertEqual(related.flush(), {press.pk, counter.pk})
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(related.pending(), set())
+        self.assertEqual(related.related_articles(press), [counter])
+
+    def test_similarities_are_cosines_of_tfidf_vectors(self):
+        counts = {1: {'press': 3, 'box': 1}, 2: {'press': 1, 'turnover': 2}, 3: {'loan': 1}}
+        corpus = related.Corpus(counts)
+
+        def vector(article_id):
+            idf = {
+                term: math.log(4 / (1 + sum(term in other for other in counts.values()))) + 1
+                for term in counts[article_id]
+            }
+            weights = {term: (1 + math.log(count)) * idf[term] for term, count in counts[article_id].items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            return {term: weight / norm for term, weight in weights.items()}
+
+        expected = sum(weight * vector(2).get(term, 0) for term, weight in vector(1).items())
+        scores = corpus.similarities(1)
+        self.assertAlmostEqual(scores[corpus.rows[2]], expected)
+        self.assertEqual((scores[corpus.rows[1]], scores[corpus.rows[3]]), (0, 0))
+        self.assertEqual(corpus.top_neighbours(scores), [(2, scores[corpus.rows[2]])])
+
+    def test_article_detail_shows_related_articles(self):
+        press = self.create('Pressing triggers', 'The high press forces turnovers near the box.')
+        counter = self.create('Counter pressing', 'Counter press wins turnovers near the box.', 'opinion')
+        response = self.client.get(f'/analysis/{press.slug}/')
+        self.assertEqual(list(response.context['related_articles']), [counter])
+
+
+class ArticlePreviewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='editor')
+        cls.long_read = Article.objects.create(
+            title='Positional play', author=user, article_type='tactical_analysis',
+            content=' '.join(f'word{i}' for i in range(450)),
+        )
+        cls.short = Article.objects.create(title='Quick take', author=user, article_type='opinion', content='Visca')
+
+    def test_derive_fields(self):
+        self.assertEqual(self.long_read.preview, ' '.join(f'word{i}' for i in range(30)) + '...')
+        self.assertEqual((self.long_read.word_count, self.long_read.reading_time), (450, 3))
+        self.assertEqual((self.short.preview, self.short.word_count, self.short.reading_time), ('Visca...', 1, 1))
+        # Saving only the content still rewrites what is derived from it
+        self.short.content = 'Visca el Barça'
+        self.short.save(update_fields=['content'])
+        self.short.refresh_from_db()
+        self.assertEqual((self.short.preview, self.short.word_count), ('Visca el Barça...', 3))
+
+    def assertBackfilled(self):
+        for article in Article.objects.all():
+            stored = (article.preview, article.word_count, article.reading_time)
+            article.derive_fields()
+            self.assertEqual(stored, (article.preview, article.word_count, article.reading_time))
+            self.assertTrue(article.preview)
+
+    def test_backfill_command(self):
+        Article.objects.update(preview='', word_count=0, reading_time=1)
+        out = StringIO()
+        call_command('backfill_article_previews', '--batch-size', '1', stdout=out)
+        self.assertIn('Backfilled previews for 2 articles.', out.getvalue())
+        self.assertBackfilled()
+
+    def test_migration_fills_existing_rows(self):
+        Article.objects.update(preview='', word_count=0, reading_time=1)
+        import_module('analysis.migrations.0007_backfill_article_preview').derive_previews(apps, None)
+        self.assertBackfilled()
+
+
+class ArticleSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='scout')
+        cls.title_hit = Article.objects.create(
+            title='Pressing triggers', author=user, article_type='tactical_analysis',
+            content='How the midfield decides when to step out.',
+        )
+        cls.body_hit = Article.objects.create(
+            title='Build-up shapes', author=user, article_type='tactical_analysis',
+            content='The back three invites pressing <b>high</b> up the pitch.',
+        )
+        cls.opinion = Article.objects.create(
+            title='Pressing is overrated', author=user, article_type='opinion', content='Fight me.',
+        )
+
+    def test_ranked_hits_with_escaped_snippets(self):
+        hits = search.search_articles('press', 'tactical_analysis')
+        self.assertEqual([hit.pk for hit in hits], [self.title_hit.pk, self.body_hit.pk])
+        self.assertIn('<mark>pressing</mark>', hits[1].snippet)
+        self.assertIn('&lt;b&gt;', hits[1].snippet)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.body_hit.content = 'Nothing to see.'
+        self.body_hit.save()
+        self.assertEqual({hit.pk for hit in search.search_articles('pressing')},
+                         {self.title_hit.pk, self.opinion.pk})
+        self.opinion.delete()
+        self.assertEqual([hit.pk for hit in search.search_articles('pressing')], [self.title_hit.pk])
+
+    def test_list_views_search_within_their_type(self):
+        response = self.client.get('/analysis/tactics/', {'search': 'pressing'})
+        self.assertEqual([article.pk for article in response.context['page_obj']],
+                         [self.title_hit.pk, self.body_hit.pk])
+        response = self.client.get('/analysis/', {'search': 'overrated'})
+        self.assertEqual([article.pk for article in response.context['page_obj']], [self.opinion.pk])
+
+    def test_admin_search_uses_the_index(self):
+        model_admin = ArticleAdmin(Article, AdminSite())
+        queryset, may_have_duplicates = model_admin.get_search_results(
+            RequestFactory().get('/'), Article.objects.all(), 'pressing'
+        )
+        self.assertFalse(may_have_duplicates)
+        self.assertEqual(set(queryset), {self.title_hit, self.body_hit, self.opinion})
+        # Hits are matched by a subquery, not a list of ids bound as parameters
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn(search.ARTICLE_FTS_TABLE, sql)
+        self.assertEqual(params, ('"pressing"*',))
+
+    def test_opinion_list(self):
+        response = self.client.get('/analysis/opinions/')
+        self.assertTemplateUsed(response, 'analysis/opinions_list.html')
+        self.assertEqual([article.pk for article in response.context['page_obj']], [self.opinion.pk])
+        response = self.client.get('/analysis/opinions/', {'search': 'fight'})
+        self.assertEqual([article.pk for article in response.context['page_obj']], [self.opinion.pk])
+        self.assertContains(response, '<mark>Fight</mark> me.')
+        response = self.client.get('/analysis/opinions/', {'search': 'midfield'})
+        self.assertEqual(list(response.context['page_obj']), [])
+
+
+@override_settings(PAGE_VIEW_COUNTING=True, PAGE_VIEW_FLUSH_INTERVAL=None)
+class ArticleViewCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='reader')
+        cls.popular = Article.objects.create(
+            title='Pressing triggers', author=user, content='...', article_type='tactical_analysis',
+        )
+        cls.quiet = Article.objects.create(title='Why Pedri', author=user, content='...', article_type='opinion')
+
+    def setUp(self):
+        cache.clear()
+        article_views.flush()
+
+    def test_views_are_buffered_then_flushed_in_one_batch(self):
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                self.client.get(self.popular.get_absolute_url())
+            self.client.get(self.quiet.get_absolute_url())
+        self.assertFalse([q['sql'] for q in queries if not q['sql'].startswith('SELECT')])
+        self.assertEqual(article_views.pending(), 4)
+
+        # One UPDATE, an existence check and one rollup upsert, in a transaction
+        with self.assertNumQueries(5):
+            self.assertEqual(article_views.flush(), 4)
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.view_count, 3)
+        self.assertEqual(
+            ArticleViewDay.objects.get(article=self.popular, day=timezone.localdate()).views, 3
+        )
+
+        # A second flush adds to the same day's rollup row
+        self.client.get(self.popular.get_absolute_url())
+        page_views.flush_all()
+        self.assertEqual(ArticleViewDay.objects.get(article=self.popular).views, 4)
+
+    def test_most_read_this_week(self):
+        today = timezone.localdate()
+        article_views.write({
+            (self.quiet.pk, today): 5,
+            (self.popular.pk, today - timedelta(days=1)): 4,
+            (self.popular.pk, today - timedelta(days=2)): 4,
+            # Outside the seven-day window
+            (self.quiet.pk, today - timedelta(days=10)): 100,
+        })
+        self.assertEqual(article_views.most_read(), [(self.popular, 8), (self.quiet, 5)])
+        response = self.client.get('/analysis/')
+        self.assertEqual(response.context['most_read'], [(self.popular, 8), (self.quiet, 5)])
+
+    def test_views_of_deleted_articles_are_dropped(self):
+        self.client.get(self.quiet.get_absolute_url())
+        self.quiet.delete()
+        self.assertEqual(article_views.flush(), 1)
+        self.assertFalse(ArticleViewDay.objects.exists())
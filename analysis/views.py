@@ -1,21 +1,50 @@
 
 # analysis/views.py
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
 from django.db.models import Q
+from culer.fts import rank_results
+from culer.pagination import KeysetPaginator, SequencePaginator
+from . import related, search
+from .popularity import article_views
 from .models import Article
 
 
+# Unique sort key matching Article.Meta.ordering, used for keyset pagination
+ARTICLE_ORDERING = ('-published_at', '-id')
+
+
+def _article_cards():
+    """Articles for listings: cards show the stored preview, never the body"""
+    return Article.objects.select_related('author').defer('content')
+
+
+def _article_page(request, articles, article_type=None):
+    """
+    One page of article cards, newest first; with ?search= the ranked
+    full-text hits instead (icontains fallback), each carrying its snippet.
+    Returns (page, search_query).
+    """
+    search_query = request.GET.get('search')
+    hits = search.search_articles(search_query, article_type) if search_query else None
+    if hits is not None:
+        paginator = SequencePaginator(rank_results(articles, hits), 6)
+    else:
+        if search_query:
+            articles = articles.filter(
+                Q(title__icontains=search_query) | Q(content__icontains=search_query)
+            )
+        paginator = KeysetPaginator(articles, 6, ordering=ARTICLE_ORDERING)  # Show 6 articles per page
+    return paginator.get_page(request.GET.get('cursor'), params=request.GET), search_query
+
+
 def article_list(request):
     """Display all articles with pagination"""
-    articles = Article.objects.all()
-    paginator = Paginator(articles, 6)  # Show 6 articles per page
-    
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj, search_query = _article_page(request, _article_cards())
     
     context = {
         'page_obj': page_obj,
+        'search_query': search_query,
+        'most_read': article_views.most_read(_article_cards()),
         'page_title': 'All Analysis Articles'
     }
     return render(request, 'analysis/article_list.html', context)
@@ -24,11 +53,14 @@ def article_list(request):
 def article_detail(request, slug):
     """Display a single article"""
     article = get_object_or_404(Article, slug=slug)
+    article_views.record(article.pk)  # buffered in memory, flushed in the background
     
-    # Get related articles (same type, excluding current)
-    related_articles = Article.objects.filter(
-        article_type=article.article_type
-    ).exclude(id=article.id)[:3]
+    # Closest articles by content; newest of the same type until they're computed
+    related_articles = related.related_articles(article)
+    if not related_articles:
+        related_articles = _article_cards().filter(
+            article_type=article.article_type
+        ).exclude(id=article.id)[:related.RELATED_LIMIT]
     
     context = {
         'article': article,
@@ -40,14 +72,12 @@ def article_detail(request, slug):
 
 def tactical_analysis_list(request):
     """Display only tactical analysis articles"""
-    articles = Article.objects.filter(article_type='tactical_analysis')
-    paginator = Paginator(articles, 6)
-    
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    articles = _article_cards().filter(article_type='tactical_analysis')
+    page_obj, search_query = _article_page(request, articles, 'tactical_analysis')
     
     context = {
         'page_obj': page_obj,
+        'search_query': search_query,
         'page_title': 'Tactical Analysis',
         'article_type': 'tactical_analysis'
     }
@@ -56,16 +86,14 @@ def tactical_analysis_list(request):
 
 def opinion_list(request):
     """Display only opinion articles"""
-    articles = Article.objects.filter(article_type='opinion')
-    paginator = Paginator(articles, 6)
-    
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    articles = _article_cards().filter(article_type='opinion')
+    page_obj, search_query = _article_page(request, articles, 'opinion')
     
     context = {
         'page_obj': page_obj,
+        'search_query': search_query,
         'page_title': 'Fan Opinions',
         'article_type': 'opinion'
     }
-    return render(request, 'analysis/opinion_list.html', context)
+    return render(request, 'analysis/opinions_list.html', context)
 
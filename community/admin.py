@@ -44,8 +44,10 @@ class CommunityPostAdmin(admin.ModelAdmin):
         """Display image preview in admin"""
         if obj.image:
             return format_html(
-                '<img src="{}" style="max-width: 200px; max-height: 200px; border-radius: 8px;" />',
-                obj.image.url
+                '<img src="{}" srcset="{}" sizes="200px" '
+                'style="max-width: 200px; max-height: 200px; border-radius: 8px;" />',
+                obj.image_src,
+                obj.jpeg_srcset
             )
         return "No image"
     image_preview.short_description = "Image Preview"
@@ -1,8 +1,10 @@
-
 # ===== community/apps.py =====
 from django.apps import AppConfig
 
 class CommunityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'community'
-    verbose_name = 'Community'
\ No newline at end of file
+    verbose_name = 'Community'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,152 @@
+# community/image_pipeline.py
+"""
+Background processing of community post images.
+
+Saving a post with a new image schedules it once the transaction commits:
+the upload's bytes go to a process pool (COMMUNITY_IMAGE_WORKERS spawned
+workers running community/image_processing.render), so the request that
+uploaded the file returns without waiting for any encoding. When a worker
+finishes, a callback in this process stores the metadata-free full-size
+JPEG and the srcset variants, points the post at them and releases the
+raw upload (which may carry EXIF location data), so it is deleted unless
+another post uses the same file (see images/storage.py).
+
+The callback only updates the post if it still has the image that was
+processed; a newer upload replaces it and the stale files are released.
+Until processing finishes, templates fall back to the uploaded file.
+"""
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from images.storage import content_addressed_storage, release
+from . import image_processing
+from .models import CommunityPost
+
+
+logger = logging.getLogger(__name__)
+
+# Processed files are stored next to the uploads
+PROCESSED_DIR = 'community_posts'
+
+storage = content_addressed_storage()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def workers():
+    """Worker processes for image encoding; 0 processes in the calling thread"""
+    return getattr(settings, 'COMMUNITY_IMAGE_WORKERS', 2)
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # Spawned, not forked: the web process may hold threads and DB connections
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers(), mp_context=multiprocessing.get_context('spawn')
+                )
+    return _executor
+
+
+def schedule(post):
+    """Queue a post's current image for processing (called on commit)"""
+    name = post.image.name
+    if not name:
+        return
+    try:
+        with storage.open(name, 'rb') as upload:
+            data = upload.read()
+    except OSError:
+        logger.warning('Image %s of post %s is gone; not processing it', name, post.pk)
+        return
+    if not workers():
+        _store(post.pk, name, lambda: image_processing.render(data))
+        return
+    future = executor().submit(image_processing.render, data)
+    future.add_done_callback(lambda done: _finish(post.pk, name, done))
+
+
+def _finish(pk, name, future):
+    """Executor callback: store a worker's output (runs on the executor's thread)"""
+    close_old_connections()
+    try:
+        _store(pk, name, future.result)
+    finally:
+        close_old_connections()
+
+
+def _store(pk, name, result):
+    try:
+        store(pk, name, *result())
+    except image_processing.UnusableImage as exc:
+        logger.warning('Image %s of post %s could not be processed: %s', name, pk, exc)
+    except Exception:
+        logger.exception('Processing image %s of post %s failed', name, pk)
+
+
+def store(pk, name, width, height, full, variants):
+    """
+    Save the processed files and point post `pk` at them, provided it still
+    has the image `name`. Returns True if the post was updated.
+    """
+    # Content-derived names, so a replaced image never reuses a cached URL.
+    # Each save() counts a reference to its file for this post.
+    base = f'{PROCESSED_DIR}/{hashlib.sha256(full).hexdigest()[:16]}'
+    written = [storage.save(f'{base}.jpg', ContentFile(full))]
+    stored = {}
+    try:
+        for (variant_width, fmt), data in sorted(variants.items()):
+            extension = image_processing.FORMATS[fmt][0]
+            saved = storage.save(f'{base}-{variant_width}.{extension}', ContentFile(data))
+            stored.setdefault(fmt, []).append([variant_width, saved])
+            written.append(saved)
+    except Exception:
+        release(written)
+        raise
+
+    with transaction.atomic():
+        previous = CommunityPost.objects.filter(pk=pk).values_list('image_variants', flat=True).first()
+        updated = CommunityPost.objects.filter(pk=pk, image=name).update(
+            image=written[0], image_variants=stored, image_width=width, image_height=height,
+        )
+        if updated:
+            release([name, *variant_names(previous or {})])
+        else:
+            # Deleted, or a newer upload replaced this one while it was processed
+            release(written)
+    return bool(updated)
+
+
+def variant_names(variants):
+    return [name for files in variants.values() for _, name in files]
+
+
+def process_posts(posts):
+    """Process a batch of posts through the pool and wait for them (backfills)"""
+    posts = [post for post in posts if post.image]
+    uploads = []
+    for post in posts:
+        with storage.open(post.image.name, 'rb') as upload:
+            uploads.append(upload.read())
+    if workers():
+        results = executor().map(image_processing.render_or_none, uploads)
+    else:
+        results = map(image_processing.render_or_none, uploads)
+    processed = 0
+    for post, result in zip(posts, results):
+        if result is None:
+            logger.warning('Image %s of post %s could not be processed', post.image.name, post.pk)
+            continue
+        processed += store(post.pk, post.image.name, *result)
+    return processed
+
@@ -0,0 +1,95 @@
+# community/image_processing.py
+"""
+Re-encoding of uploaded community post images.
+
+This module runs inside the image worker processes (see
+community/image_pipeline.py), so it imports nothing from Django: it takes
+the uploaded bytes and returns encoded bytes, and the parent process does
+the storage and database work.
+"""
+import io
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# Longest side of the re-encoded full-size image
+MAX_DIMENSION = 2048
+
+# Widths of the srcset variants; none is larger than the (capped) image itself
+VARIANT_WIDTHS = (320, 640, 1280)
+
+# Encoded format -> (file extension, save options). JPEG is the fallback
+# every browser can show; no metadata is passed to save(), so EXIF (GPS,
+# camera serials), ICC profiles and comments are dropped.
+FORMATS = {
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Uploads decoding to more pixels than this are refused (decompression bombs)
+MAX_SOURCE_PIXELS = 40_000_000
+
+
+class UnusableImage(Exception):
+    """The upload could not be decoded as an image"""
+
+
+def _flatten(image):
+    """JPEG has no alpha channel: composite transparent images onto white"""
+    if image.mode != 'RGBA':
+        return image
+    flat = Image.new('RGB', image.size, (255, 255, 255))
+    flat.paste(image, mask=image.getchannel('A'))
+    return flat
+
+
+def _encode(image, fmt):
+    _, options = FORMATS[fmt]
+    if fmt == 'jpeg':
+        image = _flatten(image)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def render(data):
+    """
+    Decode an upload and return (width, height, full, variants): the
+    metadata-free JPEG capped at MAX_DIMENSION, and {(width, format): bytes}
+    for every srcset variant. Raises UnusableImage for undecodable input.
+    """
+    try:
+        source = Image.open(io.BytesIO(data))
+        if source.width * source.height > MAX_SOURCE_PIXELS:
+            raise UnusableImage(f'{source.width}x{source.height} upload is too large')
+        # Apply the EXIF rotation before the EXIF block is dropped
+        source = ImageOps.exif_transpose(source)
+        source.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise UnusableImage(str(exc))
+
+    has_alpha = source.mode in ('RGBA', 'LA', 'PA') or 'transparency' in source.info
+    image = source.convert('RGBA' if has_alpha else 'RGB')
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS)
+    full_width, full_height = image.size
+    full = _encode(image, 'jpeg')
+
+    widths = [width for width in VARIANT_WIDTHS if width < image.width] + [
+        min(image.width, VARIANT_WIDTHS[-1])
+    ]
+    variants = {}
+    # Largest first, so each smaller variant resamples an already reduced copy
+    for width in sorted(set(widths), reverse=True):
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+        for fmt in FORMATS:
+            variants[width, fmt] = _encode(image, fmt)
+    return full_width, full_height, full, variants
+
+
+def render_or_none(data):
+    """render(), with None for an unusable upload (for executor.map batches)"""
+    try:
+        return render(data)
+    except UnusableImage:
+        return None
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from community.models import CommunityPost
+
+
+class Command(BaseCommand):
+    help = 'Compute CommunityPost excerpt, word_count and reading_time for existing posts, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                CommunityPost.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                    'id', 'content', *CommunityPost.DERIVED_FIELDS
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            for post in batch:
+                post.derive_fields()
+            with transaction.atomic():
+                CommunityPost.objects.bulk_update(batch, CommunityPost.DERIVED_FIELDS)
+            total += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {total} posts processed...')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled excerpts for {total} posts.'))
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from community import image_pipeline
+from community.models import CommunityPost
+from images.models import StoredFile
+from images.storage import content_addressed_storage, release, retain
+
+
+class Command(BaseCommand):
+    help = (
+        'Move community post images stored before content-addressed storage into it, '
+        'merging byte-identical files and counting their references'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        storage = content_addressed_storage()
+        batch_size = options['batch_size']
+        moved = {}  # old name -> content-addressed name
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                CommunityPost.objects.filter(pk__gt=last_pk).exclude(image='').exclude(
+                    image__isnull=True
+                ).order_by('pk').only('id', 'image', 'image_variants')[:batch_size]
+            )
+            if not batch:
+                break
+            names = {
+                name for post in batch
+                for name in [post.image.name, *image_pipeline.variant_names(post.image_variants)]
+            }
+            tracked = set(StoredFile.objects.filter(name__in=names).values_list('name', flat=True))
+            saved = []
+            for name in sorted(names - tracked - moved.keys()):
+                if not storage.exists(name):
+                    self.stdout.write(self.style.WARNING(f'  missing: {name}'))
+                    continue
+                with storage.open(name, 'rb') as stream:
+                    moved[name] = storage.save(name, stream)
+                saved.append(moved[name])
+
+            with transaction.atomic():
+                for post in batch:
+                    if post.image.name in tracked:
+                        continue
+                    image = moved.get(post.image.name, post.image.name)
+                    variants = {
+                        fmt: [[width, moved.get(name, name)] for width, name in files]
+                        for fmt, files in post.image_variants.items()
+                    }
+                    CommunityPost.objects.filter(pk=post.pk).update(image=image, image_variants=variants)
+                    retain([image, *image_pipeline.variant_names(variants)])
+                    total += 1
+                # save() counted a reference for each copy; the posts now hold theirs
+                release(saved)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {total} posts adopted...')
+
+        # Every reference now points at the content-addressed copies
+        for old, new in moved.items():
+            if old != new:
+                storage.delete(old)
+        unique = len(set(moved.values()))
+        self.stdout.write(self.style.SUCCESS(
+            f'Adopted {total} posts: {len(moved)} files stored as {unique} unique files.'
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from community import image_pipeline
+from community.models import CommunityPost
+
+
+class Command(BaseCommand):
+    help = 'Process community post images that have no srcset variants yet, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = processed = 0
+        while True:
+            batch = list(
+                CommunityPost.objects.filter(pk__gt=last_pk, image_variants={}).exclude(image='').exclude(
+                    image__isnull=True
+                ).order_by('pk').only('id', 'image')[:batch_size]
+            )
+            if not batch:
+                break
+            processed += image_pipeline.process_posts(batch)
+            total += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {total} posts processed...')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed images of {processed} of {total} posts.'))
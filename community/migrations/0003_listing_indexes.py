@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0002_communitypost_is_published_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='communitypost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at', '-id'], name='community_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='communitypost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['author', '-created_at', '-id'], name='community_author_published_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0004_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communitypost',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='communitypost',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Processed image files: format -> [[width, name], ...], narrowest first'),
+        ),
+        migrations.AddField(
+            model_name='communitypost',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
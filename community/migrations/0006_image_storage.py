@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:59
+
+import images.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0005_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='communitypost',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Optional post image', null=True, storage=images.storage.content_addressed_storage, upload_to='community_posts/'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# 0004_post_excerpt added excerpt, word_count and reading_time but left
+# them empty for existing posts, so the list showed blank excerpts until
+# backfill_post_excerpts was run; fill them in as part of the migration
+
+from django.db import migrations
+
+from community.models import CommunityPost as CurrentPost
+
+
+def derive_excerpts(apps, schema_editor):
+    CommunityPost = apps.get_model('community', 'CommunityPost')
+    fields = CurrentPost.DERIVED_FIELDS
+    batch = []
+    for post in CommunityPost.objects.only('id', 'content', *fields).iterator():
+        # Historical models have no methods; derive on an unsaved current one
+        current = CurrentPost(content=post.content)
+        current.derive_fields()
+        for name in fields:
+            setattr(post, name, getattr(current, name))
+        batch.append(post)
+    CommunityPost.objects.bulk_update(batch, fields, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0006_image_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(derive_excerpts, migrations.RunPython.noop),
+    ]
@@ -4,12 +4,17 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
 
+from culer.text import reading_minutes
+from images.storage import content_addressed_storage
+
 
 class CommunityPost(models.Model):
     title = models.CharField(max_length=200, help_text="Post title")
     content = models.TextField(help_text="Post content")
+    # Stored once per distinct content and reference counted (see community/signals.py)
     image = models.ImageField(
         upload_to='community_posts/', 
+        storage=content_addressed_storage,
         blank=True, 
         null=True,
         help_text="Optional post image"
@@ -26,10 +31,39 @@ class CommunityPost(models.Model):
         help_text="Uncheck to hide post from public view"
     )
     
+    # Computed from content on save so listings can defer the body
+    excerpt = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=1, editable=False, help_text="Minutes")
+    
+    # Filled in the background after an upload (see community/image_pipeline.py)
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Processed image files: format -> [[width, name], ...], narrowest first"
+    )
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Community Post"
         verbose_name_plural = "Community Posts"
+        indexes = [
+            # Partial: Django compares booleans as a bare `WHERE is_published`,
+            # which SQLite can't use as the leading column of an index
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_published=True),
+                name='community_published_idx',
+            ),
+            models.Index(
+                fields=['author', '-created_at', '-id'],
+                condition=models.Q(is_published=True),
+                name='community_author_published_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -37,8 +71,95 @@ class CommunityPost(models.Model):
     def get_absolute_url(self):
         return reverse('community:post_detail', kwargs={'pk': self.pk})
     
-    def get_excerpt(self, length=150):
+    # Characters kept in the stored excerpt
+    EXCERPT_LENGTH = 150
+    
+    # Columns computed from the others on every save (see derive_fields)
+    DERIVED_FIELDS = ('excerpt', 'word_count', 'reading_time')
+    
+    # Describe the processed image; reset whenever a different file is set
+    IMAGE_FIELDS = ('image_variants', 'image_width', 'image_height')
+    
+    def save(self, *args, **kwargs):
+        self.derive_fields()
+        update_fields = kwargs.get('update_fields')
+        if self.image_changed():
+            self.image_variants, self.image_width, self.image_height = {}, None, None
+        # An upload is saved to storage by this save, which counts its reference
+        self._image_uploaded = bool(self.image) and not self.image._committed
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
+            if 'image' in kwargs['update_fields']:
+                kwargs['update_fields'] |= set(self.IMAGE_FIELDS)
+        super().save(*args, **kwargs)
+    
+    def derive_fields(self):
+        """Fill the DERIVED_FIELDS from content"""
+        content = self.content or ''
+        self.excerpt = self._truncate(content, self.EXCERPT_LENGTH)
+        self.word_count = len(content.split())
+        self.reading_time = reading_minutes(self.word_count)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_state()
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_loaded_state()
+    
+    def _remember_loaded_state(self):
+        # The stored image, so saves can tell a new upload from an edit
+        self._loaded_state = {
+            name: str(self.__dict__[name]) if name == 'image' else self.__dict__[name]
+            for name in ('image', 'image_variants')
+            if name in self.__dict__
+        }
+    
+    def image_changed(self):
+        """True for a new image (or a cleared one) since the post was loaded"""
+        previous = getattr(self, '_loaded_state', None)
+        if previous is None:
+            return bool(self.image)
+        if 'image' not in previous:
+            # Loaded without the image column, so it can't have been edited
+            return False
+        return (self.image.name or '') != (previous['image'] or '')
+    
+    def image_srcset(self, fmt):
+        """'url 320w, url 640w, ...' for one processed format ('' until processed)"""
+        return ', '.join(
+            f"{self.image.storage.url(name)} {width}w"
+            for width, name in self.image_variants.get(fmt, [])
+        )
+    
+    @property
+    def webp_srcset(self):
+        return self.image_srcset('webp')
+    
+    @property
+    def jpeg_srcset(self):
+        return self.image_srcset('jpeg')
+    
+    @property
+    def image_src(self):
+        """Fallback src: the widest card-sized JPEG once processed, else the upload"""
+        variants = self.image_variants.get('jpeg', [])
+        fitting = [name for width, name in variants if width <= 640] or [name for _, name in variants]
+        if fitting:
+            return self.image.storage.url(fitting[-1])
+        return self.image.url if self.image else ''
+    
+    @staticmethod
+    def _truncate(content, length):
+        if len(content) <= length:
+            return content
+        return content[:length].rsplit(' ', 1)[0] + '...'
+    
+    def get_excerpt(self, length=EXCERPT_LENGTH):
         """Return a truncated version of content for previews"""
-        if len(self.content) <= length:
-            return self.content
-        return self.content[:length].rsplit(' ', 1)[0] + '...'
\ No newline at end of file
+        if length == self.EXCERPT_LENGTH:
+            return self.excerpt
+        return self._truncate(self.content, length)
\ No newline at end of file
@@ -0,0 +1,32 @@
+# community/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from images.storage import release, retain
+from . import image_pipeline
+from .models import CommunityPost
+
+
+def _image_files(state):
+    """Every stored file a post's image uses: the image and its srcset variants"""
+    return [state.get('image'), *image_pipeline.variant_names(state.get('image_variants') or {})]
+
+
+@receiver(post_save, sender=CommunityPost)
+def process_new_image(sender, instance, raw=False, **kwargs):
+    """Swap the file references and hand a new upload to the image workers on commit"""
+    if raw or not instance.image_changed():
+        return
+    if not getattr(instance, '_image_uploaded', False):
+        # A stored file assigned by name; saved uploads were counted by storage.save()
+        retain([instance.image.name])
+    release(_image_files(getattr(instance, '_loaded_state', None) or {}))
+    instance._loaded_state = {'image': instance.image.name, 'image_variants': instance.image_variants}
+    transaction.on_commit(lambda: image_pipeline.schedule(instance))
+
+
+@receiver(post_delete, sender=CommunityPost)
+def release_deleted_images(sender, instance, **kwargs):
+    """Files of a deleted post are removed unless another post shares them"""
+    release(_image_files({'image': instance.image.name, 'image_variants': instance.image_variants}))
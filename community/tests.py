@@ -1,3 +1,204 @@
-from django.test import TestCase
+import io
+import multiprocessing
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from culer.query_plans import QueryPlanTestCase
+from images.models import StoredFile
+from . import image_pipeline, image_processing, views
+from .models import CommunityPost
+
+
+class CommunityPostQueryPlanTests(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='fan')
+        cls.post = CommunityPost.objects.create(title='Matchday thread', content='...', author=user)
+        CommunityPost.objects.create(title='Away trip', content='...', author=user)
+
+    def test_post_list(self):
+        self.assertIndexedPlans(views.post_list)
+
+    def test_post_detail(self):
+        self.assertIndexedPlans(views.post_detail, pk=self.post.pk)
+
+
+class PostExcerptTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='soci')
+        cls.long_post = CommunityPost.objects.create(
+            title='Season review', author=user, content=' '.join(['Força Barça'] * 300),
+        )
+        cls.short = CommunityPost.objects.create(title='Visca', author=user, content='Visca el Barça')
+
+    def test_derive_fields(self):
+        excerpt = self.long_post.excerpt
+        # Cut at a word boundary within EXCERPT_LENGTH
+        self.assertTrue(excerpt.endswith('...'))
+        self.assertTrue(self.long_post.content.startswith(excerpt[:-3] + ' '))
+        self.assertLessEqual(len(excerpt), CommunityPost.EXCERPT_LENGTH + 3)
+        self.assertEqual((self.long_post.word_count, self.long_post.reading_time), (600, 3))
+        # Short posts are kept whole
+        self.assertEqual((self.short.excerpt, self.short.word_count, self.short.reading_time),
+                         ('Visca el Barça', 3, 1))
+
+    def assertBackfilled(self):
+        for post in CommunityPost.objects.all():
+            stored = (post.excerpt, post.word_count, post.reading_time)
+            post.derive_fields()
+            self.assertEqual(stored, (post.excerpt, post.word_count, post.reading_time))
+            self.assertTrue(post.excerpt)
+
+    def test_backfill_command(self):
+        CommunityPost.objects.update(excerpt='', word_count=0, reading_time=1)
+        out = io.StringIO()
+        call_command('backfill_post_excerpts', '--batch-size', '1', stdout=out)
+        self.assertIn('Backfilled excerpts for 2 posts.', out.getvalue())
+        self.assertBackfilled()
+
+    def test_migration_fills_existing_rows(self):
+        CommunityPost.objects.update(excerpt='', word_count=0, reading_time=1)
+        import_module('community.migrations.0007_backfill_post_excerpt').derive_excerpts(apps, None)
+        self.assertBackfilled()
+
+
+def _jpeg_with_exif(size):
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'  # Make
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (165, 0, 68)).save(buffer, format='JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class ImageProcessingTests(SimpleTestCase):
+
+    def test_metadata_is_stripped_and_dimensions_capped(self):
+        width, height, full, variants = image_processing.render(_jpeg_with_exif((3000, 1000)))
+        # Rotated by its EXIF orientation, then capped
+        self.assertEqual((width, height), (683, 2048))
+        image = Image.open(io.BytesIO(full))
+        self.assertEqual(image.size, (683, 2048))
+        self.assertFalse(image.getexif())
+        self.assertEqual(sorted(variants), [
+            (320, 'jpeg'), (320, 'webp'), (640, 'jpeg'), (640, 'webp'), (683, 'jpeg'), (683, 'webp'),
+        ])
+        self.assertEqual(Image.open(io.BytesIO(variants[320, 'webp'])).format, 'WEBP')
+
+    def test_small_images_are_not_enlarged(self):
+        _, _, _, variants = image_processing.render(_jpeg_with_exif((200, 100)))
+        self.assertEqual(sorted({width for width, _ in variants}), [100])
+
+    def test_renders_in_a_spawned_worker(self):
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            self.assertIsNone(pool.submit(image_processing.render_or_none, b'not an image').result())
+            self.assertEqual(pool.submit(image_processing.render, _jpeg_with_exif((800, 600))).result()[1], 800)
+
+
+@override_settings(COMMUNITY_IMAGE_WORKERS=0)
+class ImagePipelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='photographer')
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        storage = override_settings(MEDIA_ROOT=root)
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+    def upload(self, post=None, size=(1600, 1200)):
+        post = post or CommunityPost(title='Away end', content='...', author=self.user)
+        post.image = SimpleUploadedFile('away.jpg', _jpeg_with_exif(size), 'image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+        return post
+
+    def test_upload_is_replaced_by_processed_files(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            post = CommunityPost.objects.create(
+                title='Away end', content='...', author=self.user,
+                image=SimpleUploadedFile('away.jpg', _jpeg_with_exif((1600, 1200)), 'image/jpeg'),
+            )
+        raw = post.image.name
+        # Nothing is encoded until the upload has committed
+        self.assertEqual(CommunityPost.objects.get(pk=post.pk).image_variants, {})
+        with self.captureOnCommitCallbacks(execute=True):
+            for callback in callbacks:
+                callback()
+
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.startswith(f'{image_pipeline.PROCESSED_DIR}/'))
+        self.assertFalse(image_pipeline.storage.exists(raw))
+        self.assertEqual((post.image_width, post.image_height), (1200, 1600))
+        self.assertEqual([width for width, _ in post.image_variants['webp']], [320, 640, 1200])
+        self.assertIn(' 640w, ', post.webp_srcset)
+        self.assertEqual(post.image_src, image_pipeline.storage.url(post.image_variants['jpeg'][1][1]))
+
+        response = self.client.get('/community/')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, post.jpeg_srcset)
+
+    def test_new_upload_replaces_processed_files(self):
+        post = self.upload()
+        old_files = [post.image.name, *image_pipeline.variant_names(post.image_variants)]
+        post = self.upload(post, size=(1000, 800))
+        self.assertEqual(len(image_pipeline.variant_names(post.image_variants)), 6)
+        self.assertFalse(any(image_pipeline.storage.exists(name) for name in old_files))
+
+    def assertStoredFiles(self, *posts):
+        """Exactly the files the posts use are stored, each counted once per use"""
+        expected = Counter(
+            name for post in posts
+            for name in [post.image.name, *image_pipeline.variant_names(post.image_variants)]
+        )
+        self.assertEqual(dict(StoredFile.objects.values_list('name', 'references')), dict(expected))
+        self.assertTrue(all(image_pipeline.storage.exists(name) for name in expected))
+
+    def test_stale_results_are_discarded(self):
+        post = self.upload()
+        result = image_processing.render(_jpeg_with_exif((400, 300)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(image_pipeline.store(post.pk, 'community_posts/older.jpg', *result))
+        self.assertStoredFiles(post)
+
+    def test_identical_uploads_share_files(self):
+        first, second = self.upload(), self.upload()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertStoredFiles(first, second)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertStoredFiles(second)
+
+    def test_reusing_a_stored_image_counts_a_reference(self):
+        first = self.upload()
+        second = CommunityPost(title='Same photo', content='...', author=self.user, image=first.image.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            second.save()
+        second.refresh_from_db()
+        self.assertStoredFiles(first, second)
+
+    def test_deleting_a_post_removes_its_files(self):
+        post = self.upload()
+        names = [post.image.name, *image_pipeline.variant_names(post.image_variants)]
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertFalse(StoredFile.objects.exists())
+        self.assertFalse(any(image_pipeline.storage.exists(name) for name in names))
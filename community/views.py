@@ -1,13 +1,14 @@
 # community/views.py
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
 from django.db.models import Q
+from culer.pagination import KeysetPaginator
 from .models import CommunityPost
 
 
 def post_list(request):
     """Display all published community posts with pagination and search"""
-    posts = CommunityPost.objects.filter(is_published=True).select_related('author')
+    # Cards show the stored excerpt, so the post bodies stay in the database
+    posts = CommunityPost.objects.filter(is_published=True).select_related('author').defer('content')
     
     # Search functionality
     search_query = request.GET.get('search', '')
@@ -19,14 +20,14 @@ def post_list(request):
         )
     
     # Pagination
-    paginator = Paginator(posts, 6)  # 6 posts per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(posts, 6, ordering=('-created_at', '-id'))  # 6 posts per page
+    page_obj = paginator.get_page(request.GET.get('cursor'), params=request.GET)
     
     context = {
         'page_obj': page_obj,
         'search_query': search_query,
-        'total_posts': posts.count(),
+        # Only the search results banner shows a total
+        'total_posts': posts.count() if search_query else None,
     }
     
     return render(request, 'community/post_list.html', context)
@@ -44,7 +45,7 @@ def post_detail(request, pk):
     related_posts = CommunityPost.objects.filter(
         author=post.author,
         is_published=True
-    ).exclude(pk=post.pk).order_by('-created_at')[:3]
+    ).exclude(pk=post.pk).defer('content').order_by('-created_at')[:3]
     
     context = {
         'post': post,
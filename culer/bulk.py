@@ -0,0 +1,82 @@
+# culer/bulk.py
+"""
+Batched saves for admin edits.
+
+bulk_save() writes a list of already-modified instances with a single
+bulk_update inside one transaction, instead of a full save() and UPDATE
+per row. Models with derived columns expose them as DERIVED_FIELDS and
+fill them in derive_fields() (which save() also calls), so those stay
+correct. bulk_update sends no post_save, so `bulk_saved` is sent instead;
+the apps' signals.py receive it to invalidate caches and refresh side
+tables once per batch.
+
+BatchedChangelistMixin routes a ModelAdmin's list_editable changelist
+save through bulk_save().
+"""
+from django.db import router, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+
+# Sent with sender=<model class>, instances=[...], fields={...}
+bulk_saved = Signal()
+
+
+def bulk_save(instances, fields):
+    """
+    Write `fields` (plus derived columns and auto_now timestamps) for the
+    given changed instances in one transaction. Returns the number of rows.
+    """
+    instances = list(instances)
+    if not instances:
+        return 0
+    model = type(instances[0])
+    fields = set(fields) | set(getattr(model, 'DERIVED_FIELDS', ()))
+    now = timezone.now()
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            fields.add(field.name)
+    for instance in instances:
+        if hasattr(instance, 'derive_fields'):
+            instance.derive_fields()
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                setattr(instance, field.attname, now)
+
+    with transaction.atomic(using=router.db_for_write(model)):
+        model._default_manager.bulk_update(instances, sorted(fields))
+        bulk_saved.send(sender=model, instances=instances, fields=fields)
+    return len(instances)
+
+
+class BatchedChangelistMixin:
+    """
+    Collect the rows a list_editable changelist save changes and write them
+    with one bulk_save() at the end, rather than saving each row.
+    Must come before admin.ModelAdmin in the bases.
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        if not (self.list_editable and request.method == 'POST' and '_save' in request.POST):
+            return super().changelist_view(request, extra_context)
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            request._batched_saves = []
+            try:
+                response = super().changelist_view(request, extra_context)
+                pending = request._batched_saves
+            finally:
+                del request._batched_saves
+            if pending:
+                changed = set()
+                for obj, changed_data in pending:
+                    changed.update(changed_data)
+                bulk_save([obj for obj, _ in pending], changed)
+        return response
+
+    def save_model(self, request, obj, form, change):
+        pending = getattr(request, '_batched_saves', None)
+        if change and pending is not None:
+            # Only rows whose form changed reach here; written in changelist_view
+            pending.append((obj, form.changed_data))
+            return
+        super().save_model(request, obj, form, change)
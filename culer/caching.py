@@ -0,0 +1,27 @@
+# culer/caching.py
+import uuid
+
+from django.core.cache import cache
+
+
+class CacheGeneration:
+    """
+    A token stored under `key` and embedded in other cache keys. Replacing
+    it (bump) orphans every entry built with the old token at once, without
+    having to know their keys; the orphans simply expire.
+    """
+
+    def __init__(self, key):
+        self.key = key
+
+    def token(self):
+        generation = cache.get(self.key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            # add() so concurrent first requests agree on a single token
+            if not cache.add(self.key, generation, None):
+                generation = cache.get(self.key, generation)
+        return generation
+
+    def bump(self):
+        cache.set(self.key, uuid.uuid4().hex, None)
@@ -0,0 +1,161 @@
+# culer/fts.py
+"""
+SQLite FTS5 shadow tables mirroring the searchable text of a model.
+
+One FtsIndex per table (matches.search, analysis.search) keeps the rows in
+step with the model - keyed by its pk as the rowid - and serves ranked,
+highlighted searches. The `filter_column` is stored UNINDEXED for exact
+filtering before the result limit; snippets are cut from `snippet_column`.
+Every call is a no-op (or returns None, so callers can fall back to
+icontains filters) on databases other than SQLite.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection, OperationalError
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+
+# Upper bound on ranked hits returned for a single search
+SEARCH_RESULT_LIMIT = 200
+
+# Private markers used by snippet(); swapped for <mark> tags after escaping
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_END = '\x03'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SearchHit = namedtuple('SearchHit', ['pk', 'rank', 'snippet'])
+
+
+def fts_available():
+    """Check if full-text indexes can be used on this database"""
+    return connection.vendor == 'sqlite'
+
+
+def build_fts_query(search_query):
+    """Turn free user input into a safe FTS5 prefix query (all terms must match)"""
+    tokens = _TOKEN_RE.findall(search_query or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def highlight(snippet):
+    """Escape a raw FTS snippet and wrap the matched terms in <mark> tags"""
+    html = escape(snippet)
+    html = html.replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+def rank_results(queryset, hits):
+    """Restrict a queryset to search hits, ordered by rank and carrying their snippet"""
+    snippets = {hit.pk: hit.snippet for hit in hits}
+    positions = {hit.pk: position for position, hit in enumerate(hits)}
+    results = sorted(queryset.filter(pk__in=positions), key=lambda obj: positions[obj.pk])
+    for obj in results:
+        obj.search_snippet = snippets[obj.pk]
+    return results
+
+
+class FtsIndex:
+    """
+    An FTS5 table of `columns` (rows are (pk, *columns) tuples). `weights`
+    are the bm25() weights of the indexed columns, in order.
+    """
+
+    def __init__(self, table, columns, weights, snippet_column, filter_column=None):
+        self.table = table
+        self.columns = tuple(columns)
+        self.weights = tuple(weights)
+        self.snippet_index = self.columns.index(snippet_column)
+        self.filter_column = filter_column
+        self._insert_sql = (
+            f"INSERT INTO {table} (rowid, {', '.join(self.columns)}) "
+            f"VALUES ({', '.join(['%s'] * (len(self.columns) + 1))})"
+        )
+
+    def index(self, rows):
+        """Insert or refresh rows (used per save and by bulk paths that skip signals)"""
+        if not fts_available():
+            return
+        rows = list(rows)
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(self._insert_sql, rows)
+
+    def unindex(self, pk):
+        """Remove one row from the index"""
+        if not fts_available():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [pk])
+
+    def rebuild(self, rows, batch_size):
+        """Replace the whole index with an iterable of rows, in batches"""
+        if not fts_available():
+            return 0
+        total = 0
+        batch = []
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    cursor.executemany(self._insert_sql, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(self._insert_sql, batch)
+                total += len(batch)
+        return total
+
+    def search(self, search_query, filter_value=None, limit=SEARCH_RESULT_LIMIT):
+        """
+        Ranked hits for a search query, best match first, optionally
+        restricted to one filter_column value (before the limit is applied).
+        Returns None when the index cannot serve the query.
+        """
+        if not fts_available():
+            return None
+        fts_query = build_fts_query(search_query)
+        if not fts_query:
+            return []
+        weights = ', '.join(str(weight) for weight in self.weights)
+        sql = (
+            f"SELECT rowid, bm25({self.table}, {weights}) AS rank, "
+            f"snippet({self.table}, {self.snippet_index}, %s, %s, '…', 24) "
+            f"FROM {self.table} WHERE {self.table} MATCH %s"
+        )
+        params = [_HIGHLIGHT_START, _HIGHLIGHT_END, fts_query]
+        if filter_value:
+            sql += f" AND {self.filter_column} = %s"
+            params.append(filter_value)
+        sql += " ORDER BY rank LIMIT %s"
+        params.append(limit)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+        except OperationalError:
+            # Index missing (e.g. FTS5 not compiled in) - let the caller fall back
+            return None
+        return [SearchHit(pk, rank, highlight(snippet)) for pk, rank, snippet in rows]
+
+    def filter(self, queryset, search_query):
+        """
+        Every row of queryset matching the query, unranked and unlimited,
+        through a subquery rather than a list of ids (which SQLite caps at
+        its variable limit). Returns None when the index cannot serve it.
+        """
+        # LIMIT 0 still prepares the statement, so a missing index shows here
+        if self.search(search_query, limit=0) is None:
+            return None
+        fts_query = build_fts_query(search_query)
+        if not fts_query:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [fts_query]
+        ))
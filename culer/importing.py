@@ -0,0 +1,286 @@
+# culer/importing.py
+"""
+Streaming bulk import shared by the import_data command.
+
+Rows are read lazily from CSV or JSONL (optionally gzipped), validated
+with the model's own field validation, and upserted by a natural key in
+batches: each batch looks up the existing rows with one query, then
+writes new rows with bulk_create and changed ones with a single
+executemany UPDATE inside a transaction; identical rows are skipped.
+Because the bulk writes skip save() and signals, each importer fills in
+its derived columns itself and brings any side tables up to date once
+per batch.
+
+A bad row is reported and skipped; it never stops the run.
+"""
+import csv
+import gzip
+import io
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections, models, router, transaction
+from django.utils import timezone
+
+
+class RowError(Exception):
+    """A single input row could not be imported"""
+
+
+def open_text(path):
+    """Open a (possibly gzipped) file for streaming text reads"""
+    if str(path).endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def detect_format(path):
+    name = str(path).lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line_number, row) pairs one at a time. A JSONL line that is not
+    a JSON object is yielded as a RowError instead of a dict.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, RowError(f'invalid JSON: {exc}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError('expected a JSON object')
+            continue
+        yield line_number, row
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _error_message(exc):
+    if isinstance(exc, ValidationError) and hasattr(exc, 'message_dict'):
+        return '; '.join(
+            f"{field}: {' '.join(messages)}" for field, messages in exc.message_dict.items()
+        )
+    if isinstance(exc, ValidationError):
+        return ' '.join(exc.messages)
+    return str(exc)
+
+
+class Importer:
+    """
+    Upsert rows into one model. Subclasses set `model`, the importable
+    `fields` and the natural key, and may override prepare() and
+    after_batch() to maintain derived data.
+    """
+
+    model = None
+    fields = ()
+    required = ()
+    natural_key = ()
+
+    def __init__(self, defaults=None):
+        # Values applied to every row that does not provide them (e.g. posted_by)
+        self.defaults = defaults or {}
+
+    # --- row level -------------------------------------------------------
+
+    def build(self, row):
+        """Turn a raw row into a validated, unsaved model instance"""
+        values = {}
+        for name in self.fields:
+            value = row.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            if value in ('', None):
+                field = self.model._meta.get_field(name)
+                if name in self.required:
+                    raise RowError(f'{name}: this field is required')
+                value = None if field.null else field.get_default()
+            values[name] = value
+        instance = self.model(**{**self.defaults, **values})
+        instance.full_clean(exclude=self.unvalidated_fields(), validate_unique=False)
+        self.normalize(instance)
+        return instance
+
+    def unvalidated_fields(self):
+        """Fields full_clean should skip: anything not read from the row"""
+        return [
+            field.name for field in self.model._meta.concrete_fields
+            if field.name not in self.fields
+        ]
+
+    def normalize(self, instance):
+        """Post-validation clean up, e.g. making datetimes timezone aware"""
+        for name in self.fields:
+            field = self.model._meta.get_field(name)
+            value = getattr(instance, name)
+            if isinstance(field, models.DateTimeField) and value and timezone.is_naive(value):
+                setattr(instance, name, timezone.make_aware(value))
+
+    def prepare(self, instance):
+        """Fill derived columns that save() would normally compute"""
+
+    def key_for(self, instance):
+        return tuple(getattr(instance, name) for name in self.natural_key)
+
+    def existing(self, keys):
+        """Map natural key -> saved instance for the keys in one batch"""
+        first = self.natural_key[0]
+        candidates = self.model._default_manager.filter(
+            **{f'{first}__in': {key[0] for key in keys}}
+        )
+        found = {}
+        for instance in candidates:
+            key = self.key_for(instance)
+            if key in keys:
+                found[key] = instance
+        return found
+
+    def derived_fields(self):
+        """Columns prepare() fills, written by bulk_update alongside the row fields"""
+        return ()
+
+    def after_batch(self, created, updated):
+        """Bring side tables in step with a written batch"""
+
+    def finish(self):
+        """Called once after the last batch"""
+
+    # --- batch level -----------------------------------------------------
+
+    def write_batch(self, instances):
+        """Upsert validated instances; returns (created, updated, unchanged) lists"""
+        by_key = {}
+        for instance in instances:
+            by_key[self.key_for(instance)] = instance  # last row for a key wins
+        current = self.existing(set(by_key))
+
+        compared = list(self.fields) + list(self.derived_fields())
+        to_create, to_update, unchanged = [], [], []
+        for key, instance in by_key.items():
+            saved = current.get(key)
+            if saved is None:
+                self.prepare(instance)
+                to_create.append(instance)
+                continue
+            before = [getattr(saved, name) for name in compared]
+            for name in self.fields:
+                setattr(saved, name, getattr(instance, name))
+            self.prepare(saved)
+            if [getattr(saved, name) for name in compared] == before:
+                # Re-importing the same file is cheap: identical rows aren't rewritten
+                unchanged.append(saved)
+            else:
+                to_update.append(saved)
+
+        try:
+            with transaction.atomic():
+                self.model._default_manager.bulk_create(to_create)
+                self.update_rows(to_update, compared)
+                self.after_batch(to_create, to_update)
+        except DatabaseError:
+            # Rolled back: forget primary keys handed out by the failed insert
+            for instance in to_create:
+                instance.pk = None
+            raise
+        return to_create, to_update, unchanged
+
+    def update_rows(self, instances, field_names):
+        """
+        UPDATE ... WHERE pk = %s through executemany. QuerySet.bulk_update
+        builds a CASE expression per field per row, which costs far more
+        Python time than the database work at import batch sizes.
+        """
+        if not instances:
+            return
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        fields = [self.model._meta.get_field(name) for name in field_names]
+        updated_at = next(
+            (f for f in self.model._meta.concrete_fields if f.name == 'updated_at'), None
+        )
+        if updated_at is not None:
+            # auto_now isn't applied outside save()
+            now = timezone.now()
+            for instance in instances:
+                instance.updated_at = now
+            fields.append(updated_at)
+        sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+            quote(self.model._meta.db_table),
+            ', '.join(f'{quote(field.column)} = %s' for field in fields),
+            quote(self.model._meta.pk.column),
+        )
+        params = [
+            [field.get_db_prep_save(getattr(instance, field.attname), connection) for field in fields]
+            + [instance.pk]
+            for instance in instances
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+    def run(self, rows, batch_size=500, on_error=None, on_progress=None):
+        """
+        Import (line_number, row) pairs. on_error(line_number, row, message)
+        is called for every rejected row; on_progress(stats) after every batch.
+        """
+        stats = {'read': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'rejected': 0}
+
+        def reject(line_number, row, message):
+            stats['rejected'] += 1
+            if on_error:
+                on_error(line_number, row, message)
+
+        for chunk in batched(rows, batch_size):
+            built = []
+            for line_number, row in chunk:
+                stats['read'] += 1
+                try:
+                    if isinstance(row, RowError):
+                        raise row
+                    built.append((line_number, row, self.build(row)))
+                except (RowError, ValidationError, ValueError, TypeError) as exc:
+                    reject(line_number, row, _error_message(exc))
+
+            if built:
+                try:
+                    results = [self.write_batch([instance for _, _, instance in built])]
+                except DatabaseError:
+                    # Something in the batch violates a database constraint:
+                    # retry row by row so only the offending rows are lost
+                    results = []
+                    for line_number, row, instance in built:
+                        try:
+                            results.append(self.write_batch([instance]))
+                        except DatabaseError as exc:
+                            reject(line_number, row, str(exc))
+                for created, updated, unchanged in results:
+                    stats['created'] += len(created)
+                    stats['updated'] += len(updated)
+                    stats['unchanged'] += len(unchanged)
+
+            if on_progress:
+                on_progress(stats)
+        self.finish()
+        return stats
@@ -0,0 +1,168 @@
+# culer/page_views.py
+"""
+Buffered page-view counting.
+
+Detail views call ViewCounter.record(pk), which only bumps an in-process
+Counter. A daemon thread flushes every counter each
+PAGE_VIEW_FLUSH_INTERVAL seconds: per model, one UPDATE adds the buffered
+views to <model>.view_count (a CASE over the viewed ids), and one upsert
+adds them to per-day rollup rows. A GET therefore never writes to the
+database, and SQLite takes its write lock once per interval per process
+instead of once per page view.
+
+The daily rollups answer "most read this week" with one grouped query
+over the last seven days, cached for PAGE_VIEW_RANKING_CACHE_TIMEOUT.
+Views buffered when a process dies without running its exit hooks are
+lost; at most one interval's worth.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+# Viewed ids per UPDATE statement (keeps the CASE well under SQLite's variable limit)
+UPDATE_BATCH_SIZE = 500
+
+_counters = []
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def is_enabled():
+    return getattr(settings, 'PAGE_VIEW_COUNTING', False)
+
+
+class ViewCounter:
+    """
+    View counts for one model: its `view_count` column plus a rollup model
+    with (<rollup_field>, day, views) rows, unique per object and day.
+    """
+
+    def __init__(self, model, rollup_model, rollup_field):
+        self.model = model
+        self.rollup_model = rollup_model
+        self.rollup_field = rollup_field
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        _counters.append(self)
+
+    def record(self, pk):
+        """Count one view of an object; memory only, safe on the request path"""
+        if not is_enabled():
+            return
+        day = timezone.localdate()
+        with self._lock:
+            self._counts[pk, day] += 1
+        _ensure_flusher()
+
+    def pending(self):
+        with self._lock:
+            return sum(self._counts.values())
+
+    def flush(self):
+        """Write the buffered views; on failure they go back in the buffer"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+        try:
+            self.write(counts)
+        except Exception:
+            logger.exception('Failed to write %d buffered %s views', sum(counts.values()), self.model.__name__)
+            with self._lock:
+                self._counts.update(counts)
+            return 0
+        return sum(counts.values())
+
+    def write(self, counts):
+        """Add {(pk, day): views} to the view counts and the daily rollups"""
+        totals = Counter()
+        for (pk, _), views in counts.items():
+            totals[pk] += views
+        ids = list(totals)
+        with transaction.atomic():
+            for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+                batch = ids[start:start + UPDATE_BATCH_SIZE]
+                self.model.objects.filter(pk__in=batch).update(view_count=F('view_count') + Case(
+                    *[When(pk=pk, then=Value(totals[pk])) for pk in batch], default=Value(0),
+                ))
+            self._upsert_rollups(counts)
+
+    def _upsert_rollups(self, counts):
+        # Rows for deleted objects would fail the foreign key, so skip them
+        existing = set(
+            self.model.objects.filter(pk__in={pk for pk, _ in counts}).order_by().values_list('pk', flat=True)
+        )
+        rows = [(pk, day, views) for (pk, day), views in counts.items() if pk in existing]
+        if not rows:
+            return
+        meta = self.rollup_model._meta
+        table = connection.ops.quote_name(meta.db_table)
+        object_column = connection.ops.quote_name(meta.get_field(self.rollup_field).column)
+        # Django's bulk_create(update_conflicts=True) can only overwrite, not add
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {table} ({object_column}, day, views) VALUES (%s, %s, %s) '
+                f'ON CONFLICT ({object_column}, day) DO UPDATE SET views = {table}.views + excluded.views',
+                rows
+            )
+
+    def most_read(self, queryset=None, days=7, limit=5):
+        """
+        [(object, views)] for the most viewed objects over the last `days`
+        days (today included), from the rollups; cached briefly.
+        """
+        key = f'most-read:{self.model._meta.label_lower}:{days}:{limit}'
+        ranking = cache.get(key)
+        if ranking is None:
+            since = timezone.localdate() - timedelta(days=days - 1)
+            ranking = list(
+                self.rollup_model.objects.filter(day__gte=since).values_list(
+                    f'{self.rollup_field}_id'
+                ).annotate(total=Sum('views')).order_by('-total', f'-{self.rollup_field}_id')[:limit]
+            )
+            cache.set(key, ranking, getattr(settings, 'PAGE_VIEW_RANKING_CACHE_TIMEOUT', 300))
+        if not ranking:
+            return []
+        queryset = self.model.objects.all() if queryset is None else queryset
+        objects = queryset.in_bulk([pk for pk, _ in ranking])
+        return [(objects[pk], views) for pk, views in ranking if pk in objects]
+
+
+def flush_all():
+    """Write every counter's buffered views (the flusher thread, and at exit)"""
+    close_old_connections()
+    return sum(counter.flush() for counter in _counters)
+
+
+def _ensure_flusher():
+    global _flusher
+    interval = getattr(settings, 'PAGE_VIEW_FLUSH_INTERVAL', 10)
+    if not interval or (_flusher is not None and _flusher.is_alive()):
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(
+                target=_run, args=(interval,), name='page-view-flusher', daemon=True
+            )
+            _flusher.start()
+
+
+def _run(interval):
+    while True:
+        time.sleep(interval)
+        flush_all()
+
+
+atexit.register(flush_all)
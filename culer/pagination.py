@@ -0,0 +1,255 @@
+# culer/pagination.py
+"""
+Keyset (cursor) pagination shared by the listing views.
+
+Django's Paginator runs a COUNT(*) and an OFFSET scan for every page, so deep
+pages get slower as the archive grows. KeysetPaginator instead remembers the
+sort key of the last row it showed and asks for "rows after this key", which
+an index on the ordering columns answers in the same time for page 1 and
+page 5000.
+"""
+import base64
+import json
+import operator
+from functools import reduce
+from urllib.parse import urlencode
+
+from django.db.models import F, Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _json_default(value):
+    # Full precision on purpose: DjangoJSONEncoder drops microseconds, which
+    # would make two rows created in the same millisecond indistinguishable
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(payload):
+    """Pack a cursor payload into an opaque, URL-safe token"""
+    raw = json.dumps(payload, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Unpack a token produced by encode_cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    if not isinstance(payload, dict):
+        raise InvalidCursor(token)
+    return payload
+
+
+class CursorPage:
+    """A page of results with opaque next/previous cursors"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None,
+                 params=None, cursor_param='cursor'):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._params = params
+        self._cursor_param = cursor_param
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _url_for(self, cursor):
+        params = {}
+        if self._params is not None:
+            params = {key: value for key, value in self._params.items() if key != self._cursor_param}
+        params[self._cursor_param] = cursor
+        return '?' + urlencode(params)
+
+    @property
+    def next_page_url(self):
+        return self._url_for(self.next_cursor) if self.has_next() else None
+
+    @property
+    def previous_page_url(self):
+        return self._url_for(self.previous_cursor) if self.has_previous() else None
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by its ordering instead of by OFFSET.
+
+    `ordering` must be a unique sort key, so always end it with the primary
+    key, e.g. ('-date', '-id'). Nullable columns sort NULLs last.
+    """
+
+    def __init__(self, queryset, per_page, ordering, cursor_param='cursor'):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.cursor_param = cursor_param
+        self.keys = [self._parse_key(queryset.model, key) for key in ordering]
+
+    @staticmethod
+    def _parse_key(model, key):
+        descending = key.startswith('-')
+        name = key.lstrip('-')
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        return {
+            'name': field.attname,
+            'field': field,
+            'descending': descending,
+            'nulls_last': field.null,
+        }
+
+    @staticmethod
+    def _reversed(key):
+        return dict(
+            key,
+            descending=not key['descending'],
+            nulls_last=not key['nulls_last'] if key['field'].null else False,
+        )
+
+    @staticmethod
+    def _order_expression(key):
+        expression = F(key['name'])
+        if not key['field'].null:
+            return expression.desc() if key['descending'] else expression.asc()
+        if key['nulls_last']:
+            nulls = {'nulls_last': True}
+        else:
+            nulls = {'nulls_first': True}
+        return expression.desc(**nulls) if key['descending'] else expression.asc(**nulls)
+
+    @staticmethod
+    def _after(key, value):
+        """Rows that sort strictly after `value` in this key's direction"""
+        name = key['name']
+        if value is None:
+            if key['nulls_last']:
+                return Q(pk__in=[])
+            return Q(**{f'{name}__isnull': False})
+        lookup = 'lt' if key['descending'] else 'gt'
+        condition = Q(**{f'{name}__{lookup}': value})
+        if key['field'].null and key['nulls_last']:
+            condition |= Q(**{f'{name}__isnull': True})
+        return condition
+
+    @staticmethod
+    def _equal(key, value):
+        if value is None:
+            return Q(**{f"{key['name']}__isnull": True})
+        return Q(**{key['name']: value})
+
+    def _seek(self, keys, values):
+        """Build the (a, b, c) > (x, y, z) row comparison as an OR of prefixes"""
+        branches = []
+        prefix = Q()
+        for key, value in zip(keys, values):
+            branches.append(prefix & self._after(key, value))
+            prefix &= self._equal(key, value)
+        return reduce(operator.or_, branches)
+
+    def _values_for(self, obj):
+        return [getattr(obj, key['name']) for key in self.keys]
+
+    def _decode_values(self, values):
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise InvalidCursor(values)
+        try:
+            return [
+                None if value is None else key['field'].to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except Exception:
+            raise InvalidCursor(values)
+
+    def get_page(self, cursor=None, params=None):
+        """
+        Return the page identified by `cursor` (first page when missing).
+        An unreadable cursor falls back to the first page, like
+        Paginator.get_page does for out of range numbers.
+        """
+        direction, values = 'next', None
+        if cursor:
+            try:
+                payload = decode_cursor(cursor)
+                direction = 'prev' if payload.get('d') == 'p' else 'next'
+                values = self._decode_values(payload.get('k'))
+            except InvalidCursor:
+                direction, values = 'next', None
+
+        keys = self.keys if direction == 'next' else [self._reversed(key) for key in self.keys]
+        queryset = self.queryset.order_by(*[self._order_expression(key) for key in keys])
+        if values is not None:
+            queryset = queryset.filter(self._seek(keys, values))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'prev':
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            first_key = self._values_for(rows[0])
+            last_key = self._values_for(rows[-1])
+            if direction == 'next':
+                if has_more:
+                    next_cursor = encode_cursor({'d': 'n', 'k': last_key})
+                if values is not None:
+                    previous_cursor = encode_cursor({'d': 'p', 'k': first_key})
+            else:
+                next_cursor = encode_cursor({'d': 'n', 'k': last_key})
+                if has_more:
+                    previous_cursor = encode_cursor({'d': 'p', 'k': first_key})
+
+        return CursorPage(rows, next_cursor, previous_cursor, params, self.cursor_param)
+
+
+class SequencePaginator:
+    """
+    Cursor pagination over an already materialised, bounded list (e.g. ranked
+    search hits), exposing the same page interface as KeysetPaginator.
+    """
+
+    def __init__(self, object_list, per_page, cursor_param='cursor'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.cursor_param = cursor_param
+
+    def get_page(self, cursor=None, params=None):
+        offset = 0
+        if cursor:
+            try:
+                offset = int(decode_cursor(cursor).get('o', 0))
+            except (InvalidCursor, TypeError, ValueError):
+                offset = 0
+        offset = max(0, min(offset, len(self.object_list)))
+
+        rows = self.object_list[offset:offset + self.per_page]
+        next_cursor = previous_cursor = None
+        if offset + self.per_page < len(self.object_list):
+            next_cursor = encode_cursor({'o': offset + self.per_page})
+        if offset > 0:
+            previous_cursor = encode_cursor({'o': max(0, offset - self.per_page)})
+        return CursorPage(rows, next_cursor, previous_cursor, params, self.cursor_param)
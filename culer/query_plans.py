@@ -0,0 +1,107 @@
+# culer/query_plans.py
+"""
+Query-plan regression checks for the listing views.
+
+QueryPlanTestCase calls a view with Django's RequestFactory, swaps the
+view module's render() for one that just records the context, forces any
+lazy querysets left in that context, and runs EXPLAIN QUERY PLAN on every
+SELECT the view issued. The view is called once beforehand so that
+results it caches (e.g. transfer facet counts) are not part of the
+per-request queries being checked. A plan step that scans a whole table or sorts
+through a temporary B-tree fails the test, so a new filter or ordering
+without a matching index is caught before it reaches production.
+
+Only SQLite plans are understood; on other databases the checks skip.
+"""
+import unittest
+from unittest import mock
+
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+
+def explain(sql, params=()):
+    """Return the detail column of EXPLAIN QUERY PLAN for one statement"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(details, allowed=()):
+    """
+    Plan steps that read a whole table or sort in a temporary B-tree.
+    Index scans ('SCAN t USING INDEX ...') walk an index in order and are
+    fine; so are the FTS5 virtual tables, which bring their own index.
+    Steps containing any of the `allowed` substrings are ignored.
+    """
+    problems = []
+    for detail in details:
+        if any(fragment in detail for fragment in allowed):
+            continue
+        if detail.startswith('SCAN ') and 'USING' not in detail and 'VIRTUAL TABLE' not in detail:
+            problems.append(detail)
+        elif 'USE TEMP B-TREE' in detail:
+            problems.append(detail)
+    return problems
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN checks are SQLite specific')
+class QueryPlanTestCase(TestCase):
+    """
+    Base class for the per-app query-plan tests: every view or query an
+    app checks must be answered from an index, without a full table scan
+    or a temporary sort.
+    """
+
+    factory = RequestFactory()
+
+    def run_view(self, view, params=None, **view_kwargs):
+        """
+        Call a view without rendering its template and return the SQL of
+        every SELECT it ran, including querysets it only handed to the
+        template.
+        """
+        module = __import__(view.__module__, fromlist=['render'])
+        captured = {}
+
+        def fake_render(request, template_name, context=None, *render_args, **render_kwargs):
+            captured['context'] = context or {}
+            return HttpResponse()
+
+        with mock.patch.object(module, 'render', fake_render):
+            view(self.factory.get('/', params or {}), **view_kwargs)
+            captured.clear()
+            with CaptureQueriesContext(connection) as queries:
+                view(self.factory.get('/', params or {}), **view_kwargs)
+                for value in captured.get('context', {}).values():
+                    if isinstance(value, QuerySet):
+                        list(value)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+
+    def assertIndexedPlans(self, view, params=None, allowed=(), **view_kwargs):
+        """Fail if any SELECT the view runs needs a full table scan or a temp sort"""
+        statements = self.run_view(view, params, **view_kwargs)
+        self._assert_statements(statements, f'{view.__name__}{params or ""}', allowed)
+
+    def assertIndexedQueries(self, func, allowed=()):
+        """Like assertIndexedPlans, for the SELECTs of any callable (e.g. a cache loader)"""
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        statements = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+        self._assert_statements(statements, func.__name__, allowed)
+
+    def _assert_statements(self, statements, label, allowed):
+        self.assertTrue(statements, f'{label} ran no queries')
+        for sql in statements:
+            # Captured SQL has its parameters inlined, ready for EXPLAIN
+            problems = plan_problems(explain(sql), allowed)
+            self.assertFalse(problems, f'{label}: {", ".join(problems)}\n  {sql}')
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
     'transfers.apps.TransfersConfig',
     'analysis.apps.AnalysisConfig',
     'community.apps.CommunityConfig',
+    'images.apps.ImagesConfig',
     'customadmin'
 ]
 
@@ -97,6 +98,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# Transfer facets and timelines, most-read rankings and CacheGeneration
+# tokens (culer/caching.py) are invalidated by writing to the cache, so it
+# must be shared by every worker process: with the per-process default
+# (LocMemCache), a save in one worker would leave the others serving stale
+# entries until they expire. The file cache is shared by all processes on
+# this host with no extra service; point this at Redis or Memcached to
+# share it across hosts, or to use COMMENT_THROTTLE_BACKEND = 'cache',
+# which needs their atomic add/incr.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -137,6 +158,64 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Comment write-behind: queue validated comments in-process and insert them
+# in batches from a background thread (see matches/write_behind.py)
+COMMENT_WRITE_BEHIND = False
+COMMENT_WRITE_BEHIND_BATCH_SIZE = 50
+COMMENT_WRITE_BEHIND_INTERVAL = 0.5  # seconds
+# Attempts per batch (with exponential backoff) before it is appended to the
+# spill file; replay_spilled_comments inserts spilled comments later
+COMMENT_WRITE_BEHIND_RETRIES = 5
+COMMENT_WRITE_BEHIND_SPILL_FILE = os.path.join(BASE_DIR, 'comment_spill.jsonl')
+
+# Comment admission control (see matches/throttle.py). Rates are
+# (burst, comments per minute); use the 'cache' backend to share buckets
+# across worker processes through CACHES['default'] (Redis or Memcached).
+COMMENT_THROTTLE_BACKEND = 'memory'
+COMMENT_THROTTLE_IP_RATE = (5, 6)
+COMMENT_THROTTLE_MATCH_RATE = (100, 600)
+COMMENT_DUPLICATE_WINDOW = 300  # seconds
+
+# Reverse proxies (addresses or networks) whose X-Forwarded-For is believed
+# when working out a client's IP; with none, REMOTE_ADDR is always used
+TRUSTED_PROXIES = []
+
+# How long grouped transfer facet counts stay cached (see transfers/facets.py);
+# saving or deleting a Transfer invalidates them immediately
+TRANSFER_FACET_CACHE_TIMEOUT = 600  # seconds
+
+# How long player/club timeline summaries stay cached (see transfers/timelines.py);
+# editing a Transfer drops the timelines of its player and clubs immediately
+TRANSFER_TIMELINE_CACHE_TIMEOUT = 3600  # seconds
+
+# Image proxy (see images/proxy.py): resized copies of external images are
+# kept under IMAGE_PROXY_ROOT, least recently used first out past the cap
+IMAGE_PROXY_ROOT = os.path.join(MEDIA_ROOT, 'image-cache')
+IMAGE_PROXY_MAX_BYTES = 256 * 1024 * 1024
+IMAGE_PROXY_MAX_SOURCE_BYTES = 10 * 1024 * 1024
+IMAGE_PROXY_TIMEOUT = 5  # seconds per source download
+IMAGE_PROXY_MAX_AGE = 365 * 24 * 3600  # browser cache lifetime, seconds
+
+# Worker processes that re-encode community post uploads in the background
+# (see community/image_pipeline.py); 0 encodes inline when the upload commits
+COMMUNITY_IMAGE_WORKERS = 2
+
+# Related articles (see analysis/related.py) are refreshed by a background
+# thread this many seconds after an edit, together with any other edits made
+# meanwhile; None refreshes them as soon as the edit commits
+RELATED_ARTICLES_REFRESH_DELAY = 2  # seconds
+
+# Page-view counting (see culer/page_views.py): views are buffered in-process
+# and flushed in one batched write per model every PAGE_VIEW_FLUSH_INTERVAL
+# seconds (None: only when page_views.flush_all() is called). The test
+# settings (culer/testing.py) turn it off.
+PAGE_VIEW_COUNTING = True
+PAGE_VIEW_FLUSH_INTERVAL = 10  # seconds
+PAGE_VIEW_RANKING_CACHE_TIMEOUT = 300  # seconds
+
+# Tests run with the overrides in culer/testing.py (e.g. a per-process cache)
+TEST_RUNNER = 'culer.testing.TestRunner'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,5 @@
+# Settings module for test runners that don't go through TEST_RUNNER
+from .settings import *  # noqa: F401,F403
+from .testing import TEST_SETTINGS
+
+globals().update(TEST_SETTINGS)
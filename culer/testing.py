@@ -0,0 +1,36 @@
+# culer/testing.py
+"""
+Settings every test run needs, whatever starts it.
+
+`manage.py test` and `python -m django test` pick them up through
+TEST_RUNNER; other runners (e.g. pytest-django) can use the
+culer.test_settings module, which applies the same overrides.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+TEST_SETTINGS = {
+    # Tests clear the cache freely; keep that away from the shared file cache
+    'CACHES': {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    },
+    # Views would otherwise be flushed at exit, after the test database is
+    # gone; tests that count views enable it with override_settings
+    'PAGE_VIEW_COUNTING': False,
+    # Refresh related articles on commit, where assertions can see them
+    'RELATED_ARTICLES_REFRESH_DELAY': None,
+}
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner that applies TEST_SETTINGS for the whole run"""
+
+    def setup_test_environment(self, **kwargs):
+        self._test_settings = override_settings(**TEST_SETTINGS)
+        self._test_settings.enable()
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        self._test_settings.disable()
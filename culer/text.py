@@ -0,0 +1,43 @@
+# culer/text.py
+import math
+import re
+import unicodedata
+
+
+# Separators: everything that isn't a letter or digit, in any script
+_SEPARATOR_RE = re.compile(r'[\W_]+')
+
+# Letters NFKD leaves whole instead of splitting into a base letter and an
+# accent, so stripping accents alone would keep them apart from plain spellings
+_TRANSLITERATIONS = str.maketrans({
+    'ø': 'o', 'Ø': 'O',
+    'ł': 'l', 'Ł': 'L',
+    'đ': 'd', 'Đ': 'D',
+    'ð': 'd', 'Ð': 'D',
+    'þ': 'th', 'Þ': 'Th',
+    'æ': 'ae', 'Æ': 'Ae',
+    'œ': 'oe', 'Œ': 'Oe',
+    'ß': 'ss',
+    'ı': 'i',
+})
+
+# Average adult reading speed used for "N min read"
+READING_WORDS_PER_MINUTE = 200
+
+
+def normalize_key(name):
+    """
+    Case-folded, accent-stripped lookup key with spacing and punctuation
+    removed, so 'Atlético Madrid' and 'atletico  madrid' (or 'Gündoğan' and
+    'Gundogan', 'Ødegaard' and 'Odegaard') compare equal. Letters of other
+    scripts are kept, so 'Кубарси' gets a key of its own.
+    """
+    transliterated = (name or '').translate(_TRANSLITERATIONS)
+    decomposed = unicodedata.normalize('NFKD', transliterated)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SEPARATOR_RE.sub('', stripped.casefold())
+
+
+def reading_minutes(word_count):
+    """Whole minutes to read `word_count` words; never less than one"""
+    return max(1, math.ceil(word_count / READING_WORDS_PER_MINUTE))
@@ -28,6 +28,7 @@ urlpatterns = [
     path('analysis/', include('analysis.urls')),    # Tactical analysis, blogs
     path('community/', include('community.urls')),  # Polls, comments, quizzes
     path('about/', include('about.urls')),          # Club info, history, etc.
+    path('images/', include('images.urls')),        # Resized copies of external images
     # path('customadmin/', include('customadmin.urls')),
 ]
 
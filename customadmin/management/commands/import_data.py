@@ -0,0 +1,103 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from culer.importing import detect_format, open_text, read_rows
+from matches.importers import MatchImporter
+from players.importers import PlayerImporter
+from transfers.importers import TransferImporter
+
+
+IMPORTERS = {
+    'matches': MatchImporter,
+    'transfers': TransferImporter,
+    'players': PlayerImporter,
+}
+
+# Importers whose model has a required posted_by user
+NEEDS_USER = {'matches', 'transfers'}
+
+
+class DryRun(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream a CSV or JSONL file (optionally .gz) of matches, transfers or players '
+        'into the database, upserting by natural key in batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--user', help='Username recorded as posted_by (default: first superuser)')
+        parser.add_argument('--rejects', help='Write rejected rows here as JSONL, with the reason')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate and write everything, then roll back')
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        defaults = {}
+        if kind in NEEDS_USER:
+            defaults['posted_by'] = self._user(options['user'])
+        importer = IMPORTERS[kind](defaults=defaults)
+        fmt = options['format'] or detect_format(options['path'])
+
+        rejects = open(options['rejects'], 'w', encoding='utf-8') if options['rejects'] else None
+        started = time.monotonic()
+
+        def on_error(line_number, row, message):
+            self.stderr.write(f'  line {line_number}: {message}')
+            if rejects:
+                raw = row if isinstance(row, dict) else None
+                rejects.write(json.dumps({'line': line_number, 'error': message, 'row': raw}) + '\n')
+
+        def on_progress(stats):
+            self.stdout.write(
+                f"  {stats['read']} rows read, {stats['created']} created, "
+                f"{stats['updated']} updated, {stats['unchanged']} unchanged, "
+                f"{stats['rejected']} rejected..."
+            )
+
+        try:
+            with open_text(options['path']) as stream:
+                rows = read_rows(stream, fmt)
+                if options['dry_run']:
+                    try:
+                        with transaction.atomic():
+                            stats = importer.run(rows, options['batch_size'], on_error, on_progress)
+                            raise DryRun
+                    except DryRun:
+                        pass
+                else:
+                    stats = importer.run(rows, options['batch_size'], on_error, on_progress)
+        except OSError as exc:
+            raise CommandError(f'Cannot read {options["path"]}: {exc}')
+        finally:
+            if rejects:
+                rejects.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Dry run: ' if options['dry_run'] else ''}Imported {kind} in {elapsed:.1f}s: "
+            f"{stats['created']} created, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, {stats['rejected']} rejected of {stats['read']} rows."
+        ))
+
+    def _user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'No user named {username!r}')
+        user = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('No superuser found; pass --user')
+        return user
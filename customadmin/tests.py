@@ -1,3 +1,121 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
-# Create your tests here.
+from matches import search
+from matches.models import HeadToHead, Match
+from transfers import timelines
+from transfers.models import Transfer
+
+
+MATCHES_CSV = """opponent,date,venue,competition,result,summary
+Real Madrid,2024-04-21 21:00,AWAY,LA_LIGA,2-3,Clásico in the Bernabéu.
+Real Madrid,2024-10-26 21:00,AWAY,LA_LIGA,4-0,Four past Lunin.
+Osasuna,2024-01-10 19:00,HOME,COPA_DEL_REY,1-0,Lamine Yamal decides it.
+,2024-02-01 19:00,HOME,LA_LIGA,,No opponent.
+Girona,not a date,HOME,LA_LIGA,,Bad kickoff.
+"""
+
+
+class ImportDataTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as stream:
+            stream.write(text)
+        return path
+
+    def run_import(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_data', *args, '--batch-size', '2', stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_matches_are_upserted_indexed_and_counted(self):
+        rejects = os.path.join(self.directory, 'rejects.jsonl')
+        path = self.write('matches.csv', MATCHES_CSV)
+        out, err = self.run_import('matches', path, '--rejects', rejects)
+
+        self.assertIn('3 created, 0 updated, 0 unchanged, 2 rejected of 5 rows', out)
+        self.assertIn('line 5: opponent: this field is required', err)
+        with open(rejects, encoding='utf-8') as stream:
+            rejected = [json.loads(line) for line in stream]
+        self.assertEqual([row['line'] for row in rejected], [5, 6])
+        self.assertEqual(rejected[1]['row']['opponent'], 'Girona')
+
+        clasico = Match.objects.get(opponent_key='realmadrid', date__year=2024, date__month=10)
+        self.assertEqual((clasico.goals_for, clasico.goals_against, clasico.status), (4, 0, 'COMPLETED'))
+        self.assertEqual(clasico.posted_by, self.admin)
+        self.assertEqual([hit.pk for hit in search.search_matches('lunin')], [clasico.pk])
+        record = HeadToHead.objects.get(opponent_key='realmadrid')
+        self.assertEqual((record.played, record.wins, record.losses), (2, 1, 1))
+
+        # Same file again: nothing is rewritten
+        out, _ = self.run_import('matches', path)
+        self.assertIn('0 created, 0 updated, 3 unchanged', out)
+
+        # A changed row updates the match, its index entry and the record
+        self.run_import('matches', self.write('fix.csv', MATCHES_CSV.replace(
+            '4-0,Four past Lunin.', '4-0,Four past Courtois.'
+        ).replace('2-3,', '3-2,')))
+        self.assertEqual(Match.objects.count(), 3)
+        self.assertEqual(search.search_matches('lunin'), [])
+        self.assertEqual([hit.pk for hit in search.search_matches('courtois')], [clasico.pk])
+        record = HeadToHead.objects.get(opponent_key='realmadrid')
+        self.assertEqual((record.played, record.wins, record.losses), (2, 2, 0))
+
+    def test_gzipped_jsonl_transfers(self):
+        rows = [
+            {'player_name': 'Dani Olmo', 'from_club': 'RB Leipzig', 'transfer_type': 'CONFIRMED',
+             'transfer_date': '2024-08-09', 'fee': '€55M'},
+            {'player_name': 'Nico Williams', 'from_club': 'Athletic Club', 'transfer_type': 'RUMOR',
+             'fee': '€58-62M'},
+            {'player_name': 'Nobody', 'from_club': 'Nowhere', 'transfer_type': 'MAYBE'},
+        ]
+        text = '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n[1, 2]\n'
+        timelines.club_summary('RB Leipzig')
+        self.assertTrue(cache.get(timelines._cache_key('club', 'RB Leipzig')))
+
+        out, err = self.run_import('transfers', self.write('transfers.jsonl.gz', text), '--user', 'admin')
+
+        self.assertIn('2 created, 0 updated, 0 unchanged, 3 rejected of 5 rows', out)
+        self.assertIn('line 4: invalid JSON', err)
+        self.assertIn('line 5: expected a JSON object', err)
+        olmo = Transfer.objects.get(player_key='daniolmo')
+        self.assertEqual((olmo.fee_eur, olmo.to_club), (Decimal('55000000'), 'FC Barcelona'))
+        self.assertEqual(Transfer.objects.get(player_key='nicowilliams').fee_eur, Decimal('60000000'))
+        # The batch dropped the cached summary of the club it touched
+        self.assertIsNone(cache.get(timelines._cache_key('club', 'RB Leipzig')))
+
+    def test_dry_run_rolls_back(self):
+        out, _ = self.run_import('matches', self.write('matches.csv', MATCHES_CSV), '--dry-run')
+        self.assertIn('Dry run: Imported matches', out)
+        self.assertFalse(Match.objects.exists())
+        self.assertFalse(HeadToHead.objects.filter(played__gt=0).exists())
+        self.assertEqual(search.search_matches('lunin'), [])
+
+    def test_unknown_user_and_missing_file(self):
+        path = self.write('matches.csv', MATCHES_CSV)
+        with self.assertRaisesMessage(CommandError, "No user named 'ghost'"):
+            self.run_import('matches', path, '--user', 'ghost')
+        with self.assertRaisesMessage(CommandError, 'Cannot read'):
+            self.run_import('matches', os.path.join(self.directory, 'missing.csv'))
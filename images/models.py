@@ -0,0 +1,17 @@
+# images/models.py
+from django.db import models
+
+
+class StoredFile(models.Model):
+    """A file in the content-addressed media storage and the number of rows using it"""
+    name = models.CharField(max_length=255, primary_key=True, help_text="Storage name (content hash)")
+    size = models.PositiveBigIntegerField(default=0, help_text="Bytes")
+    references = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Stored File"
+        verbose_name_plural = "Stored Files"
+    
+    def __str__(self):
+        return f"{self.name} ({self.references} references)"
@@ -0,0 +1,222 @@
+# images/proxy.py
+"""
+Local resized copies of external images.
+
+Match, Transfer, Article and Player rows point at full-size images on
+other sites. Pages link to them through proxy_url() instead, which signs
+(url, variant) into the proxy path so the endpoint only ever fetches
+URLs the site itself rendered. On the first request for a URL the source
+is downloaded once and every variant is written under IMAGE_PROXY_ROOT
+as WebP and JPEG; later requests are served from disk.
+
+The cache is bounded: serving a file refreshes its mtime (at most once
+per IMAGE_PROXY_TOUCH_INTERVAL), and each store evicts the least recently
+used files until the total is back under IMAGE_PROXY_MAX_BYTES.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.urls import reverse
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+SALT = 'images.proxy'
+
+# Name -> bounding box; images are scaled down to fit, never cropped or enlarged
+VARIANTS = {
+    'thumb': (160, 160),
+    'card': (640, 400),
+    'full': (1280, 960),
+}
+
+# Served format -> (file extension, content type, save options)
+FORMATS = {
+    'webp': ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Sources decoding to more pixels than this are refused (decompression bombs)
+MAX_SOURCE_PIXELS = 40_000_000
+
+# How long a URL that failed to fetch or decode is not retried
+FAILURE_TIMEOUT = 600  # seconds
+
+
+class ImageUnavailable(Exception):
+    """The source image could not be fetched or decoded"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def cache_root():
+    return Path(_setting('IMAGE_PROXY_ROOT', Path(settings.MEDIA_ROOT) / 'image-cache'))
+
+
+def proxy_url(url, variant='card'):
+    """Signed proxy path for an external image URL ('' for no URL)"""
+    if not url:
+        return ''
+    if variant not in VARIANTS:
+        raise ValueError(f'Unknown image variant {variant!r}')
+    token = signing.dumps([url, variant], salt=SALT, compress=True)
+    return reverse('images:image_proxy', kwargs={'token': token})
+
+
+def read_token(token):
+    """(url, variant) from a proxy token; raises signing.BadSignature if tampered with"""
+    url, variant = signing.loads(token, salt=SALT)
+    if variant not in VARIANTS or not isinstance(url, str):
+        raise signing.BadSignature(token)
+    return url, variant
+
+
+def _digest(url):
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def variant_path(url, variant, fmt):
+    digest = _digest(url)
+    extension = FORMATS[fmt][0]
+    return cache_root() / digest[:2] / f'{digest}-{variant}.{extension}'
+
+
+def fetch(url):
+    """Download a source image, refusing non-HTTP URLs and oversized bodies"""
+    if not url.lower().startswith(('http://', 'https://')):
+        raise ImageUnavailable(f'Unsupported URL: {url}')
+    limit = _setting('IMAGE_PROXY_MAX_SOURCE_BYTES', 10 * 1024 * 1024)
+    request = urllib.request.Request(url, headers={'User-Agent': 'culer-image-proxy/1.0'})
+    try:
+        with urllib.request.urlopen(request, timeout=_setting('IMAGE_PROXY_TIMEOUT', 5)) as response:
+            body = response.read(limit + 1)
+    except (urllib.error.URLError, OSError, ValueError) as exc:
+        raise ImageUnavailable(f'{url}: {exc}')
+    if len(body) > limit:
+        raise ImageUnavailable(f'{url}: larger than {limit} bytes')
+    return body
+
+
+def render_variants(body):
+    """{(variant, format): encoded bytes} for every variant and format"""
+    try:
+        source = Image.open(io.BytesIO(body))
+        width, height = source.size
+        if width * height > MAX_SOURCE_PIXELS:
+            raise ImageUnavailable(f'{width}x{height} source is too large')
+        source = ImageOps.exif_transpose(source)
+        source.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise ImageUnavailable(str(exc))
+
+    has_alpha = source.mode in ('RGBA', 'LA') or 'transparency' in source.info
+    source = source.convert('RGBA' if has_alpha else 'RGB')
+
+    rendered = {}
+    # Largest first, so each smaller variant resamples an already reduced copy
+    for variant, box in sorted(VARIANTS.items(), key=lambda item: -item[1][0] * item[1][1]):
+        source = source.copy()
+        source.thumbnail(box, Image.LANCZOS)
+        for fmt, (_, _, options) in FORMATS.items():
+            image = source
+            if fmt == 'jpeg' and has_alpha:
+                # No alpha in JPEG: flatten onto white
+                image = Image.new('RGB', source.size, (255, 255, 255))
+                image.paste(source, mask=source.getchannel('A'))
+            buffer = io.BytesIO()
+            image.save(buffer, format=fmt.upper(), **options)
+            rendered[variant, fmt] = buffer.getvalue()
+    return rendered
+
+
+def _write(path, data):
+    """Atomic write, so a concurrent reader never sees half a file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as stream:
+            stream.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+
+
+def evict(max_bytes=None):
+    """
+    Delete least recently used files until the cache is under its cap.
+    Returns the number of bytes freed.
+    """
+    if max_bytes is None:
+        max_bytes = _setting('IMAGE_PROXY_MAX_BYTES', 256 * 1024 * 1024)
+    entries = []
+    total = 0
+    for path in cache_root().glob('*/*'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    freed = 0
+    entries.sort()
+    for _, size, path in entries:
+        if total - freed <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        freed += size
+    return freed
+
+
+def _failure_key(url):
+    return f'image-proxy:failed:{_digest(url)}'
+
+
+def cached_variant(url, variant, fmt):
+    """
+    Path of a stored variant, fetching and rendering the source on first
+    use. Raises ImageUnavailable when the source can't be used.
+    """
+    path = variant_path(url, variant, fmt)
+    if path.exists():
+        touch(path)
+        return path
+
+    if cache.get(_failure_key(url)):
+        raise ImageUnavailable(f'{url}: failed recently')
+    try:
+        rendered = render_variants(fetch(url))
+    except ImageUnavailable:
+        cache.set(_failure_key(url), True, FAILURE_TIMEOUT)
+        raise
+    for (name, encoding), data in rendered.items():
+        _write(variant_path(url, name, encoding), data)
+    evict()
+    if not path.exists():
+        # Evicted straight away: the cap is smaller than one image set
+        raise ImageUnavailable(f'{url}: cache too small')
+    return path
+
+
+def touch(path):
+    """Mark a file as recently used, without a write on every request"""
+    interval = _setting('IMAGE_PROXY_TOUCH_INTERVAL', 3600)
+    try:
+        if time.time() - path.stat().st_mtime > interval:
+            os.utime(path)
+    except FileNotFoundError:
+        pass
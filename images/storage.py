@@ -0,0 +1,151 @@
+# images/storage.py
+"""
+Content-addressed, reference-counted media storage.
+
+ContentAddressedStorage names every saved file after the SHA-256 of its
+bytes, sharded two levels deep under the directory it was saved to:
+
+    community_posts/3f/a2/3fa2...c9.jpg
+
+Saving bytes that are already stored returns the existing name, so the
+media directory (and its backups) grows with unique content only.
+
+Since one file can back several rows, nothing deletes files directly.
+StoredFile counts the references to each file: save() takes one for its
+caller, models retain() names they start using without saving them and
+release() the ones they stop using, and a file is deleted once the
+transaction that dropped its count to zero commits. Files without a
+StoredFile row (written before this storage existed) are never deleted.
+
+The counting only works for file fields whose model keeps it up to date,
+so this is not the default storage: fields opt in with
+storage=content_addressed_storage (CommunityPost.image does, see
+community/signals.py).
+"""
+import hashlib
+import logging
+import os
+import posixpath
+import tempfile
+from collections import Counter
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import StoredFile
+
+
+logger = logging.getLogger(__name__)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that stores each distinct content once, named by its hash"""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save(), and identical
+        # content may (and should) reuse an existing file
+        return str(name).replace('\\', '/')
+
+    def _save(self, name, content):
+        directory, basename = posixpath.split(name)
+        extension = os.path.splitext(basename)[1].lower()
+        staging = self.path(directory)
+        os.makedirs(staging, exist_ok=True)
+
+        # Hash while copying to a temporary file, so the upload is read once
+        digest = hashlib.sha256()
+        handle, temporary = tempfile.mkstemp(dir=staging, suffix='.upload')
+        try:
+            with os.fdopen(handle, 'wb') as stream:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    stream.write(chunk)
+            hexdigest = digest.hexdigest()
+            name = posixpath.join(directory, hexdigest[:2], hexdigest[2:4], hexdigest + extension)
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.chmod(temporary, self.file_permissions_mode or 0o644)
+            # Count the caller's reference before the file is put in place.
+            # collect() deletes a file in the transaction that deletes its
+            # unreferenced row, which this waits for: either collect() sees
+            # the reference and keeps the file, or it has already deleted
+            # it and the replace below puts it back.
+            _add_references(Counter([name]), {name: os.path.getsize(temporary)})
+            # Atomic, so a concurrent reader never sees half a file
+            os.replace(temporary, full_path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        return name
+
+
+_storage = ContentAddressedStorage()
+
+
+def content_addressed_storage():
+    """The storage for file fields whose model retains and releases its files"""
+    return _storage
+
+
+def _counts(names):
+    return Counter(str(name) for name in names if name)
+
+
+def _add_references(counts, sizes):
+    """Add {name: count} references; rows are created for the names in `sizes`"""
+    with transaction.atomic():
+        StoredFile.objects.bulk_create(
+            [StoredFile(name=name, size=sizes[name]) for name in counts if name in sizes],
+            ignore_conflicts=True,
+        )
+        for name, count in counts.items():
+            StoredFile.objects.filter(name=name).update(references=F('references') + count)
+
+
+def retain(names, storage=None):
+    """
+    Count one more reference to each name (repeat a name to count it
+    twice), for names a model starts using without having saved them.
+    """
+    storage = storage or _storage
+    counts = _counts(names)
+    if not counts:
+        return
+    _add_references(counts, {name: storage.size(name) for name in counts if storage.exists(name)})
+
+
+def release(names, storage=None):
+    """Drop references; files left unreferenced are deleted once the transaction commits"""
+    storage = storage or _storage
+    counts = _counts(names)
+    if not counts:
+        return
+    with transaction.atomic():
+        for name, count in counts.items():
+            StoredFile.objects.filter(name=name).update(
+                references=Greatest(F('references') - count, Value(0))
+            )
+        transaction.on_commit(lambda: collect(list(counts), storage))
+
+
+def collect(names, storage=None):
+    """Delete the given files if nothing references them any more; returns the names deleted"""
+    storage = storage or _storage
+    deleted = []
+    for name in names:
+        with transaction.atomic():
+            removed, _ = StoredFile.objects.filter(name=name, references=0).delete()
+            if not removed:
+                continue
+            try:
+                storage.delete(name)
+            except OSError:
+                logger.warning('Could not delete unreferenced file %s', name)
+                continue
+        deleted.append(name)
+    return deleted
@@ -0,0 +1,15 @@
+# images/templatetags/image_proxy.py
+from django import template
+
+from images.proxy import proxy_url
+
+register = template.Library()
+
+
+@register.filter
+def proxied(url, variant='card'):
+    """
+    Local resized copy of an external image URL:
+    {{ match.image_url|proxied }} or {{ player.profile_image|proxied:"thumb" }}
+    """
+    return proxy_url(url, variant)
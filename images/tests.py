@@ -0,0 +1,241 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from community.models import CommunityPost
+from . import proxy, storage
+from .models import StoredFile
+from .storage import ContentAddressedStorage
+
+
+def _image_bytes(size, fmt='PNG', mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 30, 60, 128)[:len(mode)]).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class StandInImageServer:
+    """A local HTTP server standing in for the external image hosts"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.hits = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits.append(self.path)
+                route = server.routes.get(self.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                content_type, body = route
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.httpd.server_port}{path}'
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ImageProxyTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StandInImageServer({
+            '/wide.jpg': ('image/jpeg', _image_bytes((2000, 1000), 'JPEG')),
+            '/badge.png': ('image/png', _image_bytes((300, 300), 'PNG', 'RGBA')),
+            '/not-an-image': ('text/html', b'<html></html>'),
+        })
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_override = override_settings(IMAGE_PROXY_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        self.server.hits.clear()
+
+    def get(self, url, variant='card', accept='image/webp,image/*'):
+        return self.client.get(proxy.proxy_url(url, variant), HTTP_ACCEPT=accept)
+
+    def test_serves_resized_webp_with_long_cache_headers(self):
+        response = self.get(self.server.url('/wide.jpg'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept', response['Vary'])
+        image = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(image.format, 'WEBP')
+        self.assertEqual(image.size, (640, 320))
+
+    def test_jpeg_for_browsers_without_webp(self):
+        response = self.get(self.server.url('/badge.png'), 'thumb', accept='image/png,image/*')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        image = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual((image.format, image.mode, image.size), ('JPEG', 'RGB', (160, 160)))
+
+    def test_source_fetched_once_for_every_variant_and_format(self):
+        url = self.server.url('/wide.jpg')
+        for variant in proxy.VARIANTS:
+            for accept in ('image/webp', 'image/jpeg'):
+                self.assertEqual(self.get(url, variant, accept).status_code, 200)
+        self.assertEqual(self.server.hits, ['/wide.jpg'])
+
+    def test_tampered_token_is_rejected(self):
+        path = proxy.proxy_url(self.server.url('/wide.jpg'))
+        response = self.client.get(path.replace('/images/', '/images/x'))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.server.hits, [])
+
+    def test_failed_source_is_not_refetched_immediately(self):
+        url = self.server.url('/missing.jpg')
+        self.assertEqual(self.get(url).status_code, 404)
+        self.assertEqual(self.get(url).status_code, 404)
+        self.assertEqual(self.server.hits, ['/missing.jpg'])
+
+    def test_undecodable_source(self):
+        self.assertEqual(self.get(self.server.url('/not-an-image')).status_code, 404)
+
+    @override_settings(IMAGE_PROXY_MAX_SOURCE_BYTES=1000)
+    def test_oversized_source_is_refused(self):
+        self.assertEqual(self.get(self.server.url('/wide.jpg')).status_code, 404)
+
+    def test_only_http_sources(self):
+        with self.assertRaises(proxy.ImageUnavailable):
+            proxy.fetch('file:///etc/passwd')
+
+    def test_least_recently_used_files_are_evicted(self):
+        wide, badge = self.server.url('/wide.jpg'), self.server.url('/badge.png')
+        self.get(wide)
+        self.get(badge)
+        # Age everything, then use the wide image again
+        past = time.time() - 7200
+        for path in proxy.cache_root().glob('*/*'):
+            os.utime(path, (past, past))
+        self.get(wide)
+
+        served = proxy.variant_path(wide, 'card', 'webp')
+        proxy.evict(max_bytes=served.stat().st_size)
+        self.assertTrue(served.exists())
+        self.assertFalse(proxy.variant_path(badge, 'card', 'webp').exists())
+        self.assertEqual(len(list(proxy.cache_root().glob('*/*'))), 1)
+
+    def test_template_filter(self):
+        template = Template('{% load image_proxy %}[{{ url|proxied:"thumb" }}][{{ missing|proxied }}]')
+        rendered = template.render(Context({'url': 'https://example.com/a.jpg', 'missing': None}))
+        self.assertTrue(rendered.startswith('[/images/'))
+        self.assertTrue(rendered.endswith('[]'))
+        token = rendered[len('[/images/'):rendered.index('/]')]
+        self.assertEqual(proxy.read_token(token), ('https://example.com/a.jpg', 'thumb'))
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def test_identical_content_is_stored_once(self):
+        data = b'same bytes'
+        first = self.storage.save('uploads/photo.JPG', ContentFile(data))
+        second = self.storage.save('uploads/photo_copy.jpg', ContentFile(data))
+        digest = hashlib.sha256(data).hexdigest()
+        self.assertEqual(first, f'uploads/{digest[:2]}/{digest[2:4]}/{digest}.jpg')
+        self.assertEqual(second, first)
+        self.assertEqual(
+            [path.name for path in Path(self.root).rglob('*') if path.is_file()], [f'{digest}.jpg']
+        )
+        # Each save counts a reference for its caller
+        self.assertEqual(StoredFile.objects.get(name=first).references, 2)
+        self.assertNotEqual(self.storage.save('uploads/other.jpg', ContentFile(b'other')), first)
+
+    def test_files_are_deleted_with_their_last_reference(self):
+        name = self.storage.save('uploads/a.png', ContentFile(b'png'))
+        storage.retain([name], self.storage)
+        self.assertEqual(StoredFile.objects.values_list('size', 'references').get(name=name), (3, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            storage.release([name], self.storage)
+        self.assertTrue(self.storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            storage.release([name], self.storage)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_release_waits_for_commit(self):
+        name = self.storage.save('uploads/a.png', ContentFile(b'png'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            storage.release([name], self.storage)
+            self.assertTrue(self.storage.exists(name))
+        self.assertEqual(len(callbacks), 1)
+
+    def test_untracked_files_are_never_deleted(self):
+        legacy = Path(self.root, 'uploads', 'legacy.jpg')
+        legacy.parent.mkdir(parents=True)
+        legacy.write_bytes(b'old')
+        with self.captureOnCommitCallbacks(execute=True):
+            storage.release(['uploads/legacy.jpg'], self.storage)
+        self.assertTrue(legacy.exists())
+
+    def test_save_while_the_last_reference_is_collected(self):
+        name = self.storage.save('uploads/a.png', ContentFile(b'png'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            storage.release([name], self.storage)
+        # Saved again before the collection runs: the new reference keeps the file
+        self.assertEqual(self.storage.save('uploads/b.png', ContentFile(b'png')), name)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            storage.release([name], self.storage)
+        self.assertFalse(self.storage.exists(name))
+        # Saved again after it: the file is written back and counted afresh
+        self.assertEqual(self.storage.save('uploads/c.png', ContentFile(b'png')), name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+
+    def test_only_opted_in_fields_use_it(self):
+        self.assertNotIsInstance(default_storage, ContentAddressedStorage)
+        self.assertIs(CommunityPost._meta.get_field('image').storage, storage.content_addressed_storage())
@@ -0,0 +1,11 @@
+# images/urls.py
+from django.urls import path
+from . import views
+
+# URL namespace for the images app
+app_name = 'images'
+
+urlpatterns = [
+    # Resized local copy of an external image (see images/proxy.py)
+    path('<str:token>/', views.image_proxy, name='image_proxy'),
+]
@@ -0,0 +1,42 @@
+# images/views.py
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from .proxy import FORMATS, ImageUnavailable, cached_variant, read_token
+
+
+@require_safe
+def image_proxy(request, token):
+    """
+    Serve a resized local copy of an external image. `token` is a signed
+    (url, variant) pair from proxy_url(); WebP is sent to browsers that
+    accept it, JPEG to the rest. Copies never change for a given token,
+    so they are cacheable for a year.
+    """
+    try:
+        url, variant = read_token(token)
+    except signing.BadSignature:
+        raise Http404('Invalid image token')
+
+    fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+    # Retry once: the file can be evicted between lookup and open
+    for attempt in range(2):
+        try:
+            stream = open(cached_variant(url, variant, fmt), 'rb')
+            break
+        except ImageUnavailable:
+            raise Http404('Image unavailable')
+        except FileNotFoundError:
+            if attempt:
+                raise Http404('Image unavailable')
+
+    response = FileResponse(stream, content_type=FORMATS[fmt][1])
+    patch_cache_control(
+        response, public=True, immutable=True,
+        max_age=getattr(settings, 'IMAGE_PROXY_MAX_AGE', 365 * 24 * 3600),
+    )
+    patch_vary_headers(response, ['Accept'])
+    return response
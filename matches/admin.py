@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.utils import timezone
-from .models import Match, Comment
+
+from culer.bulk import bulk_save
+from images.proxy import proxy_url
+from .models import Match, Comment, HeadToHead
 
 
 @admin.register(Match)
@@ -13,10 +15,13 @@ class MatchAdmin(admin.ModelAdmin):
         'venue_display', 
         'result', 
         'match_status_display',
+        'approved_comment_count',
+        'view_count',
         'posted_by',
         'created_at'
     ]
     list_filter = [
+        'status',
         'competition', 
         'venue', 
         'date',
@@ -71,11 +76,11 @@ class MatchAdmin(admin.ModelAdmin):
     ordering = ['-date']
     
     def match_status_display(self, obj):
-        if obj.is_upcoming:
+        if obj.status == 'UPCOMING':
             return format_html(
                 '<span style="color: #2196F3; font-weight: bold;">📅 Upcoming</span>'
             )
-        elif obj.is_completed:
+        elif obj.status == 'COMPLETED':
             return format_html(
                 '<span style="color: #4CAF50; font-weight: bold;">✅ Completed</span>'
             )
@@ -89,7 +94,7 @@ class MatchAdmin(admin.ModelAdmin):
         if obj.image_url:
             return format_html(
                 '<img src="{}" style="max-width: 200px; max-height: 150px; border-radius: 8px;" />',
-                obj.image_url
+                proxy_url(obj.image_url, 'thumb')
             )
         return "No image"
     image_preview.short_description = 'Image Preview'
@@ -105,16 +110,34 @@ class MatchAdmin(admin.ModelAdmin):
     actions = ['mark_as_completed', 'mark_as_upcoming']
 
     def mark_as_completed(self, request, queryset):
-        updated = queryset.filter(result__isnull=True).update(result='0-0')
+        # bulk_save() derives status/goals and refreshes search and head-to-head
+        matches = list(queryset.filter(result__isnull=True))
+        for match in matches:
+            match.result = '0-0'
+        updated = bulk_save(matches, ['result'])
         self.message_user(request, f'{updated} matches marked as completed. Update results manually.')
     mark_as_completed.short_description = "Mark selected matches as completed"
 
     def mark_as_upcoming(self, request, queryset):
-        updated = queryset.update(result=None)
+        matches = list(queryset.filter(result__isnull=False))
+        for match in matches:
+            match.result = None
+        updated = bulk_save(matches, ['result'])
         self.message_user(request, f'{updated} matches marked as upcoming.')
     mark_as_upcoming.short_description = "Mark selected matches as upcoming"
 
 
+@admin.register(HeadToHead)
+class HeadToHeadAdmin(admin.ModelAdmin):
+    list_display = ('opponent', 'played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'last_results')
+    search_fields = ('opponent',)
+    readonly_fields = [field.name for field in HeadToHead._meta.fields]
+
+    def has_add_permission(self, request):
+        # Records are derived from match results; rebuild with `manage.py rebuild_head_to_head`
+        return False
+
+
 # ✅ Register Comment model with custom admin
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
@@ -125,22 +148,30 @@ class CommentAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     actions = ['approve_comments', 'unapprove_comments', 'feature_comments', 'unfeature_comments']
 
+    def _set_flag(self, queryset, field, value):
+        """Change one flag on the selected comments that don't have it yet, in one batch"""
+        # Match counters follow through the bulk_saved signal
+        comments = list(queryset.exclude(**{field: value}))
+        for comment in comments:
+            setattr(comment, field, value)
+        return bulk_save(comments, [field])
+
     def approve_comments(self, request, queryset):
-        updated = queryset.update(is_approved=True)
+        updated = self._set_flag(queryset, 'is_approved', True)
         self.message_user(request, f'{updated} comment(s) approved.')
     approve_comments.short_description = 'Approve selected comments'
 
     def unapprove_comments(self, request, queryset):
-        updated = queryset.update(is_approved=False)
+        updated = self._set_flag(queryset, 'is_approved', False)
         self.message_user(request, f'{updated} comment(s) unapproved.')
     unapprove_comments.short_description = 'Unapprove selected comments'
 
     def feature_comments(self, request, queryset):
-        updated = queryset.update(is_featured=True)
+        updated = self._set_flag(queryset, 'is_featured', True)
         self.message_user(request, f'{updated} comment(s) marked as featured.')
     feature_comments.short_description = 'Feature selected comments'
 
     def unfeature_comments(self, request, queryset):
-        updated = queryset.update(is_featured=False)
+        updated = self._set_flag(queryset, 'is_featured', False)
         self.message_user(request, f'{updated} comment(s) unmarked as featured.')
     unfeature_comments.short_description = 'Unfeature selected comments'
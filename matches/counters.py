@@ -0,0 +1,120 @@
+# matches/counters.py
+"""
+Maintenance of the denormalized comment counters on Match.
+
+Counters are always adjusted with F() expressions so concurrent writers
+never overwrite each other's increments.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Match, Comment
+
+
+def adjust(match_id, total=0, approved=0):
+    """Atomically add to (or subtract from) one match's counters"""
+    changes = {}
+    if total:
+        changes['comment_count'] = F('comment_count') + total
+    if approved:
+        changes['approved_comment_count'] = F('approved_comment_count') + approved
+    if changes:
+        Match.objects.filter(pk=match_id).update(**changes)
+
+
+def comment_saved(comment, created):
+    """Apply the counter changes caused by creating or editing a comment"""
+    previous = getattr(comment, '_loaded_state', None) or {}
+    if created:
+        adjust(comment.match_id, total=1, approved=1 if comment.is_approved else 0)
+    elif 'match_id' not in previous or 'is_approved' not in previous:
+        # Saved without a loaded copy of the row, so the old state is unknown
+        recount({previous.get('match_id'), comment.match_id})
+    elif previous['match_id'] != comment.match_id:
+        adjust(previous['match_id'], total=-1, approved=-1 if previous['is_approved'] else 0)
+        adjust(comment.match_id, total=1, approved=1 if comment.is_approved else 0)
+    elif previous['is_approved'] != comment.is_approved:
+        adjust(comment.match_id, approved=1 if comment.is_approved else -1)
+    # The row now holds this state, so a further save is counted against it
+    comment._loaded_state = {'match_id': comment.match_id, 'is_approved': comment.is_approved}
+
+
+def comment_deleted(comment):
+    """Apply the counter changes caused by deleting a comment"""
+    adjust(comment.match_id, total=-1, approved=-1 if comment.is_approved else 0)
+
+
+def comments_created(comments):
+    """Apply counters for comments inserted in bulk (bulk_create skips signals)"""
+    totals = {}
+    for comment in comments:
+        total, approved = totals.get(comment.match_id, (0, 0))
+        totals[comment.match_id] = (total + 1, approved + (1 if comment.is_approved else 0))
+    for match_id, (total, approved) in totals.items():
+        adjust(match_id, total=total, approved=approved)
+
+
+def comments_updated(comments):
+    """
+    Apply counters for comments written in bulk (bulk_save), one UPDATE per
+    affected match rather than per comment.
+    """
+    totals = {}
+    unknown = set()
+
+    def add(match_id, total, approved):
+        old_total, old_approved = totals.get(match_id, (0, 0))
+        totals[match_id] = (old_total + total, old_approved + approved)
+
+    for comment in comments:
+        previous = getattr(comment, '_loaded_state', None) or {}
+        if 'match_id' not in previous or 'is_approved' not in previous:
+            unknown.update({previous.get('match_id'), comment.match_id})
+        elif previous['match_id'] != comment.match_id:
+            add(previous['match_id'], -1, -1 if previous['is_approved'] else 0)
+            add(comment.match_id, 1, 1 if comment.is_approved else 0)
+        elif previous['is_approved'] != comment.is_approved:
+            add(comment.match_id, 0, 1 if comment.is_approved else -1)
+        comment._loaded_state = {'match_id': comment.match_id, 'is_approved': comment.is_approved}
+    for match_id, (total, approved) in totals.items():
+        if match_id not in unknown:
+            adjust(match_id, total=total, approved=approved)
+    recount(unknown)
+
+
+def _count_subquery(**filters):
+    counts = Comment.objects.filter(match=OuterRef('pk'), **filters).order_by().values(
+        'match'
+    ).annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def recount(match_ids):
+    """Recompute the counters of the given matches from the Comment table"""
+    match_ids = {match_id for match_id in match_ids if match_id is not None}
+    if match_ids:
+        Match.objects.filter(pk__in=match_ids).update(
+            comment_count=_count_subquery(),
+            approved_comment_count=_count_subquery(is_approved=True),
+        )
+
+
+def rebuild(batch_size=1000):
+    """Recompute every match's counters from the Comment table, in pk batches"""
+    last_pk = 0
+    rebuilt = 0
+    while True:
+        pks = list(
+            Match.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            break
+        with transaction.atomic():
+            Match.objects.filter(pk__gte=pks[0], pk__lte=pks[-1]).update(
+                comment_count=_count_subquery(),
+                approved_comment_count=_count_subquery(is_approved=True),
+            )
+        rebuilt += len(pks)
+        last_pk = pks[-1]
+    return rebuilt
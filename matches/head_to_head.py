@@ -0,0 +1,162 @@
+# matches/head_to_head.py
+"""
+Incremental maintenance of the HeadToHead table.
+
+Every match with a parseable result contributes one game to the record
+against its opponent. When a match is saved we subtract what it counted
+before (remembered from when it was loaded) and add what it counts now,
+using F() expressions, then refresh the last-five string with a top-5
+query on the (opponent_key, -date) index; moving a scored match to
+another date refreshes that string too.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+
+from .models import Match, HeadToHead
+from .scores import parse_score, outcome
+
+
+def contribution(result):
+    """What a single result adds to a head-to-head record (None if unscored)"""
+    score = parse_score(result)
+    if score is None:
+        return None
+    goals_for, goals_against = score
+    letter = outcome(goals_for, goals_against)
+    return {
+        'played': 1,
+        'wins': int(letter == 'W'),
+        'draws': int(letter == 'D'),
+        'losses': int(letter == 'L'),
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+    }
+
+
+def _apply(opponent_key, delta, sign, opponent=None):
+    if not opponent_key or delta is None:
+        return
+    record, _ = HeadToHead.objects.get_or_create(
+        opponent_key=opponent_key,
+        defaults={'opponent': opponent or opponent_key},
+    )
+    changes = {name: F(name) + sign * value for name, value in delta.items() if value}
+    if opponent:
+        changes['opponent'] = opponent
+    HeadToHead.objects.filter(pk=record.pk).update(**changes)
+
+
+def refresh_last_results(opponent_key):
+    """Recompute the last-five outcome string for one opponent"""
+    if not opponent_key:
+        return
+    recent = Match.objects.filter(
+        opponent_key=opponent_key, goals_for__isnull=False, goals_against__isnull=False
+    ).order_by('-date').values_list('goals_for', 'goals_against')[:5]
+    letters = [outcome(goals_for, goals_against) for goals_for, goals_against in recent]
+    HeadToHead.objects.filter(opponent_key=opponent_key).update(last_results=''.join(letters))
+
+
+def match_saved(match, created=False):
+    """Move this match's contribution from its previous state to its current one"""
+    previous = getattr(match, '_loaded_state', None) or {}
+    if not created and ('opponent_key' not in previous or 'result' not in previous):
+        # Saved without a loaded copy of these columns (e.g. deferred), so
+        # what the record counted for it is unknown: recount from the table
+        rebuild({previous.get('opponent_key'), match.opponent_key} - {None})
+        _remember(match)
+        return
+
+    old_key = previous.get('opponent_key')
+    old_delta = contribution(previous.get('result'))
+    new_delta = contribution(match.result)
+    if old_key == match.opponent_key and old_delta == new_delta:
+        if new_delta is not None:
+            # Opponent display name may have been edited
+            HeadToHead.objects.filter(opponent_key=match.opponent_key).update(opponent=match.opponent)
+            if previous.get('date') != match.date:
+                # Moved (or loaded without its date): the last five may reorder
+                refresh_last_results(match.opponent_key)
+        _remember(match)
+        return
+
+    with transaction.atomic():
+        _apply(old_key, old_delta, -1)
+        _apply(match.opponent_key, new_delta, 1, opponent=match.opponent)
+        for key in {old_key, match.opponent_key}:
+            refresh_last_results(key)
+    _remember(match)
+
+
+def _remember(match):
+    # The row now holds this state, so a further save is counted against it
+    match._loaded_state = {'opponent_key': match.opponent_key, 'result': match.result, 'date': match.date}
+
+
+def match_deleted(match):
+    """Remove a deleted match's contribution"""
+    previous = getattr(match, '_loaded_state', None) or {}
+    key = previous.get('opponent_key', match.opponent_key)
+    delta = contribution(previous.get('result', match.result))
+    if delta is None:
+        return
+    with transaction.atomic():
+        _apply(key, delta, -1)
+        refresh_last_results(key)
+
+
+def matches_updated(matches):
+    """Rebuild the records touched by matches written in bulk (bulk_save)"""
+    keys = set()
+    for match in matches:
+        keys.add(match.opponent_key)
+        previous = getattr(match, '_loaded_state', {})
+        if 'opponent_key' in previous:
+            keys.add(previous['opponent_key'])
+        _remember(match)
+    rebuild(keys)
+
+
+def rebuild(opponent_keys=None):
+    """
+    Recompute records from scratch, for the given opponents or for everyone,
+    with one grouped query over the parsed score columns. Used by the
+    rebuild_head_to_head command and after bulk updates that bypass
+    Match.save().
+    """
+    matches = Match.objects.filter(goals_for__isnull=False, goals_against__isnull=False)
+    if opponent_keys is not None:
+        opponent_keys = set(opponent_keys)
+        matches = matches.filter(opponent_key__in=opponent_keys)
+
+    rows = matches.order_by().values('opponent_key').annotate(
+        opponent_name=Max('opponent'),
+        played=Count('id'),
+        wins=Count('id', filter=Q(goals_for__gt=F('goals_against'))),
+        draws=Count('id', filter=Q(goals_for=F('goals_against'))),
+        losses=Count('id', filter=Q(goals_for__lt=F('goals_against'))),
+        total_for=Sum('goals_for'),
+        total_against=Sum('goals_against'),
+    )
+    records = {
+        row['opponent_key']: {
+            'opponent': row['opponent_name'],
+            'played': row['played'],
+            'wins': row['wins'],
+            'draws': row['draws'],
+            'losses': row['losses'],
+            'goals_for': row['total_for'],
+            'goals_against': row['total_against'],
+        }
+        for row in rows
+    }
+
+    with transaction.atomic():
+        stale = HeadToHead.objects.all()
+        if opponent_keys is not None:
+            stale = stale.filter(opponent_key__in=opponent_keys)
+        stale.exclude(opponent_key__in=records.keys()).delete()
+        for opponent_key, values in records.items():
+            HeadToHead.objects.update_or_create(opponent_key=opponent_key, defaults=values)
+            refresh_last_results(opponent_key)
+    return len(records)
@@ -0,0 +1,34 @@
+# matches/importers.py
+from culer.importing import Importer
+
+from . import head_to_head, search
+from .models import Match
+from .scores import normalize_opponent
+
+
+class MatchImporter(Importer):
+    """
+    Upsert matches keyed by (opponent, kickoff). Derived columns are filled
+    the way Match.save() fills them, and the full-text index and
+    head-to-head records are refreshed once per batch.
+    """
+
+    model = Match
+    fields = ('opponent', 'date', 'venue', 'competition', 'result', 'summary', 'image_url')
+    required = ('opponent', 'date', 'summary')
+    natural_key = ('opponent_key', 'date')
+
+    def normalize(self, instance):
+        super().normalize(instance)
+        instance.opponent_key = normalize_opponent(instance.opponent)
+
+    def prepare(self, instance):
+        instance.derive_fields()
+
+    def derived_fields(self):
+        return Match.DERIVED_FIELDS
+
+    def after_batch(self, created, updated):
+        written = created + updated
+        search.index_matches(written)
+        head_to_head.rebuild({match.opponent_key for match in written})
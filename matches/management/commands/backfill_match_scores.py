@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from matches.models import Match
+
+
+class Command(BaseCommand):
+    help = 'Re-parse Match.result into goals_for/goals_against for the whole history, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = parsed = 0
+        while True:
+            batch = list(
+                Match.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                    'id', 'result', 'goals_for', 'goals_against'
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            for match in batch:
+                match.parse_result()
+                parsed += match.goals_for is not None
+            with transaction.atomic():
+                Match.objects.bulk_update(batch, ['goals_for', 'goals_against'])
+            total += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {total} matches processed...')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {total} matches ({parsed} with a parseable score).'
+        ))
@@ -0,0 +1,75 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from matches.models import Match, Comment
+
+
+SENTENCES = [
+    'What a performance from the midfield tonight.',
+    'The pressing in the first half was relentless & the fullbacks pushed high.',
+    'I still think the <b>substitutions</b> came too late.',
+    'Best atmosphere at the stadium in years!',
+    'Visca el Barça!',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark match_detail rendering with pre-rendered HTML versus per-request linebreaks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        match = Match(
+            id=1,
+            opponent='Real Madrid',
+            date=timezone.now(),
+            result='4-0',
+            summary='\n\n'.join(' '.join(rng.choices(SENTENCES, k=6)) for _ in range(12)),
+            posted_by=User(username='benchmark'),
+        )
+        comments = [
+            Comment(
+                id=i,
+                match=match,
+                name=f'Fan {i}',
+                comment='\n'.join(rng.choices(SENTENCES, k=rng.randint(1, 5))),
+                created_at=timezone.now(),
+            )
+            for i in range(1, options['comments'] + 1)
+        ]
+
+        # Baseline: HTML columns empty, so the template falls back to |linebreaks
+        legacy = self._time(options['repeat'], match, comments)
+
+        match.render_html()
+        for comment in comments:
+            comment.render_html()
+        stored = self._time(options['repeat'], match, comments)
+
+        self.stdout.write(f'{len(comments)} comments, best of {options["repeat"]} renders')
+        self.stdout.write(f'  linebreaks per request: {legacy * 1000:8.2f} ms')
+        self.stdout.write(f'  pre-rendered HTML:      {stored * 1000:8.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'  speedup: {legacy / stored:.2f}x'))
+
+    def _time(self, repeat, match, comments):
+        context = {
+            'match': match,
+            'comments_page': comments,
+            'comment_count': len(comments),
+            'related_matches': [],
+        }
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render_to_string('matches/match_detail.html', context)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,99 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from matches import search
+from matches.models import Match
+
+
+OPPONENTS = [
+    'Real Madrid', 'Atlético Madrid', 'Sevilla', 'Valencia', 'Villarreal',
+    'Real Sociedad', 'Athletic Club', 'Real Betis', 'Girona', 'Osasuna',
+    'Bayern Munich', 'Paris Saint-Germain', 'Inter Milan', 'Manchester City',
+    'Liverpool', 'Juventus', 'Borussia Dortmund', 'Benfica', 'Napoli', 'Porto',
+]
+
+WORDS = (
+    'pressing possession counter attack midfield striker winger fullback keeper '
+    'header volley penalty corner freekick offside tactical brilliant dominant '
+    'second half first half substitution injury comeback clean sheet assist '
+    'through ball overlap transition pivot false nine high line rondo'
+).split()
+
+QUERIES = ['madrid', 'penalty', 'clean sheet', 'bayern comeback', 'rondo pivot', 'champions']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-text match search against the legacy icontains query (uses a throwaway test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self._run(options['matches'], options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _run(self, total, repeat):
+        rng = random.Random(42)
+        user = User.objects.create(username='benchmark')
+        competitions = [code for code, _ in Match.COMPETITION_CHOICES]
+        start = timezone.now() - timedelta(days=total)
+
+        self.stdout.write(f'Creating {total} matches...')
+        batch = []
+        with transaction.atomic():
+            for i in range(total):
+                batch.append(Match(
+                    opponent=rng.choice(OPPONENTS),
+                    date=start + timedelta(days=i),
+                    competition=rng.choice(competitions),
+                    result=f'{rng.randint(0, 5)}-{rng.randint(0, 5)}',
+                    summary=' '.join(rng.choice(WORDS) for _ in range(rng.randint(150, 400))),
+                    posted_by=user,
+                ))
+                if len(batch) >= 5000:
+                    Match.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                Match.objects.bulk_create(batch)
+            # bulk_create skips signals, so index in one pass
+            search.rebuild_index(
+                Match.objects.only('id', 'opponent', 'summary', 'competition').iterator(chunk_size=5000)
+            )
+
+        self.stdout.write(f"{'query':<20}{'icontains (ms)':>16}{'fts5 (ms)':>12}{'speedup':>10}")
+        for query in QUERIES:
+            legacy = self._time(repeat, lambda: self._legacy_search(query))
+            fts = self._time(repeat, lambda: search.search_matches(query))
+            self.stdout.write(
+                f'{query:<20}{legacy * 1000:>16.2f}{fts * 1000:>12.2f}{legacy / fts:>9.1f}x'
+            )
+
+    def _legacy_search(self, query):
+        # Mirrors the old match_list: first page plus a COUNT(*) for the total
+        matches = Match.objects.filter(
+            Q(opponent__icontains=query) |
+            Q(summary__icontains=query) |
+            Q(competition__icontains=query)
+        )
+        return list(matches[:10]), matches.count()
+
+    def _time(self, repeat, func):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from matches import write_behind
+from matches.models import Match, Comment
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test post_comment with concurrent posters, with and without the '
+        'write-behind queue (uses a throwaway file-backed SQLite test database)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--per-thread', type=int, default=50)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        workdir = tempfile.mkdtemp()
+        # A real file, so concurrent writers contend for the database lock like in production
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'loadtest.sqlite3')
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = User.objects.create(username='loadtest')
+            match = Match.objects.create(
+                opponent='Real Madrid', date=timezone.now(), summary='Load test', posted_by=user
+            )
+            url = reverse('matches:post_comment', kwargs={'match_id': match.pk})
+
+            self.stdout.write(f"{'mode':<16}{'comments':>10}{'errors':>8}{'seconds':>10}{'per sec':>10}")
+            for label, enabled in (('synchronous', False), ('write-behind', True)):
+                Comment.objects.all().delete()
+                # Admission control is lifted so the test measures write throughput only
+                with override_settings(
+                    COMMENT_WRITE_BEHIND=enabled,
+                    COMMENT_THROTTLE_IP_RATE=(10 ** 6, 10 ** 9),
+                    COMMENT_THROTTLE_MATCH_RATE=(10 ** 6, 10 ** 9),
+                    ALLOWED_HOSTS=['*'],
+                ):
+                    elapsed, errors = self._hammer(url, label, options['threads'], options['per_thread'])
+                    write_behind.comment_queue.drain()
+                stored = Comment.objects.count()
+                self.stdout.write(
+                    f'{label:<16}{stored:>10}{errors:>8}{elapsed:>10.2f}{stored / elapsed:>10.1f}'
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _hammer(self, url, label, threads, per_thread):
+        errors = []
+        barrier = threading.Barrier(threads)
+
+        def poster(index):
+            client = Client(REMOTE_ADDR=f'10.0.{index // 250}.{index % 250 + 1}')
+            barrier.wait()
+            try:
+                for i in range(per_thread):
+                    response = client.post(url, {
+                        'name': f'Fan {index}',
+                        # Unique bodies, so duplicate suppression doesn't drop any
+                        'comment': f'{label} comment number {i} from poster {index}, what a game!',
+                    })
+                    if response.status_code != 302:
+                        errors.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=poster, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        # Include the time to flush the queue, so throughput counts stored comments only
+        write_behind.comment_queue.drain()
+        return time.perf_counter() - started, len(errors)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from matches import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized comment counters on every match'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuilt = counters.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt comment counters for {rebuilt} matches.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from matches import head_to_head
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed head-to-head records from match results'
+
+    def handle(self, *args, **options):
+        rebuilt = head_to_head.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt head-to-head records for {rebuilt} opponents.'))
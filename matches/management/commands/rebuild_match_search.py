@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from matches import search
+from matches.models import Match
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            self.stdout.write(self.style.WARNING('Full-text search is only available on SQLite.'))
+            return
+        matches = Match.objects.only('id', 'opponent', 'summary', 'competition').iterator(
+            chunk_size=options['batch_size']
+        )
+        with transaction.atomic():
+            total = search.rebuild_index(matches, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} matches.'))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from matches.models import Match, Comment
+
+
+class Command(BaseCommand):
+    help = 'Backfill the pre-rendered HTML columns for match summaries and comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-render every row, not only rows with empty HTML'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        matches = Match.objects.only('id', 'summary')
+        comments = Comment.objects.only('id', 'comment')
+        if not options['all']:
+            matches = matches.filter(summary_html='')
+            comments = comments.filter(comment_html='')
+
+        rendered = self._render(matches, 'summary_html', batch_size)
+        self.stdout.write(f'Rendered {rendered} match summaries.')
+        rendered = self._render(comments, 'comment_html', batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} comments.'))
+
+    def _render(self, queryset, field, batch_size):
+        # Walk by primary key so rows fixed in an earlier batch don't shift the window
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                return total
+            for obj in batch:
+                obj.render_html()
+            with transaction.atomic():
+                queryset.model.objects.bulk_update(batch, [field])
+            total += len(batch)
+            last_pk = batch[-1].pk
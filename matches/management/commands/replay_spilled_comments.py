@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from matches import write_behind
+
+
+class Command(BaseCommand):
+    help = 'Insert comments the write-behind queue could not write and spilled to disk'
+
+    def handle(self, *args, **options):
+        written = write_behind.comment_queue.replay_spilled()
+        self.stdout.write(self.style.SUCCESS(f'Inserted {written} spilled comments.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from matches.stats import season_records
+
+
+class Command(BaseCommand):
+    help = 'Print per-season records computed with SQL aggregates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--by', choices=['competition', 'venue'], action='append', default=[],
+            help='Also split each season by competition and/or venue'
+        )
+
+    def handle(self, *args, **options):
+        group_by = tuple(options['by'])
+        header = f"{'season':<10}" + ''.join(f'{name:<18}' for name in group_by)
+        self.stdout.write(header + f"{'P':>4}{'W':>4}{'D':>4}{'L':>4}{'GF':>5}{'GA':>5}{'win %':>7}")
+        for row in season_records(group_by=group_by):
+            season = f"{row['season']}/{(row['season'] + 1) % 100:02d}"
+            groups = ''.join(f'{row[name]:<18}' for name in group_by)
+            win_rate = 100 * row['wins'] / row['played']
+            self.stdout.write(
+                f"{season:<10}{groups}{row['played']:>4}{row['wins']:>4}{row['draws']:>4}"
+                f"{row['losses']:>4}{row['scored']:>5}{row['conceded']:>5}{win_rate:>6.0f}%"
+            )
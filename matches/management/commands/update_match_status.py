@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from matches.models import Match
+
+
+class Command(BaseCommand):
+    help = 'Move matches whose kickoff has passed to LIVE/COMPLETED (run periodically, e.g. every minute from cron)'
+
+    def handle(self, *args, **options):
+        updated = Match.refresh_statuses()
+        self.stdout.write(self.style.SUCCESS(f'Updated status of {updated} matches.'))
@@ -0,0 +1,47 @@
+# Full-text search index for Match (SQLite FTS5 shadow table)
+
+from django.db import migrations
+
+
+FTS_TABLE = 'matches_match_fts'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Match = apps.get_model('matches', 'Match')
+    competitions = dict(Match._meta.get_field('competition').choices)
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"opponent, summary, competition, "
+        f"tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    rows = [
+        (match.pk, match.opponent, match.summary or '',
+         f"{match.competition} {competitions.get(match.competition, match.competition)}")
+        for match in Match.objects.all().iterator()
+    ]
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, opponent, summary, competition) "
+                f"VALUES (%s, %s, %s, %s)",
+                rows
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0002_comment'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:56
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def backfill_status(apps, schema_editor):
+    Match = apps.get_model('matches', 'Match')
+    now = timezone.now()
+    no_result = Q(result__isnull=True) | Q(result__exact='')
+    Match.objects.filter(date__gt=now).update(status='UPCOMING')
+    Match.objects.filter(date__lte=now).filter(no_result).update(status='LIVE')
+    Match.objects.filter(date__lte=now).exclude(no_result).update(status='COMPLETED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0003_match_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='status',
+            field=models.CharField(choices=[('UPCOMING', 'Upcoming'), ('LIVE', 'Live'), ('COMPLETED', 'Completed')], default='UPCOMING', editable=False, help_text='Stored match status, derived from date and result on save', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['status', 'date'], name='matches_mat_status_7ea721_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['competition', 'status', 'date'], name='matches_mat_competi_fa9a96_idx'),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:57
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Match = apps.get_model('matches', 'Match')
+    Comment = apps.get_model('matches', 'Comment')
+
+    def count(**filters):
+        counts = Comment.objects.filter(match=OuterRef('pk'), **filters).order_by().values(
+            'match'
+        ).annotate(total=Count('id')).values('total')
+        return Coalesce(Subquery(counts), Value(0))
+
+    Match.objects.update(
+        comment_count=count(),
+        approved_comment_count=count(is_approved=True),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0004_match_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='approved_comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Denormalized number of approved comments on this match'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Denormalized number of comments on this match'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['-approved_comment_count', '-date'], name='matches_mat_approve_ace79f_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
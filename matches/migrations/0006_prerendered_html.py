@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0005_match_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='comment_html',
+            field=models.TextField(blank=True, editable=False, help_text='Comment rendered to escaped HTML on save'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='summary_html',
+            field=models.TextField(blank=True, editable=False, help_text='Summary rendered to HTML on save'),
+        ),
+    ]
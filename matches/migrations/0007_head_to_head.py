@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+from matches.scores import normalize_opponent, parse_score, outcome
+
+
+def backfill_head_to_head(apps, schema_editor):
+    Match = apps.get_model('matches', 'Match')
+    HeadToHead = apps.get_model('matches', 'HeadToHead')
+
+    records = {}
+    for match in Match.objects.order_by('-date').iterator():
+        match.opponent_key = normalize_opponent(match.opponent)
+        Match.objects.filter(pk=match.pk).update(opponent_key=match.opponent_key)
+        score = parse_score(match.result)
+        if score is None:
+            continue
+        letter = outcome(*score)
+        record = records.setdefault(match.opponent_key, {
+            'opponent': match.opponent, 'played': 0, 'wins': 0, 'draws': 0, 'losses': 0,
+            'goals_for': 0, 'goals_against': 0, 'last_results': '',
+        })
+        record['played'] += 1
+        record['wins'] += letter == 'W'
+        record['draws'] += letter == 'D'
+        record['losses'] += letter == 'L'
+        record['goals_for'] += score[0]
+        record['goals_against'] += score[1]
+        if len(record['last_results']) < 5:
+            record['last_results'] += letter
+
+    HeadToHead.objects.bulk_create(
+        HeadToHead(opponent_key=key, **values) for key, values in records.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0006_prerendered_html'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opponent_key', models.CharField(max_length=100, unique=True)),
+                ('opponent', models.CharField(help_text='Display name of the opponent', max_length=100)),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('goals_for', models.PositiveIntegerField(default=0)),
+                ('goals_against', models.PositiveIntegerField(default=0)),
+                ('last_results', models.CharField(blank=True, help_text="Outcomes of the last five results, newest first (e.g. 'WWDLW')", max_length=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Head-to-Head Record',
+                'verbose_name_plural': 'Head-to-Head Records',
+                'ordering': ['opponent'],
+            },
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='opponent_key',
+            field=models.CharField(blank=True, editable=False, help_text='Normalized opponent name used for head-to-head lookups', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['opponent_key', '-date'], name='matches_mat_opponen_4f9418_idx'),
+        ),
+        migrations.RunPython(backfill_head_to_head, migrations.RunPython.noop),
+    ]
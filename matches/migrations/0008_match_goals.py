@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+from matches.scores import parse_score
+
+
+def parse_results(apps, schema_editor):
+    # head_to_head.rebuild() only reads these columns, so existing results
+    # must be parsed before anything rebuilds the records
+    Match = apps.get_model('matches', 'Match')
+    batch = []
+    for match in Match.objects.exclude(result__isnull=True).exclude(result='').only('id', 'result').iterator():
+        score = parse_score(match.result)
+        if score is None:
+            continue
+        match.goals_for, match.goals_against = score
+        batch.append(match)
+        if len(batch) >= 2000:
+            Match.objects.bulk_update(batch, ['goals_for', 'goals_against'])
+            batch = []
+    if batch:
+        Match.objects.bulk_update(batch, ['goals_for', 'goals_against'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0007_head_to_head'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='goals_against',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text='Opponent goals, parsed from result on save', null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='goals_for',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text='Barcelona goals, parsed from result on save', null=True),
+        ),
+        migrations.RunPython(parse_results, migrations.RunPython.noop),
+    ]
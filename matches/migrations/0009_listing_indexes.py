@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0008_match_goals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='match',
+            name='matches_mat_approve_ace79f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['match', '-created_at', '-id'], name='matches_comment_approved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['-date', '-id'], name='matches_mat_date_38cbb3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['competition', '-date', '-id'], name='matches_mat_competi_93b7e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['-approved_comment_count', '-date', '-id'], name='matches_mat_approve_0e55dd_idx'),
+        ),
+    ]
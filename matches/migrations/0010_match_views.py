@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0009_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Page views, flushed in batches by culer/page_views.py'),
+        ),
+        migrations.CreateModel(
+            name='MatchViewDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_days', to='matches.match')),
+            ],
+            options={
+                'verbose_name': 'Match Views per Day',
+                'verbose_name_plural': 'Match Views per Day',
+                'indexes': [models.Index(fields=['day', 'match', 'views'], name='matches_view_day_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('match', 'day'), name='matches_view_day_unique')],
+            },
+        ),
+    ]
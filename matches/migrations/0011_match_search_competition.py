@@ -0,0 +1,58 @@
+# Store the competition code in the match full-text index, so searches can
+# be filtered by competition before the result limit is applied
+
+from django.db import migrations
+
+
+FTS_TABLE = 'matches_match_fts'
+
+
+def _rebuild(apps, schema_editor, with_code):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Match = apps.get_model('matches', 'Match')
+    competitions = dict(Match._meta.get_field('competition').choices)
+    columns = 'opponent, summary, competition'
+    if with_code:
+        columns += ', competition_code'
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        f"{columns}{' UNINDEXED' if with_code else ''}, "
+        f"tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    rows = []
+    for match in Match.objects.only('id', 'opponent', 'summary', 'competition').iterator():
+        row = [
+            match.pk, match.opponent, match.summary or '',
+            f"{match.competition} {competitions.get(match.competition, match.competition)}",
+        ]
+        if with_code:
+            row.append(match.competition)
+        rows.append(row)
+    if rows:
+        placeholders = ', '.join(['%s'] * len(rows[0]))
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES ({placeholders})",
+                rows
+            )
+
+
+def add_competition_code(apps, schema_editor):
+    _rebuild(apps, schema_editor, with_code=True)
+
+
+def remove_competition_code(apps, schema_editor):
+    _rebuild(apps, schema_editor, with_code=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0010_match_views'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_competition_code, remove_competition_code),
+    ]
@@ -0,0 +1,57 @@
+# normalize_key now keeps non-Latin letters and transliterates ø/ł/ß and
+# friends, so recompute the opponent keys stored with the ASCII-only
+# version and regroup the head-to-head records under the new keys
+
+from django.db import migrations
+from django.db.models import Count, F, Max, Q, Sum
+
+from matches.scores import normalize_opponent, outcome
+
+
+def recompute_opponent_key(apps, schema_editor):
+    Match = apps.get_model('matches', 'Match')
+    HeadToHead = apps.get_model('matches', 'HeadToHead')
+    batch = []
+    for match in Match.objects.only('id', 'opponent', 'opponent_key').iterator():
+        key = normalize_opponent(match.opponent)
+        if key != match.opponent_key:
+            match.opponent_key = key
+            batch.append(match)
+    if not batch:
+        return
+    Match.objects.bulk_update(batch, ['opponent_key'], batch_size=2000)
+
+    scored = Match.objects.filter(goals_for__isnull=False, goals_against__isnull=False)
+    rows = scored.order_by().values('opponent_key').annotate(
+        opponent_name=Max('opponent'),
+        played=Count('id'),
+        wins=Count('id', filter=Q(goals_for__gt=F('goals_against'))),
+        draws=Count('id', filter=Q(goals_for=F('goals_against'))),
+        losses=Count('id', filter=Q(goals_for__lt=F('goals_against'))),
+        total_for=Sum('goals_for'),
+        total_against=Sum('goals_against'),
+    )
+    records = []
+    for row in rows:
+        recent = scored.filter(opponent_key=row['opponent_key']).order_by('-date').values_list(
+            'goals_for', 'goals_against'
+        )[:5]
+        records.append(HeadToHead(
+            opponent_key=row['opponent_key'], opponent=row['opponent_name'],
+            played=row['played'], wins=row['wins'], draws=row['draws'], losses=row['losses'],
+            goals_for=row['total_for'], goals_against=row['total_against'],
+            last_results=''.join(outcome(*score) for score in recent),
+        ))
+    HeadToHead.objects.all().delete()
+    HeadToHead.objects.bulk_create(records)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0011_match_search_competition'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_opponent_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# summary_html was rendered without escaping, so markup in a summary ran
+# on the match page; re-render every stored summary with escaping on, as
+# the linebreaks filter it replaced did
+
+from django.db import migrations
+from django.utils.html import linebreaks
+
+
+def render_summaries(apps, schema_editor):
+    Match = apps.get_model('matches', 'Match')
+    batch = []
+    for match in Match.objects.only('id', 'summary', 'summary_html').iterator():
+        html = linebreaks(match.summary or '', autoescape=True)
+        if html != match.summary_html:
+            match.summary_html = html
+            batch.append(match)
+    Match.objects.bulk_update(batch, ['summary_html'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0012_recompute_opponent_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_summaries, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,9 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.html import linebreaks
+
+from .scores import normalize_opponent, parse_score
 
 
 class Match(models.Model):
@@ -11,6 +14,12 @@ class Match(models.Model):
         ('NEUTRAL', 'Neutral Venue'),
     ]
     
+    STATUS_CHOICES = [
+        ('UPCOMING', 'Upcoming'),
+        ('LIVE', 'Live'),
+        ('COMPLETED', 'Completed'),
+    ]
+    
     COMPETITION_CHOICES = [
         ('LA_LIGA', 'La Liga'),
         ('CHAMPIONS_LEAGUE', 'Champions League'),
@@ -22,6 +31,12 @@ class Match(models.Model):
     ]
     
     opponent = models.CharField(max_length=100, help_text="Name of the opposing team")
+    opponent_key = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        help_text="Normalized opponent name used for head-to-head lookups"
+    )
     date = models.DateTimeField(help_text="Date and time of the match")
     venue = models.CharField(max_length=20, choices=VENUE_CHOICES, default='HOME')
     competition = models.CharField(max_length=20, choices=COMPETITION_CHOICES, default='LA_LIGA')
@@ -31,14 +46,53 @@ class Match(models.Model):
         null=True, 
         help_text="Match result (e.g., '2-1', '0-0'). Leave blank for upcoming matches."
     )
+    goals_for = models.PositiveSmallIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Barcelona goals, parsed from result on save"
+    )
+    goals_against = models.PositiveSmallIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Opponent goals, parsed from result on save"
+    )
     summary = models.TextField(
         help_text="Match review for completed matches or preview for upcoming matches"
     )
+    summary_html = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Summary rendered to HTML on save"
+    )
     image_url = models.URLField(
         blank=True, 
         null=True, 
         help_text="URL of an image hosted externally (e.g., Imgur, CDN)"
     )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='UPCOMING',
+        editable=False,
+        help_text="Stored match status, derived from date and result on save"
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Denormalized number of comments on this match"
+    )
+    approved_comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Denormalized number of approved comments on this match"
+    )
+    view_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Page views, flushed in batches by culer/page_views.py"
+    )
     posted_by = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
@@ -51,6 +105,14 @@ class Match(models.Model):
         ordering = ['-date']
         verbose_name = "Match"
         verbose_name_plural = "Matches"
+        indexes = [
+            models.Index(fields=['-date', '-id']),
+            models.Index(fields=['competition', '-date', '-id']),
+            models.Index(fields=['status', 'date']),
+            models.Index(fields=['competition', 'status', 'date']),
+            models.Index(fields=['-approved_comment_count', '-date', '-id']),
+            models.Index(fields=['opponent_key', '-date']),
+        ]
     
     def __str__(self):
         return f"FC Barcelona vs {self.opponent} - {self.date.strftime('%Y-%m-%d')}"
@@ -58,25 +120,96 @@ class Match(models.Model):
     def get_absolute_url(self):
         return reverse('matches:match_detail', kwargs={'match_id': self.pk})
     
+    # Columns computed from the others on every save (see derive_fields)
+    DERIVED_FIELDS = ('status', 'opponent_key', 'goals_for', 'goals_against', 'summary_html')
+    
+    def save(self, *args, **kwargs):
+        self.derive_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
+        super().save(*args, **kwargs)
+    
+    def derive_fields(self):
+        """Fill the DERIVED_FIELDS; also used by bulk writes that skip save()"""
+        self.status = self.compute_status()
+        self.opponent_key = normalize_opponent(self.opponent)
+        self.parse_result()
+        self.render_html()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_state()
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._remember_loaded_state(fields)
+    
+    def _remember_loaded_state(self, fields=None):
+        """Remember what the head-to-head table last counted for this match (loaded fields only)"""
+        # A partial refresh (e.g. loading a deferred field) only learns those fields
+        state = {} if fields is None else dict(getattr(self, '_loaded_state', None) or {})
+        refreshed = None if fields is None else {self._meta.get_field(name).attname for name in fields}
+        for name in ('opponent_key', 'result', 'date'):
+            if name in self.__dict__ and (refreshed is None or name in refreshed):
+                state[name] = self.__dict__[name]
+        self._loaded_state = state
+    
+    def parse_result(self):
+        """Fill goals_for/goals_against from the free-text result (None when unparseable)"""
+        self.goals_for, self.goals_against = parse_score(self.result) or (None, None)
+    
+    def render_html(self):
+        """Pre-render the summary once; escaped, as the linebreaks filter did"""
+        self.summary_html = linebreaks(self.summary or '', autoescape=True)
+    
+    def compute_status(self, now=None):
+        """Derive status: future kickoff is upcoming, past kickoff is live until a result is entered"""
+        now = now or timezone.now()
+        if self.date > now:
+            return 'UPCOMING'
+        if self.result:
+            return 'COMPLETED'
+        return 'LIVE'
+    
+    @classmethod
+    def refresh_statuses(cls, now=None):
+        """
+        Move matches whose kickoff has passed to LIVE, or to COMPLETED once
+        they have a result. Meant to be run periodically (see the
+        update_match_status command); each UPDATE is served by the
+        (status, date) index.
+        """
+        now = now or timezone.now()
+        completed = cls.objects.filter(
+            status__in=['UPCOMING', 'LIVE'], date__lte=now
+        ).exclude(
+            models.Q(result__isnull=True) | models.Q(result__exact='')
+        ).update(status='COMPLETED')
+        live = cls.objects.filter(status='UPCOMING', date__lte=now).update(status='LIVE')
+        return completed + live
+    
     @property
     def is_upcoming(self):
-        """Check if match is upcoming (no result or future date)"""
-        return not self.result or self.date > timezone.now()
+        """Check if match is upcoming (kickoff still in the future)"""
+        return self.status == 'UPCOMING'
     
     @property
     def is_completed(self):
         """Check if match is completed"""
-        return bool(self.result) and self.date <= timezone.now()
+        return self.status == 'COMPLETED'
+    
+    @property
+    def is_live(self):
+        """Check if match has kicked off but has no result yet"""
+        return self.status == 'LIVE'
     
     @property
     def match_status(self):
         """Get human-readable match status"""
-        if self.is_upcoming:
-            return "Upcoming"
-        elif self.is_completed:
-            return "Completed"
-        else:
-            return "Live"
+        return self.get_status_display()
     
     @property
     def competition_display(self):
@@ -89,6 +222,64 @@ class Match(models.Model):
         return dict(self.VENUE_CHOICES).get(self.venue, self.venue)
 
 
+class HeadToHead(models.Model):
+    """Precomputed record against one opponent, maintained as match results are saved"""
+    opponent_key = models.CharField(max_length=100, unique=True)
+    opponent = models.CharField(max_length=100, help_text="Display name of the opponent")
+    played = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    goals_for = models.PositiveIntegerField(default=0)
+    goals_against = models.PositiveIntegerField(default=0)
+    last_results = models.CharField(
+        max_length=5,
+        blank=True,
+        help_text="Outcomes of the last five results, newest first (e.g. 'WWDLW')"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['opponent']
+        verbose_name = "Head-to-Head Record"
+        verbose_name_plural = "Head-to-Head Records"
+    
+    def __str__(self):
+        return f"FC Barcelona vs {self.opponent}: {self.wins}W {self.draws}D {self.losses}L"
+    
+    @property
+    def goal_difference(self):
+        return self.goals_for - self.goals_against
+    
+    @property
+    def win_rate(self):
+        """Percentage of games won, rounded"""
+        if not self.played:
+            return 0
+        return round(100 * self.wins / self.played)
+
+
+class MatchViewDay(models.Model):
+    """Views of one match page on one day; the rollup behind "most read" rankings"""
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='view_days')
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Match Views per Day"
+        verbose_name_plural = "Match Views per Day"
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'day'], name='matches_view_day_unique'),
+        ]
+        indexes = [
+            # Covers the most-read ranking: a day range summed per match
+            models.Index(fields=['day', 'match', 'views'], name='matches_view_day_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.match_id} on {self.day}: {self.views}"
+
+
 class Comment(models.Model):
     match = models.ForeignKey(
         Match, 
@@ -104,6 +295,11 @@ class Comment(models.Model):
         max_length=1000,
         help_text="The comment content"
     )
+    comment_html = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Comment rendered to escaped HTML on save"
+    )
     email = models.EmailField(
         blank=True, 
         null=True,
@@ -131,12 +327,55 @@ class Comment(models.Model):
         verbose_name_plural = "Comments"
         indexes = [
             models.Index(fields=['match', '-created_at']),
+            # The public comment list; partial for the same reason as
+            # CommunityPost's: `WHERE is_approved` can't seek an index
+            models.Index(
+                fields=['match', '-created_at', '-id'],
+                condition=models.Q(is_approved=True),
+                name='matches_comment_approved_idx',
+            ),
             models.Index(fields=['is_approved', '-created_at']),
         ]
     
     def __str__(self):
         return f"Comment by {self.name} on {self.match.opponent} match"
     
+    DERIVED_FIELDS = ('comment_html',)
+    
+    def save(self, *args, **kwargs):
+        self.derive_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
+        super().save(*args, **kwargs)
+    
+    def derive_fields(self):
+        self.render_html()
+    
+    def render_html(self):
+        """Pre-render the comment once; public input, so it is always escaped"""
+        self.comment_html = linebreaks(self.comment or '', autoescape=True)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_state()
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._remember_loaded_state(fields)
+    
+    def _remember_loaded_state(self, fields=None):
+        """Remember the stored state so signals can adjust Match counters on change"""
+        # A partial refresh (e.g. loading a deferred field) only learns those fields
+        state = {} if fields is None else dict(getattr(self, '_loaded_state', None) or {})
+        refreshed = None if fields is None else {self._meta.get_field(name).attname for name in fields}
+        for name in ('match_id', 'is_approved'):
+            if name in self.__dict__ and (refreshed is None or name in refreshed):
+                state[name] = self.__dict__[name]
+        self._loaded_state = state
+    
     @property
     def short_comment(self):
         """Return truncated comment for admin display"""
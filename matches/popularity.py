@@ -0,0 +1,7 @@
+# matches/popularity.py
+from culer.page_views import ViewCounter
+from .models import Match, MatchViewDay
+
+
+# Buffered match page views (see culer/page_views.py)
+match_views = ViewCounter(Match, MatchViewDay, 'match')
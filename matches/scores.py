@@ -0,0 +1,36 @@
+# matches/scores.py
+import re
+
+from culer.text import normalize_key
+
+
+# First "<n> - <n>" pair wins, so '1-1 (4-3 pens)' reads as 1-1
+_SCORE_RE = re.compile(r'(\d{1,3})\s*[-–—:]\s*(\d{1,3})')
+
+
+def parse_score(result):
+    """
+    Parse a free-text result such as '2-1', '2 : 1', "'3-0'" or '1-1 (4-3 pens)'
+    into (goals_for, goals_against) from Barcelona's point of view.
+    Returns None if no score can be found.
+    """
+    if not result:
+        return None
+    match = _SCORE_RE.search(result)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def outcome(goals_for, goals_against):
+    """Single letter result code: W, D or L"""
+    if goals_for > goals_against:
+        return 'W'
+    if goals_for < goals_against:
+        return 'L'
+    return 'D'
+
+
+def normalize_opponent(name):
+    """Case-folded, accent-stripped key so 'Atlético Madrid' and 'atletico  madrid' match"""
+    return normalize_key(name)
@@ -0,0 +1,56 @@
+# matches/search.py
+from culer import fts
+from culer.fts import SEARCH_RESULT_LIMIT, fts_available  # noqa: F401
+
+
+# Name of the SQLite FTS5 shadow table that mirrors searchable Match text
+MATCH_FTS_TABLE = 'matches_match_fts'
+
+# competition_code is stored but not indexed, for exact filtering
+match_index = fts.FtsIndex(
+    MATCH_FTS_TABLE,
+    ('opponent', 'summary', 'competition', 'competition_code'),
+    weights=(10.0, 1.0, 5.0),
+    snippet_column='summary',
+    filter_column='competition_code',
+)
+
+
+def _index_row(match):
+    return (
+        match.pk,
+        match.opponent,
+        match.summary or '',
+        f"{match.competition} {match.competition_display}",
+        match.competition,
+    )
+
+
+def index_match(match):
+    """Insert or refresh a single match in the full-text index"""
+    match_index.index([_index_row(match)])
+
+
+def index_matches(matches):
+    """Insert or refresh a batch of matches (used by bulk paths that skip signals)"""
+    match_index.index(map(_index_row, matches))
+
+
+def unindex_match(match_id):
+    """Remove a match from the full-text index"""
+    match_index.unindex(match_id)
+
+
+def rebuild_index(matches, batch_size=2000):
+    """Rebuild the whole index from an iterable of matches, in batches"""
+    return match_index.rebuild(map(_index_row, matches), batch_size)
+
+
+def search_matches(search_query, competition=None, limit=SEARCH_RESULT_LIMIT):
+    """
+    Return ranked hits for a search query, best match first, optionally
+    restricted to one competition (before the limit is applied).
+    Returns None when the full-text index cannot serve the query, so callers
+    can fall back to a plain icontains filter.
+    """
+    return match_index.search(search_query, competition, limit)
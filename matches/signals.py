@@ -0,0 +1,76 @@
+# matches/signals.py
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from culer.bulk import bulk_saved
+from . import counters, head_to_head, search
+from .models import Match, Comment
+
+
+@receiver(post_save, sender=Match)
+def index_match_on_save(sender, instance, raw=False, **kwargs):
+    """Keep the full-text index in sync when a match is created or edited"""
+    if raw:
+        return
+    search.index_match(instance)
+
+
+@receiver(post_delete, sender=Match)
+def unindex_match_on_delete(sender, instance, **kwargs):
+    """Drop deleted matches from the full-text index"""
+    search.unindex_match(instance.pk)
+
+
+@receiver(post_save, sender=Match)
+def update_head_to_head_on_save(sender, instance, created, raw=False, **kwargs):
+    """Apply result changes to the precomputed head-to-head record"""
+    if raw:
+        return
+    head_to_head.match_saved(instance, created)
+
+
+@receiver(pre_delete, sender=Match)
+def load_counted_match_fields(sender, instance, **kwargs):
+    """Deferred fields can't be loaded once the row is gone, so load what post_delete needs"""
+    for name in ('opponent_key', 'result'):
+        getattr(instance, name)
+
+
+@receiver(post_delete, sender=Match)
+def update_head_to_head_on_delete(sender, instance, **kwargs):
+    """Take a deleted match out of its head-to-head record"""
+    head_to_head.match_deleted(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_on_save(sender, instance, created, raw=False, **kwargs):
+    """Keep Match comment counters in step with new and edited comments"""
+    if raw:
+        return
+    counters.comment_saved(instance, created)
+
+
+@receiver(pre_delete, sender=Comment)
+def load_counted_comment_fields(sender, instance, **kwargs):
+    """Deferred fields can't be loaded once the row is gone, so load what post_delete needs"""
+    for name in ('match_id', 'is_approved'):
+        getattr(instance, name)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_on_delete(sender, instance, **kwargs):
+    """Decrement Match comment counters when a comment goes away"""
+    counters.comment_deleted(instance)
+
+
+@receiver(bulk_saved, sender=Match)
+def update_matches_on_bulk_save(sender, instances, **kwargs):
+    """bulk_save() skips post_save: refresh the index and head-to-head once per batch"""
+    search.index_matches(instances)
+    head_to_head.matches_updated(instances)
+
+
+@receiver(bulk_saved, sender=Comment)
+def count_comments_on_bulk_save(sender, instances, **kwargs):
+    """Apply counter changes for comments written by bulk_save()"""
+    counters.comments_updated(instances)
@@ -0,0 +1,45 @@
+# matches/stats.py
+"""
+Season statistics computed in SQL from the structured score columns.
+
+A season runs from July to June and is labelled by its starting year,
+so a match on 2025-03-01 belongs to the 2024 (2024/25) season.
+"""
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, When
+from django.db.models.functions import ExtractYear
+
+from .models import Match
+
+
+SEASON_START_MONTH = 7
+
+
+def season_expression():
+    return Case(
+        When(date__month__gte=SEASON_START_MONTH, then=ExtractYear('date')),
+        default=ExtractYear('date') - 1,
+        output_field=IntegerField(),
+    )
+
+
+def season_records(queryset=None, group_by=()):
+    """
+    One row per season (optionally split further, e.g. by 'competition' or
+    'venue') with played, wins, draws, losses and goals, from a single
+    grouped query over matches that have a parsed score.
+    """
+    queryset = Match.objects.all() if queryset is None else queryset
+    scored = queryset.filter(goals_for__isnull=False, goals_against__isnull=False)
+    return list(
+        scored.annotate(season=season_expression())
+        .values('season', *group_by)
+        .annotate(
+            played=Count('id'),
+            wins=Count('id', filter=Q(goals_for__gt=F('goals_against'))),
+            draws=Count('id', filter=Q(goals_for=F('goals_against'))),
+            losses=Count('id', filter=Q(goals_for__lt=F('goals_against'))),
+            scored=Sum('goals_for'),
+            conceded=Sum('goals_against'),
+        )
+        .order_by('-season', *group_by)
+    )
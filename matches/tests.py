@@ -1,3 +1,698 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from culer.pagination import KeysetPaginator
+from culer.query_plans import QueryPlanTestCase
+from . import head_to_head, search, throttle, views, write_behind
+from .models import Match, Comment, HeadToHead
+
+
+class MatchQueryPlanTests(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='editor')
+        now = timezone.now()
+        cls.match = Match.objects.create(
+            opponent='Real Madrid', date=now - timedelta(days=3), result='2-1',
+            summary='El Clásico', posted_by=user,
+        )
+        Match.objects.create(
+            opponent='Girona', date=now + timedelta(days=4), summary='Preview', posted_by=user,
+        )
+        Comment.objects.create(match=cls.match, name='Culer', comment='Visca')
+
+    def test_match_list(self):
+        self.assertIndexedPlans(views.match_list)
+        self.assertIndexedPlans(views.match_list, {'competition': 'LA_LIGA'})
+        self.assertIndexedPlans(views.match_list, {'sort': 'discussed'})
+
+    def test_match_list_search(self):
+        # bm25() ranking sorts the (bounded) FTS hits; that sort is inherent
+        self.assertIndexedPlans(
+            views.match_list, {'search': 'madrid'}, allowed=('USE TEMP B-TREE FOR ORDER BY',)
+        )
+
+    def test_completed_matches(self):
+        self.assertIndexedPlans(views.completed_matches)
+        self.assertIndexedPlans(views.completed_matches, {'competition': 'LA_LIGA'})
+
+    def test_upcoming_matches(self):
+        # status IN ('UPCOMING', 'LIVE') merges two index ranges; the set is
+        # small (future fixtures plus live games), so sorting it is accepted
+        self.assertIndexedPlans(
+            views.upcoming_matches, allowed=('USE TEMP B-TREE FOR ORDER BY',)
+        )
+
+    def test_match_detail(self):
+        self.assertIndexedPlans(views.match_detail, match_id=self.match.pk)
+
+    def test_comment_page(self):
+        self.assertIndexedPlans(views.comment_page, match_id=self.match.pk)
+
+
+class MatchSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='reporter')
+        now = timezone.now()
+        cls.league = [
+            Match.objects.create(
+                opponent='Sevilla', date=now - timedelta(days=day), result='2-0',
+                summary='Lewandowski scores again.', posted_by=cls.user,
+            )
+            for day in range(1, 4)
+        ]
+        cls.cup = Match.objects.create(
+            opponent='Osasuna', date=now - timedelta(days=10), result='3-1', competition='COPA_DEL_REY',
+            summary='A <b>late</b> goal by Lewandowski.', posted_by=cls.user,
+        )
+
+    def test_ranked_hits_with_escaped_snippets(self):
+        hits = search.search_matches('sevilla')
+        self.assertEqual({hit.pk for hit in hits}, {match.pk for match in self.league})
+        hit, = search.search_matches('late')
+        self.assertEqual(hit.pk, self.cup.pk)
+        self.assertIn('<mark>late</mark>', hit.snippet)
+        self.assertIn('&lt;b&gt;', hit.snippet)
+
+    def test_index_follows_creates_edits_and_deletes(self):
+        match = Match.objects.create(
+            opponent='Girona', date=timezone.now(), summary='Preview', posted_by=self.user,
+        )
+        self.assertEqual([hit.pk for hit in search.search_matches('girona')], [match.pk])
+        match.opponent = 'Valencia'
+        match.save()
+        self.assertEqual(search.search_matches('girona'), [])
+        self.assertEqual([hit.pk for hit in search.search_matches('valencia')], [match.pk])
+        match.delete()
+        self.assertEqual(search.search_matches('valencia'), [])
+
+    def test_competition_is_filtered_before_the_limit(self):
+        hits = search.search_matches('lewandowski', 'COPA_DEL_REY', limit=1)
+        self.assertEqual([hit.pk for hit in hits], [self.cup.pk])
+        response = self.client.get('/matches/', {'search': 'lewandowski', 'competition': 'COPA_DEL_REY'})
+        self.assertEqual([match.pk for match in response.context['page_obj']], [self.cup.pk])
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='archivist')
+        kickoff = timezone.now() - timedelta(days=30)
+        # Pairs of matches share a kickoff, so the id must break the ties
+        cls.matches = [
+            Match.objects.create(
+                opponent=f'Opponent {i}', date=kickoff + timedelta(days=i // 2),
+                result='1-0' if i % 3 else None, summary='...', posted_by=user,
+            )
+            for i in range(7)
+        ]
+
+    def walk(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append(page)
+            if not page.has_next():
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once_in_order(self):
+        paginator = KeysetPaginator(Match.objects.all(), 3, ordering=('-date', '-id'))
+        pages = self.walk(paginator)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        expected = sorted(self.matches, key=lambda match: (match.date, match.pk), reverse=True)
+        self.assertEqual([match for page in pages for match in page], expected)
+        self.assertFalse(pages[0].has_previous())
+
+    def test_previous_cursor_returns_the_same_page(self):
+        paginator = KeysetPaginator(Match.objects.all(), 3, ordering=('-date', '-id'))
+        first, second, third = self.walk(paginator)
+        self.assertEqual(list(paginator.get_page(third.previous_cursor)), list(second))
+        self.assertEqual(list(paginator.get_page(second.previous_cursor)), list(first))
+
+    def test_nullable_keys_sort_last(self):
+        paginator = KeysetPaginator(Match.objects.all(), 2, ordering=('-result', 'id'))
+        rows = [match for page in self.walk(paginator) for match in page]
+        self.assertEqual(len(rows), len(self.matches))
+        scored = [match for match in rows if match.result]
+        self.assertEqual(rows[:len(scored)], scored)
+
+    def test_unreadable_cursor_falls_back_to_the_first_page(self):
+        paginator = KeysetPaginator(Match.objects.all(), 3, ordering=('-date', '-id'))
+        self.assertEqual(list(paginator.get_page('not-a-cursor')), list(paginator.get_page()))
+
+    def test_page_urls_keep_the_other_parameters(self):
+        paginator = KeysetPaginator(Match.objects.all(), 3, ordering=('-date', '-id'))
+        page = paginator.get_page(params={'competition': 'LA_LIGA', 'cursor': 'old'})
+        self.assertTrue(page.next_page_url.startswith('?competition=LA_LIGA&cursor='))
+
+
+class MatchStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='scheduler')
+
+    def create(self, hours_from_now, result=None):
+        return Match.objects.create(
+            opponent='Girona', date=timezone.now() + timedelta(hours=hours_from_now), result=result,
+            summary='...', posted_by=self.user,
+        )
+
+    def statuses(self, *matches):
+        return [Match.objects.get(pk=match.pk).status for match in matches]
+
+    def test_status_is_derived_on_save(self):
+        match = self.create(2)
+        self.assertTrue(match.is_upcoming)
+        match.date = timezone.now() - timedelta(minutes=30)
+        match.save()
+        self.assertTrue(match.is_live)
+        match.result = '2-1'
+        match.save(update_fields=['result'])
+        self.assertEqual(self.statuses(match), ['COMPLETED'])
+
+    def test_refresh_moves_matches_past_kickoff(self):
+        later = self.create(1)
+        tomorrow = self.create(24)
+        scored = self.create(2, result='3-0')
+        live = self.create(-1)
+        Match.objects.filter(pk=live.pk).update(result='1-1')
+
+        self.assertEqual(Match.refresh_statuses(now=timezone.now() + timedelta(hours=3)), 3)
+        self.assertEqual(self.statuses(later, tomorrow, scored, live), ['LIVE', 'UPCOMING', 'COMPLETED', 'COMPLETED'])
+        # Nothing left to move
+        self.assertEqual(Match.refresh_statuses(now=timezone.now() + timedelta(hours=3)), 0)
+
+    def test_update_match_status_command(self):
+        match = self.create(-1)
+        Match.objects.filter(pk=match.pk).update(status='UPCOMING')
+        out = StringIO()
+        call_command('update_match_status', stdout=out)
+        self.assertIn('Updated status of 1 matches.', out.getvalue())
+        self.assertEqual(self.statuses(match), ['LIVE'])
+
+
+class StoredHtmlTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='editor')
+        cls.match = Match.objects.create(
+            opponent='Mallorca', date=timezone.now() - timedelta(days=1), result='1-0', posted_by=user,
+            summary='<script>alert("xss")</script>\n\nA <b>narrow</b> win.',
+        )
+
+    def test_summary_markup_is_escaped(self):
+        self.assertNotIn('<script>', self.match.summary_html)
+        response = self.client.get(f'/matches/{self.match.pk}/')
+        self.assertContains(response, '<p>&lt;script&gt;alert(&quot;xss&quot;)&lt;/script&gt;</p>', html=False)
+        self.assertNotContains(response, '<script>alert(')
+
+    def test_render_stored_html_rerenders_every_row(self):
+        Match.objects.filter(pk=self.match.pk).update(summary_html='<p><script>alert(1)</script></p>')
+        call_command('render_stored_html', '--all', stdout=StringIO())
+        self.match.refresh_from_db()
+        self.assertEqual(
+            self.match.summary_html,
+            '<p>&lt;script&gt;alert(&quot;xss&quot;)&lt;/script&gt;</p>\n\n<p>A &lt;b&gt;narrow&lt;/b&gt; win.</p>',
+        )
+
+
+class CommentPageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='moderator')
+        cls.match = Match.objects.create(
+            opponent='Betis', date=timezone.now() - timedelta(days=1), result='2-2',
+            summary='...', posted_by=user,
+        )
+        posted = timezone.now() - timedelta(hours=1)
+        Comment.objects.bulk_create([
+            # Pairs share a timestamp, so the id must break the ties
+            Comment(match=cls.match, name='Culer', comment=f'Comment number {i}',
+                    created_at=posted + timedelta(minutes=i // 2))
+            for i in range(views.COMMENTS_PER_PAGE * 2 + 5)
+        ] + [Comment(match=cls.match, name='Spam', comment='Hidden comment', is_approved=False)])
+
+    def test_pages_have_no_gaps_or_repeats_and_stop_at_the_end(self):
+        response = self.client.get(f'/matches/{self.match.pk}/')
+        pages = [list(response.context['comments_page'])]
+        cursor = response.context['comments_page'].next_cursor
+        while cursor:
+            response = self.client.get(f'/matches/{self.match.pk}/comments/', {'cursor': cursor})
+            page = response.context['comments_page']
+            pages.append(list(page))
+            cursor = page.next_cursor if page.has_next() else None
+
+        self.assertEqual([len(page) for page in pages], [20, 20, 5])
+        self.assertNotContains(response, 'load-more-comments')
+        shown = [comment for page in pages for comment in page]
+        expected = Comment.objects.filter(match=self.match, is_approved=True).order_by('-created_at', '-id')
+        self.assertEqual(shown, list(expected))
+
+
+class CommentCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='moderator')
+        cls.match = Match.objects.create(opponent='Betis', date=timezone.now(), summary='...', posted_by=user)
+        cls.other = Match.objects.create(opponent='Celta', date=timezone.now(), summary='...', posted_by=user)
+
+    def counts(self, match):
+        match.refresh_from_db(fields=['comment_count', 'approved_comment_count'])
+        return match.comment_count, match.approved_comment_count
+
+    def test_fresh_instance_saved_twice(self):
+        comment = Comment(match=self.match, name='Culer', comment='Visca el Barça')
+        comment.save()
+        comment.save()
+        self.assertEqual(self.counts(self.match), (1, 1))
+        comment.is_approved = False
+        comment.save()
+        self.assertEqual(self.counts(self.match), (1, 0))
+
+    def test_moves_and_deletes(self):
+        comment = Comment.objects.create(match=self.match, name='Culer', comment='Visca el Barça')
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.match = self.other
+        comment.save()
+        self.assertEqual(self.counts(self.match), (0, 0))
+        self.assertEqual(self.counts(self.other), (1, 1))
+        Comment.objects.only('id').get(pk=comment.pk).delete()
+        self.assertEqual(self.counts(self.other), (0, 0))
+
+    def test_saves_without_the_loaded_state_are_recounted(self):
+        comment = Comment.objects.create(match=self.match, name='Culer', comment='Visca el Barça')
+        deferred = Comment.objects.only('id', 'comment').get(pk=comment.pk)
+        deferred.is_approved = False
+        deferred.save()
+        self.assertEqual(self.counts(self.match), (1, 0))
+        unloaded = Comment(
+            pk=comment.pk, match=self.match, name='Culer', comment='Visca', created_at=comment.created_at,
+        )
+        unloaded.save()
+        self.assertEqual(self.counts(self.match), (1, 1))
+
+
+class AdminActionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('steward', 'steward@example.com', 'password')
+        cls.match = Match.objects.create(
+            opponent='Real Madrid', date=timezone.now() - timedelta(days=1), summary='...', posted_by=cls.admin,
+        )
+        cls.comments = [
+            Comment.objects.create(match=cls.match, name='Culer', comment=f'Comment number {i}', is_approved=False)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def act(self, model, action, objects):
+        return self.client.post(f'/admin/matches/{model}/', {
+            'action': action, '_selected_action': [obj.pk for obj in objects],
+        })
+
+    def counts(self):
+        self.match.refresh_from_db(fields=['comment_count', 'approved_comment_count'])
+        return self.match.comment_count, self.match.approved_comment_count
+
+    def test_approving_keeps_the_approved_count(self):
+        self.assertEqual(self.counts(), (3, 0))
+        with mock.patch.object(Comment, 'save') as save:
+            self.act('comment', 'approve_comments', self.comments)
+        self.assertFalse(save.called)
+        self.assertEqual(self.counts(), (3, 3))
+        # Already approved comments are not counted again
+        self.act('comment', 'approve_comments', self.comments[:2])
+        self.assertEqual(self.counts(), (3, 3))
+        self.act('comment', 'unapprove_comments', self.comments[1:])
+        self.assertEqual(self.counts(), (3, 1))
+        self.act('comment', 'feature_comments', self.comments)
+        self.assertEqual(self.counts(), (3, 1))
+
+    def test_result_actions_update_head_to_head_and_search(self):
+        self.act('match', 'mark_as_completed', [self.match])
+        self.match.refresh_from_db()
+        self.assertEqual((self.match.result, self.match.status), ('0-0', 'COMPLETED'))
+        record = HeadToHead.objects.get(opponent_key='realmadrid')
+        self.assertEqual((record.played, record.draws, record.last_results), (1, 1, 'D'))
+        self.assertEqual([hit.pk for hit in search.search_matches('real madrid')], [self.match.pk])
+
+        self.act('match', 'mark_as_upcoming', [self.match])
+        self.assertFalse(HeadToHead.objects.filter(opponent_key='realmadrid').exists())
+
+
+class HeadToHeadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='statto')
+
+    def create(self, result, days_ago=1, opponent='Real Madrid'):
+        return Match.objects.create(
+            opponent=opponent, date=timezone.now() - timedelta(days=days_ago), result=result,
+            summary='...', posted_by=self.user,
+        )
+
+    def record(self, opponent_key='realmadrid'):
+        return HeadToHead.objects.get(opponent_key=opponent_key)
+
+    def test_results_are_counted_once(self):
+        match = Match(opponent='Real Madrid', date=timezone.now() - timedelta(days=2), result='4-0',
+                      summary='...', posted_by=self.user)
+        match.save()
+        match.save()
+        self.create('1-2', days_ago=1)
+        record = self.record()
+        self.assertEqual((record.played, record.wins, record.losses), (2, 1, 1))
+        self.assertEqual((record.goals_for, record.goals_against), (5, 2))
+        self.assertEqual(record.last_results, 'LW')
+
+    def test_deferred_result_is_not_counted_twice(self):
+        match = self.create('2-1')
+        deferred = Match.objects.only('id', 'opponent', 'date', 'summary').get(pk=match.pk)
+        deferred.summary = 'Edited'
+        deferred.save()
+        self.assertEqual(self.record().played, 1)
+        deferred = Match.objects.only('id', 'opponent', 'date').get(pk=match.pk)
+        deferred.result = '2-2'
+        deferred.save()
+        record = self.record()
+        self.assertEqual((record.played, record.wins, record.draws), (1, 0, 1))
+
+    def test_moving_a_match_reorders_the_last_results(self):
+        older = self.create('0-1', days_ago=10)
+        self.create('2-0', days_ago=5)
+        self.assertEqual(self.record().last_results, 'WL')
+        older.date = timezone.now() - timedelta(days=1)
+        older.save()
+        self.assertEqual(self.record().last_results, 'LW')
+        deferred = Match.objects.only('id', 'opponent', 'opponent_key', 'result', 'summary').get(pk=older.pk)
+        deferred.date = timezone.now() - timedelta(days=20)
+        deferred.save()
+        self.assertEqual(self.record().last_results, 'WL')
+        self.assertEqual(self.record().played, 2)
+
+    def test_edits_and_deletes(self):
+        match = self.create('3-0')
+        match.opponent = 'Atlético Madrid'
+        match.save()
+        self.assertEqual(self.record().played, 0)
+        self.assertEqual(self.record('atleticomadrid').wins, 1)
+        Match.objects.only('id').get(pk=match.pk).delete()
+        self.assertEqual(self.record('atleticomadrid').played, 0)
+
+
+class WriteBehindTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='liveblog')
+        cls.match = Match.objects.create(opponent='Napoli', date=timezone.now(), summary='...', posted_by=user)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spill_file = os.path.join(directory.name, 'spill.jsonl')
+        self.queue = write_behind.CommentWriteBehind(
+            batch_size=2, retries=3, retry_delay=0, spill_file=self.spill_file,
+        )
+        # Flushed synchronously below, in the test's transaction
+        patcher = mock.patch.object(self.queue, '_ensure_started')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def enqueue(self, count):
+        for i in range(count):
+            self.queue.enqueue(Comment(match=self.match, name='Culer', comment=f'Comment number {i} <b>'))
+
+    def test_queued_comments_are_written_with_counters(self):
+        self.enqueue(3)
+        self.queue.flush_remaining()
+        self.assertEqual(Comment.objects.filter(match=self.match).count(), 3)
+        self.assertIn('&lt;b&gt;', Comment.objects.first().comment_html)
+        self.match.refresh_from_db()
+        self.assertEqual((self.match.comment_count, self.match.approved_comment_count), (3, 3))
+
+    def test_failed_batch_is_retried(self):
+        write = self.queue.write
+        attempts = []
+
+        def flaky(batch):
+            attempts.append(len(batch))
+            if len(attempts) == 1:
+                raise OperationalError('database is locked')
+            write(batch)
+
+        self.enqueue(2)
+        with mock.patch.object(self.queue, 'write', side_effect=flaky), self.assertLogs(write_behind.logger):
+            self.queue.flush_remaining()
+        self.assertEqual(attempts, [2, 2])
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertFalse(os.path.exists(self.spill_file))
+
+    def test_repeated_failures_spill_to_disk_for_replay(self):
+        self.enqueue(3)
+        failing = mock.patch.object(self.queue, 'write', side_effect=OperationalError('disk I/O error'))
+        with failing as write, self.assertLogs(write_behind.logger):
+            self.queue.flush_remaining()
+        self.assertEqual(write.call_count, 3)
+        self.assertEqual(Comment.objects.count(), 0)
+        with open(self.spill_file) as spilled:
+            self.assertEqual(len(spilled.readlines()), 3)
+
+        self.assertEqual(self.queue.replay_spilled(), 3)
+        self.assertFalse(os.path.exists(self.spill_file))
+        self.assertEqual(
+            sorted(Comment.objects.values_list('comment', flat=True)),
+            [f'Comment number {i} <b>' for i in range(3)],
+        )
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.comment_count, 3)
+
+    def test_failed_replay_keeps_unwritten_comments(self):
+        self.enqueue(3)
+        with mock.patch.object(self.queue, 'write', side_effect=OperationalError), self.assertLogs(write_behind.logger):
+            self.queue.flush_remaining()
+        write = self.queue.write
+        batches = []
+
+        def fail_second_batch(batch):
+            batches.append(batch)
+            if len(batches) == 2:
+                raise OperationalError('database is locked')
+            write(batch)
+
+        with mock.patch.object(self.queue, 'write', side_effect=fail_second_batch):
+            with self.assertRaises(OperationalError):
+                self.queue.replay_spilled()
+        self.assertEqual(Comment.objects.count(), 2)
+        with open(self.spill_file) as spilled:
+            self.assertEqual(len(spilled.readlines()), 1)
+
+    @override_settings(COMMENT_WRITE_BEHIND=True)
+    def test_poster_sees_their_comment_until_it_is_written(self):
+        detail_url = f'/matches/{self.match.pk}/'
+        with mock.patch.object(write_behind.comment_queue, '_ensure_started'):
+            response = self.client.post(f'{detail_url}post_comment/', {
+                'name': 'Culer', 'comment': 'Pending comment from the stands',
+            })
+            self.assertRedirects(response, detail_url + '#comment-pending', fetch_redirect_response=False)
+            self.assertIn(write_behind.PENDING_COOKIE, response.cookies)
+            pending = self.client.get(detail_url).context['pending_comment']
+            self.assertEqual(pending.comment, 'Pending comment from the stands')
+            write_behind.comment_queue.flush_remaining()
+
+        # Written, and no longer on the first page: still not shown twice
+        Comment.objects.bulk_create([
+            Comment(match=self.match, name='Other', comment=f'Later comment {i}')
+            for i in range(views.COMMENTS_PER_PAGE)
+        ])
+        response = self.client.get(detail_url)
+        self.assertIsNone(response.context['pending_comment'])
+        self.assertEqual(Comment.objects.filter(comment='Pending comment from the stands').count(), 1)
+
+    @override_settings(COMMENT_WRITE_BEHIND=True)
+    def test_long_comments_stay_out_of_the_cookie(self):
+        detail_url = f'/matches/{self.match.pk}/'
+        text = 'Visça el Barça! Ретро матч 🔵🔴 ' * 150
+        with mock.patch.object(write_behind.comment_queue, '_ensure_started'):
+            response = self.client.post(f'{detail_url}post_comment/', {'name': 'Culer', 'comment': text})
+            cookie = response.cookies[write_behind.PENDING_COOKIE]
+            self.assertLess(len(cookie.OutputString()), 300)
+            self.assertNotIn('Visca', cookie.value)
+            self.assertEqual(self.client.get(detail_url).context['pending_comment'].comment, text.strip())
+            write_behind.comment_queue.flush_remaining()
+        self.assertIsNone(self.client.get(detail_url).context['pending_comment'])
+
+    def test_pending_body_expired_from_the_cache(self):
+        response = HttpResponse()
+        write_behind.remember_pending(response, Comment(match=self.match, name='Culer', comment='Gone from the cache'))
+        cache.clear()
+        request = RequestFactory().get('/')
+        request.COOKIES[write_behind.PENDING_COOKIE] = response.cookies[write_behind.PENDING_COOKIE].value
+        self.assertIsNone(write_behind.pending_comment(request, self.match))
+
+
+class ThrottleTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, remote_addr, forwarded_for=None):
+        extra = {'REMOTE_ADDR': remote_addr}
+        if forwarded_for is not None:
+            extra['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        return RequestFactory().post('/', **extra)
+
+    def test_forwarded_for_is_ignored_from_untrusted_peers(self):
+        self.assertEqual(throttle.client_ip(self.request('203.0.113.9', '1.2.3.4')), '203.0.113.9')
+
+    @override_settings(TRUSTED_PROXIES=['10.0.0.0/8'])
+    def test_last_untrusted_hop_behind_trusted_proxies(self):
+        # The client prepended a spoofed hop; the proxies appended the real one
+        request = self.request('10.0.0.2', '6.6.6.6, 198.51.100.7, 10.0.0.1')
+        self.assertEqual(throttle.client_ip(request), '198.51.100.7')
+        self.assertEqual(throttle.client_ip(self.request('10.0.0.2', 'junk, 10.0.0.1')), '10.0.0.1')
+        self.assertEqual(throttle.client_ip(self.request('10.0.0.2')), '10.0.0.2')
+
+    def test_memory_buckets_refill(self):
+        buckets = throttle.MemoryTokenBuckets()
+        self.assertEqual([buckets.take('ip', 2, 1.0, now=0) for _ in range(3)], [0, 0, 1.0])
+        self.assertAlmostEqual(buckets.take('ip', 2, 1.0, now=0.5), 0.5)
+        self.assertEqual(buckets.take('ip', 2, 1.0, now=2), 0)
+
+    def test_cache_buckets_are_atomic_under_concurrency(self):
+        buckets = throttle.CacheTokenBuckets()
+        allowed = []
+        barrier = threading.Barrier(20)
+
+        def post():
+            barrier.wait()
+            allowed.append(buckets.take('ip:shared', 5, 0.1, now=1000.0) == 0)
+
+        threads = [threading.Thread(target=post) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(allowed.count(True), 5)
+        self.assertAlmostEqual(buckets.take('ip:shared', 5, 0.1, now=1010.0), 40.0)
+        self.assertEqual(buckets.take('ip:shared', 5, 0.1, now=1050.0), 0)
+
+    def test_recent_set_is_bounded(self):
+        recent = throttle.MemoryRecentSet(window=300, max_size=3)
+        for i in range(10):
+            self.assertFalse(recent.seen_recently(f'body {i}', now=i))
+        self.assertLessEqual(len(recent), 3)
+        self.assertTrue(recent.seen_recently('body 9', now=10))
+        self.assertFalse(recent.seen_recently('body 9', now=400))
+
+    def test_released_bodies_are_not_duplicates(self):
+        for recent in (throttle.MemoryRecentSet(window=300), throttle.CacheRecentSet(window=300)):
+            comment_throttle = throttle.CommentThrottle(None, recent, (5, 6), (100, 600))
+            self.assertFalse(comment_throttle.is_duplicate(1, 'Visca el Barça'))
+            self.assertTrue(comment_throttle.is_duplicate(1, '  visca el  BARÇA'))
+            comment_throttle.release(1, 'Visca el Barça')
+            self.assertFalse(comment_throttle.is_duplicate(1, 'Visca el Barça'))
+
+
+class PostCommentThrottleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='gatekeeper')
+        cls.match = Match.objects.create(opponent='Benfica', date=timezone.now(), summary='...', posted_by=user)
+
+    def post(self, comment, **extra):
+        return self.client.post(
+            f'/matches/{self.match.pk}/post_comment/', {'name': 'Culer', 'comment': comment}, **extra
+        )
+
+    @override_settings(COMMENT_THROTTLE_IP_RATE=(2, 1))
+    def test_spoofed_forwarded_for_does_not_reset_the_bucket(self):
+        statuses = [
+            self.post(
+                f'Flood comment number {i}', REMOTE_ADDR='192.0.2.50', HTTP_X_FORWARDED_FOR=f'10.1.1.{i}',
+            ).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [302, 302, 429])
+
+    def test_failed_insert_can_be_retried(self):
+        with mock.patch.object(Comment, 'save', side_effect=OperationalError('database is locked')):
+            response = self.post('Retry this comment please', REMOTE_ADDR='192.0.2.60')
+        self.assertEqual(response.status_code, 200)
+        response = self.post('Retry this comment please', REMOTE_ADDR='192.0.2.60')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Comment.objects.filter(comment='Retry this comment please').exists())
+
+    def test_missing_match_does_not_claim_the_comment(self):
+        missing = self.match.pk + 1000
+        response = self.client.post(
+            f'/matches/{missing}/post_comment/', {'name': 'Culer', 'comment': 'Posted to a missing match'},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(throttle.get_throttle().is_duplicate(missing, 'Posted to a missing match'))
+
+
+class MatchGoalsMigrationTests(TransactionTestCase):
+    """0008 adds goals_for/goals_against, which head_to_head.rebuild() reads exclusively"""
+
+    before = [('matches', '0007_head_to_head')]
+    after = [('matches', '0008_match_goals')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def migrate_to_latest(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes('matches'))
+
+    def tearDown(self):
+        self.migrate_to_latest()
+
+    def test_existing_results_survive_a_rebuild(self):
+        apps = self.migrate(self.before)
+        user = apps.get_model('auth', 'User').objects.create(username='historian')
+        apps.get_model('matches', 'Match').objects.create(
+            opponent='Real Madrid', opponent_key='realmadrid', date=timezone.now() - timedelta(days=1),
+            result='10-2', summary='...', posted_by_id=user.pk, status='COMPLETED',
+        )
+        apps.get_model('matches', 'HeadToHead').objects.create(
+            opponent_key='realmadrid', opponent='Real Madrid', played=1, wins=1,
+            goals_for=10, goals_against=2, last_results='W',
+        )
+
+        self.migrate(self.after)
+        self.migrate_to_latest()
+        self.assertEqual(list(Match.objects.values_list('goals_for', 'goals_against')), [(10, 2)])
+        head_to_head.rebuild()
+        record = HeadToHead.objects.get(opponent_key='realmadrid')
+        self.assertEqual((record.played, record.wins, record.goals_for, record.goals_against), (1, 1, 10, 2))
+        self.assertEqual(record.last_results, 'W')
@@ -0,0 +1,220 @@
+# matches/throttle.py
+"""
+Admission control for comment posting.
+
+Token buckets keyed by client IP and by match reject floods before
+post_comment touches the database, and a rolling set of recent comment
+fingerprints drops duplicate bodies. Both come in two flavours:
+
+- 'memory': per-process state, no dependencies, fine for a single worker
+- 'cache':  state kept in CACHES['default'], shared by every worker when
+            that cache is Redis/Memcached
+
+Pick one with settings.COMMENT_THROTTLE_BACKEND.
+
+The client IP is REMOTE_ADDR unless that is one of settings.TRUSTED_PROXIES,
+in which case X-Forwarded-For is read from the right and the first hop that
+is not a trusted proxy is used: anything further left was written by the
+client and could be anything.
+"""
+import hashlib
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _networks(proxies):
+    return [ipaddress.ip_network(proxy, strict=False) for proxy in proxies]
+
+
+def _parse_ip(value):
+    try:
+        return ipaddress.ip_address(value.strip())
+    except ValueError:
+        return None
+
+
+def client_ip(request):
+    """The address of whoever reached the first trusted proxy (see the module docstring)"""
+    remote = request.META.get('REMOTE_ADDR')
+    trusted = _networks(getattr(settings, 'TRUSTED_PROXIES', ()))
+    address = _parse_ip(remote or '')
+    if address is None or not any(address in network for network in trusted):
+        return remote
+    for hop in reversed(request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')):
+        hop_address = _parse_ip(hop)
+        if hop_address is None:
+            # Garbage from a client: the last proxy that passed it along is the best we know
+            break
+        address = hop_address
+        if not any(address in network for network in trusted):
+            break
+    return str(address)
+
+
+class MemoryTokenBuckets:
+    """Token buckets held in process memory, least recently used keys evicted first"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_per_second, now=None):
+        """Spend one token; returns 0 if allowed, else seconds until a token is available"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            if tokens >= 1:
+                retry_after = 0
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / refill_per_second
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+class CacheTokenBuckets:
+    """
+    Buckets stored in the Django cache so every worker shares them. Each key
+    may spend `capacity` tokens per window of capacity / refill_per_second
+    seconds, counted with cache.incr, which is atomic on Redis and
+    Memcached; a get/set of the bucket would let concurrent requests
+    overwrite each other's spend. Fixed windows allow up to twice the burst
+    across a window boundary, which is fine for flood control.
+    """
+
+    prefix = 'comment-throttle:bucket:'
+
+    def take(self, key, capacity, refill_per_second, now=None):
+        now = time.time() if now is None else now
+        window = capacity / refill_per_second
+        index = int(now // window)
+        cache_key = f'{self.prefix}{key}:{index}'
+        timeout = math.ceil(window) + 1
+        cache.add(cache_key, 0, timeout)
+        try:
+            spent = cache.incr(cache_key)
+        except ValueError:
+            # Expired between add and incr
+            cache.add(cache_key, 1, timeout)
+            spent = 1
+        if spent <= capacity:
+            return 0
+        return (index + 1) * window - now
+
+
+class MemoryRecentSet:
+    """Rolling set of fingerprints seen within the last `window` seconds, oldest evicted past max_size"""
+
+    def __init__(self, window, max_size=100000):
+        self.window = window
+        self.max_size = max_size
+        self._order = deque()
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def seen_recently(self, fingerprint, now=None):
+        """Record the fingerprint; returns True if it was already in the window"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self._order and (
+                self._order[0][0] <= now - self.window or len(self._seen) >= self.max_size
+            ):
+                expired_at, expired = self._order.popleft()
+                if self._seen.get(expired) == expired_at:
+                    del self._seen[expired]
+            if fingerprint in self._seen:
+                return True
+            self._seen[fingerprint] = now
+            self._order.append((now, fingerprint))
+            return False
+
+    def forget(self, fingerprint):
+        with self._lock:
+            self._seen.pop(fingerprint, None)
+
+    def __len__(self):
+        return len(self._seen)
+
+
+class CacheRecentSet:
+    """Recent fingerprints as cache keys expiring after `window` seconds"""
+
+    prefix = 'comment-throttle:seen:'
+
+    def __init__(self, window):
+        self.window = window
+
+    def seen_recently(self, fingerprint, now=None):
+        # cache.add is atomic on shared backends: only the first writer wins
+        return not cache.add(self.prefix + fingerprint, 1, self.window)
+
+    def forget(self, fingerprint):
+        cache.delete(self.prefix + fingerprint)
+
+
+class CommentThrottle:
+    def __init__(self, buckets, recent, ip_rate, match_rate):
+        self.buckets = buckets
+        self.recent = recent
+        self.ip_rate = ip_rate
+        self.match_rate = match_rate
+
+    def check(self, ip_address, match_id):
+        """Returns 0 if the post may proceed, else the Retry-After in seconds"""
+        for key, (burst, per_minute) in (
+            (f'ip:{ip_address}', self.ip_rate),
+            (f'match:{match_id}', self.match_rate),
+        ):
+            retry_after = self.buckets.take(key, burst, per_minute / 60.0)
+            if retry_after:
+                return retry_after
+        return 0
+
+    def is_duplicate(self, match_id, comment_text):
+        """
+        Claim this comment body for the match; True if it was already
+        claimed within the window. The claim is atomic, so of two
+        simultaneous double submits only one goes through; release() it if
+        the comment is not then stored, so a retry isn't taken for a duplicate.
+        """
+        return self.recent.seen_recently(fingerprint(match_id, comment_text))
+
+    def release(self, match_id, comment_text):
+        self.recent.forget(fingerprint(match_id, comment_text))
+
+
+def fingerprint(match_id, comment_text):
+    """Short hash of a comment body, ignoring case and whitespace differences"""
+    normalized = ' '.join(comment_text.lower().split())
+    return hashlib.blake2b(f'{match_id}\0{normalized}'.encode(), digest_size=12).hexdigest()
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def get_throttle():
+    """Return the process-wide throttle for the current settings"""
+    backend = getattr(settings, 'COMMENT_THROTTLE_BACKEND', 'memory')
+    ip_rate = tuple(getattr(settings, 'COMMENT_THROTTLE_IP_RATE', (5, 6)))
+    match_rate = tuple(getattr(settings, 'COMMENT_THROTTLE_MATCH_RATE', (100, 600)))
+    window = getattr(settings, 'COMMENT_DUPLICATE_WINDOW', 300)
+    config = (backend, ip_rate, match_rate, window)
+    with _throttles_lock:
+        if config not in _throttles:
+            if backend == 'cache':
+                buckets, recent = CacheTokenBuckets(), CacheRecentSet(window)
+            else:
+                buckets, recent = MemoryTokenBuckets(), MemoryRecentSet(window)
+            _throttles[config] = CommentThrottle(buckets, recent, ip_rate, match_rate)
+        return _throttles[config]
@@ -10,4 +10,5 @@ urlpatterns = [
     path('completed/', views.completed_matches, name='completed_matches'),
     # ✅ Fix here: remove 'matches/' prefix
     path('<int:match_id>/post_comment/', views.post_comment, name='post_comment'),
+    path('<int:match_id>/comments/', views.comment_page, name='comment_page'),
 ]
@@ -1,11 +1,20 @@
+import math
+
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
-from django.utils import timezone
 from django.db.models import Q
 from django.contrib import messages
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect
 from django.urls import reverse
-from .models import Match, Comment
+from culer.fts import rank_results
+from culer.pagination import KeysetPaginator, SequencePaginator
+from .models import Match, Comment, HeadToHead
+from . import search, write_behind
+from .popularity import match_views
+from .throttle import client_ip, get_throttle
+
+
+# Comments rendered per request on match_detail and by comment_page
+COMMENTS_PER_PAGE = 20
 
 
 def match_list(request):
@@ -17,19 +26,28 @@ def match_list(request):
     if competition_filter:
         matches = matches.filter(competition=competition_filter)
     
-    # Optional search functionality
+    # Optional "most discussed" ordering, served by the denormalized counter
+    sort = request.GET.get('sort')
+    
+    # Optional search functionality (ranked full-text index, icontains fallback)
     search_query = request.GET.get('search')
-    if search_query:
+    hits = search.search_matches(search_query, competition_filter) if search_query else None
+    if hits is not None:
+        matches = rank_results(matches, hits)
+    elif search_query:
         matches = matches.filter(
             Q(opponent__icontains=search_query) |
             Q(summary__icontains=search_query) |
             Q(competition__icontains=search_query)
         )
     
-    # Pagination
-    paginator = Paginator(matches, 10)  # Show 10 matches per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (ranked search hits are a bounded list, everything else uses keyset cursors)
+    if hits is not None:
+        paginator = SequencePaginator(matches, 10)
+    else:
+        ordering = ('-approved_comment_count', '-date', '-id') if sort == 'discussed' else ('-date', '-id')
+        paginator = KeysetPaginator(matches, 10, ordering=ordering)  # Show 10 matches per page
+    page_obj = paginator.get_page(request.GET.get('cursor'), params=request.GET)
     
     # Get all competitions for filter dropdown
     competitions = Match.COMPETITION_CHOICES
@@ -39,7 +57,8 @@ def match_list(request):
         'competitions': competitions,
         'current_competition': competition_filter,
         'search_query': search_query,
-        'total_matches': matches.count(),
+        'current_sort': sort,
+        'most_read': match_views.most_read(),
     }
     
     return render(request, 'matches/match_list.html', context)
@@ -51,61 +70,93 @@ def match_detail(request, match_id):
         Match.objects.select_related('posted_by'), 
         pk=match_id
     )
+    match_views.record(match.pk)  # buffered in memory, flushed in the background
     
-    # Get approved comments for this match
-    comments = Comment.objects.filter(
-        match=match,
-        is_approved=True
-    ).order_by('-created_at')
+    # First page of approved comments; later pages are fetched from comment_page
+    comments_page = _approved_comments_page(match)
+    comment_count = match.approved_comment_count
     
-    # Get related matches (same opponent, excluding current match)
+    # The poster's own comment may still be in the write-behind queue
+    pending_comment = write_behind.pending_comment(request, match)
+    
+    # Get related matches (same opponent, excluding current match) via the opponent_key index
     related_matches = Match.objects.filter(
-        opponent=match.opponent
+        opponent_key=match.opponent_key
     ).exclude(pk=match.pk).order_by('-date')[:3]
     
+    # Precomputed record against this opponent (one unique-key lookup)
+    head_to_head = HeadToHead.objects.filter(opponent_key=match.opponent_key).first()
+    
     context = {
         'match': match,
-        'comments': comments,
+        'comments_page': comments_page,
+        'comment_count': comment_count,
+        'pending_comment': pending_comment,
         'related_matches': related_matches,
+        'head_to_head': head_to_head,
     }
     
     return render(request, 'matches/match_detail.html', context)
 
 
+def _approved_comments_page(match, cursor=None):
+    """One cursor page of approved comments, newest first, served by the (match, -created_at) index"""
+    comments = Comment.objects.filter(match=match, is_approved=True)
+    paginator = KeysetPaginator(comments, COMMENTS_PER_PAGE, ordering=('-created_at', '-id'))
+    return paginator.get_page(cursor)
+
+
+def comment_page(request, match_id):
+    """Return the next page of comments as an HTML fragment for the \"load more\" button"""
+    match = get_object_or_404(Match.objects.only('id'), pk=match_id)
+    comments_page = _approved_comments_page(match, request.GET.get('cursor'))
+    
+    context = {
+        'match': match,
+        'comments_page': comments_page,
+    }
+    
+    return render(request, 'matches/comment_page.html', context)
+
+
 def post_comment(request, match_id):
     """Handle comment posting for a specific match"""
-    match = get_object_or_404(Match, pk=match_id)
-    
     if request.method == 'POST':
+        # Admission control first: floods are turned away before any database access
+        ip_address = client_ip(request)
+        throttle = get_throttle()
+        retry_after = throttle.check(ip_address, match_id)
+        if retry_after:
+            response = HttpResponse(
+                'Too many comments, please slow down.', status=429, content_type='text/plain'
+            )
+            response['Retry-After'] = str(math.ceil(retry_after))
+            return response
+        
         name = request.POST.get('name', '').strip()
         comment_text = request.POST.get('comment', '').strip()
         email = request.POST.get('email', '').strip()
         
         # Basic validation
+        error = None
         if not name or not comment_text:
-            messages.error(request, 'Please fill in both your name and comment.')
-            return render(request, 'matches/post_comment.html', {
-                'match': match,
-                'form_data': {
-                    'name': name,
-                    'comment': comment_text,
-                    'email': email
-                }
-            })
+            error = 'Please fill in both your name and comment.'
+        elif len(name) < 2:
+            error = 'Please enter a name with at least 2 characters.'
+        elif len(comment_text) < 10:
+            error = 'Please write a comment with at least 10 characters.'
         
-        if len(name) < 2:
-            messages.error(request, 'Please enter a name with at least 2 characters.')
-            return render(request, 'matches/post_comment.html', {
-                'match': match,
-                'form_data': {
-                    'name': name,
-                    'comment': comment_text,
-                    'email': email
-                }
-            })
+        detail_url = reverse('matches:match_detail', kwargs={'match_id': match_id})
+        match = get_object_or_404(Match, pk=match_id)
+        
+        # Drop repeated bodies (double submits, copy-paste spam); only for a
+        # real match, as nothing would release the claim after a 404
+        if not error and throttle.is_duplicate(match_id, comment_text):
+            messages.info(request, 'You have already posted this comment.')
+            return HttpResponseRedirect(detail_url)
         
-        if len(comment_text) < 10:
-            messages.error(request, 'Please write a comment with at least 10 characters.')
+        if error:
+            messages.error(request, error)
             return render(request, 'matches/post_comment.html', {
                 'match': match,
                 'form_data': {
@@ -115,16 +166,9 @@ def post_comment(request, match_id):
                 }
             })
         
-        # Get client IP address
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip_address = x_forwarded_for.split(',')[0]
-        else:
-            ip_address = request.META.get('REMOTE_ADDR')
-        
         # Create the comment
         try:
-            comment = Comment.objects.create(
+            comment = Comment(
                 match=match,
                 name=name,
                 comment=comment_text,
@@ -133,10 +177,21 @@ def post_comment(request, match_id):
                 is_approved=True  # Auto-approve for now, change to False if you want moderation
             )
             
+            if write_behind.is_enabled():
+                # Queue for a batched insert; the poster sees it via a pending cookie
+                write_behind.comment_queue.enqueue(comment)
+                messages.success(request, 'Your comment has been posted successfully!')
+                response = HttpResponseRedirect(detail_url + '#comment-pending')
+                write_behind.remember_pending(response, comment)
+                return response
+            
+            comment.save()
             messages.success(request, 'Your comment has been posted successfully!')
-            return HttpResponseRedirect(reverse('matches:match_detail', kwargs={'match_id': match.pk}) + f'#comment-{comment.pk}')
+            return HttpResponseRedirect(detail_url + f'#comment-{comment.pk}')
             
         except Exception as e:
+            # Not stored, so posting it again is a retry rather than a duplicate
+            throttle.release(match_id, comment_text)
             messages.error(request, 'There was an error posting your comment. Please try again.')
             return render(request, 'matches/post_comment.html', {
                 'match': match,
@@ -148,6 +203,7 @@ def post_comment(request, match_id):
             })
     
     # GET request - show the comment form
+    match = get_object_or_404(Match, pk=match_id)
     context = {
         'match': match,
     }
@@ -156,9 +212,9 @@ def post_comment(request, match_id):
 
 
 def upcoming_matches(request):
-    """Display upcoming matches (no result or future dates)"""
+    """Display upcoming matches (future kickoff, or kicked off and awaiting a result)"""
     upcoming = Match.objects.select_related('posted_by').filter(
-        Q(result__isnull=True) | Q(result__exact='') | Q(date__gt=timezone.now())
+        status__in=['UPCOMING', 'LIVE']
     ).order_by('date')
     
     # Optional filtering by competition
@@ -167,9 +223,8 @@ def upcoming_matches(request):
         upcoming = upcoming.filter(competition=competition_filter)
     
     # Pagination
-    paginator = Paginator(upcoming, 8)  # Show 8 upcoming matches per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(upcoming, 8, ordering=('date', 'id'))  # Show 8 upcoming matches per page
+    page_obj = paginator.get_page(request.GET.get('cursor'), params=request.GET)
     
     # Get all competitions for filter dropdown
     competitions = Match.COMPETITION_CHOICES
@@ -178,7 +233,6 @@ def upcoming_matches(request):
         'page_obj': page_obj,
         'competitions': competitions,
         'current_competition': competition_filter,
-        'total_upcoming': upcoming.count(),
     }
     
     return render(request, 'matches/upcoming_matches.html', context)
@@ -187,9 +241,8 @@ def upcoming_matches(request):
 def completed_matches(request):
     """Display completed matches with results"""
     completed = Match.objects.select_related('posted_by').filter(
-        result__isnull=False,
-        date__lte=timezone.now()
-    ).exclude(result__exact='').order_by('-date')
+        status='COMPLETED'
+    ).order_by('-date')
     
     # Optional filtering by competition
     competition_filter = request.GET.get('competition')
@@ -197,9 +250,8 @@ def completed_matches(request):
         completed = completed.filter(competition=competition_filter)
     
     # Pagination
-    paginator = Paginator(completed, 10)  # Show 10 completed matches per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(completed, 10, ordering=('-date', '-id'))  # Show 10 completed matches per page
+    page_obj = paginator.get_page(request.GET.get('cursor'), params=request.GET)
     
     # Get all competitions for filter dropdown
     competitions = Match.COMPETITION_CHOICES
@@ -208,7 +260,6 @@ def completed_matches(request):
         'page_obj': page_obj,
         'competitions': competitions,
         'current_competition': competition_filter,
-        'total_completed': completed.count(),
     }
     
     return render(request, 'matches/completed_matches.html', context)
\ No newline at end of file
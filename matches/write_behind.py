@@ -0,0 +1,263 @@
+# matches/write_behind.py
+"""
+Optional write-behind queue for match comments.
+
+With settings.COMMENT_WRITE_BEHIND enabled, post_comment validates the
+comment and hands it to an in-process queue instead of inserting it. A
+flusher thread drains the queue and writes comments with bulk_create in
+small batches, so a burst of posters during a live match takes the SQLite
+write lock a handful of times instead of once per request.
+
+Queued comments live in memory until flushed (at most
+COMMENT_WRITE_BEHIND_INTERVAL seconds); anything still queued is flushed
+at interpreter exit. A batch that fails to insert is retried with
+exponential backoff (COMMENT_WRITE_BEHIND_RETRIES attempts); if it still
+fails it is appended to COMMENT_WRITE_BEHIND_SPILL_FILE, one JSON line per
+comment, and the replay_spilled_comments command inserts it later. The
+poster was already told the comment was posted, so it is never dropped.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters
+from .models import Comment
+
+
+logger = logging.getLogger(__name__)
+
+PENDING_COOKIE = 'pending_comment'
+PENDING_COOKIE_SALT = 'matches.pending_comment'
+PENDING_COOKIE_MAX_AGE = 120
+PENDING_CACHE_PREFIX = 'pending-comment:'
+
+
+def is_enabled():
+    return getattr(settings, 'COMMENT_WRITE_BEHIND', False)
+
+
+class CommentWriteBehind:
+    """In-process queue plus a daemon thread that bulk inserts comments"""
+
+    # Comment fields written to the spill file (everything post_comment sets)
+    SPILLED_FIELDS = ('match_id', 'name', 'comment', 'email', 'ip_address', 'is_approved')
+
+    def __init__(self, batch_size=50, flush_interval=0.5, retries=5, retry_delay=0.5, spill_file=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.spill_file = spill_file
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+
+    def enqueue(self, comment):
+        """Queue an unsaved, already validated comment for insertion"""
+        self._ensure_started()
+        self._queue.put(comment)
+
+    def drain(self):
+        """Block until every queued comment has been written (or spilled)"""
+        self._queue.join()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='comment-write-behind', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            for attempt in range(1, self.retries + 1):
+                close_old_connections()
+                try:
+                    self.write(batch)
+                    return
+                except Exception:
+                    logger.exception(
+                        'Failed to write %d queued comments (attempt %d of %d)', len(batch), attempt, self.retries
+                    )
+                    # Rolled back: forget any ids bulk_create assigned before the failure
+                    for comment in batch:
+                        comment.pk = None
+                        comment._state.adding = True
+                    if attempt < self.retries:
+                        time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            self.spill(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def write(self, batch):
+        """Insert a batch of comments in one transaction, keeping derived data in step"""
+        for comment in batch:
+            comment.render_html()
+        with transaction.atomic():
+            Comment.objects.bulk_create(batch)
+            # bulk_create skips post_save, so apply the counter updates here
+            counters.comments_created(batch)
+
+    def flush_remaining(self):
+        """Synchronously write whatever is still queued (used at exit)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._flush(batch)
+
+    def spill(self, batch):
+        """Append comments that could not be written to the spill file, durably"""
+        if not self.spill_file:
+            logger.error('Dropping %d comments that could not be written (no spill file)', len(batch))
+            return
+        queued_at = timezone.now().isoformat()
+        self._append([
+            json.dumps({**{name: getattr(comment, name) for name in self.SPILLED_FIELDS}, 'queued_at': queued_at})
+            for comment in batch
+        ])
+        logger.error(
+            'Spilled %d comments to %s; insert them with the replay_spilled_comments command',
+            len(batch), self.spill_file,
+        )
+
+    def _append(self, lines):
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spill_file)), exist_ok=True)
+            # One O_APPEND write, so lines from several processes never interleave
+            descriptor = os.open(self.spill_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(descriptor, ''.join(line + '\n' for line in lines).encode())
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+
+    def replay_spilled(self):
+        """
+        Insert the comments in the spill file and remove it; returns how many
+        were written. The file is renamed first, so comments spilled meanwhile
+        go to a fresh file; if an insert fails, the comments not yet written
+        are appended back and the error is raised.
+        """
+        if not self.spill_file or not os.path.exists(self.spill_file):
+            return 0
+        replaying = f'{self.spill_file}.{os.getpid()}.replaying'
+        os.replace(self.spill_file, replaying)
+        with open(replaying) as spilled:
+            lines = [line.strip() for line in spilled if line.strip()]
+        written = 0
+        try:
+            while written < len(lines):
+                batch = []
+                for line in lines[written:written + self.batch_size]:
+                    record = json.loads(line)
+                    record.pop('queued_at', None)
+                    batch.append(Comment(**record))
+                self.write(batch)
+                written += len(batch)
+        except Exception:
+            self._append(lines[written:])
+            raise
+        finally:
+            os.unlink(replaying)
+        return written
+
+
+comment_queue = CommentWriteBehind(
+    batch_size=getattr(settings, 'COMMENT_WRITE_BEHIND_BATCH_SIZE', 50),
+    flush_interval=getattr(settings, 'COMMENT_WRITE_BEHIND_INTERVAL', 0.5),
+    retries=getattr(settings, 'COMMENT_WRITE_BEHIND_RETRIES', 5),
+    spill_file=getattr(settings, 'COMMENT_WRITE_BEHIND_SPILL_FILE', None),
+)
+atexit.register(comment_queue.flush_remaining)
+
+
+def _pending_key(token):
+    return f'{PENDING_CACHE_PREFIX}{token}'
+
+
+def remember_pending(response, comment):
+    """
+    Give the poster read-your-own-write until the flusher has run: the
+    comment's name and body are kept in the (shared) cache, and a
+    short-lived signed cookie carries only the key, the match and the
+    time it was queued, so a long comment can't outgrow the cookie.
+    """
+    token = uuid.uuid4().hex
+    cache.set(
+        _pending_key(token), {'n': comment.name, 'c': comment.comment}, PENDING_COOKIE_MAX_AGE
+    )
+    response.set_signed_cookie(
+        PENDING_COOKIE,
+        json.dumps({'k': token, 'm': comment.match_id, 't': timezone.now().isoformat()}),
+        salt=PENDING_COOKIE_SALT,
+        max_age=PENDING_COOKIE_MAX_AGE,
+        httponly=True,
+        samesite='Lax',
+    )
+
+
+def pending_comment(request, match):
+    """
+    Return the requester's own not-yet-written comment for this match as an
+    unsaved Comment, or None once it has been inserted (looked up among the
+    match's comments created since it was queued, on the (match, -created_at)
+    index, so it is found on any comment page).
+    """
+    value = request.get_signed_cookie(
+        PENDING_COOKIE, default=None, salt=PENDING_COOKIE_SALT, max_age=PENDING_COOKIE_MAX_AGE
+    )
+    if not value:
+        return None
+    try:
+        data = json.loads(value)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or data.get('m') != match.pk:
+        return None
+    queued_at = parse_datetime(str(data.get('t', '')))
+    pending = cache.get(_pending_key(data.get('k', '')))
+    if queued_at is None or not isinstance(pending, dict):
+        return None
+    name, text = pending.get('n', ''), pending.get('c', '')
+    written = Comment.objects.filter(
+        match=match, created_at__gte=queued_at, name=name, comment=text
+    ).exists()
+    if written:
+        return None
+    comment = Comment(match=match, name=name, comment=text)
+    comment.render_html()
+    return comment
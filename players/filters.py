@@ -0,0 +1,68 @@
+# players/filters.py
+"""
+Public filters for the player list: position, nationality and an age
+range. Filtering runs over the in-process squad snapshot (players.squad),
+so PlayerFilters works on Player instances and grouped rows rather than
+querysets.
+"""
+from urllib.parse import urlencode
+
+from .models import Player
+
+
+# GET parameters understood by PlayerFilters, in the order they appear in links
+FILTER_PARAMS = ('position', 'nationality', 'age_min', 'age_max')
+
+
+def _age(value):
+    try:
+        age = int(value)
+    except (TypeError, ValueError):
+        return None
+    return age if age >= 0 else None
+
+
+class PlayerFilters:
+    """The active player list filters, cleaned; invalid values are ignored"""
+
+    def __init__(self, params):
+        positions = dict(Player.POSITION_CHOICES)
+        position = params.get('position')
+        self.position = position if position in positions else None
+        self.nationality = (params.get('nationality') or '').strip() or None
+        self.age_min = _age(params.get('age_min'))
+        self.age_max = _age(params.get('age_max'))
+
+    def as_dict(self):
+        values = {
+            'position': self.position,
+            'nationality': self.nationality,
+            'age_min': self.age_min,
+            'age_max': self.age_max,
+        }
+        return {name: value for name, value in values.items() if value is not None}
+
+    def matches(self, position, nationality, age, ignore=None):
+        """Whether a player (or a grouped row) passes the filters, optionally ignoring one facet"""
+        return (
+            (ignore == 'position' or not self.position or position == self.position) and
+            (ignore == 'nationality' or not self.nationality or nationality == self.nationality) and
+            (self.age_min is None or age >= self.age_min) and
+            (self.age_max is None or age <= self.age_max)
+        )
+
+    def apply(self, players):
+        return [
+            player for player in players
+            if self.matches(player.position, player.nationality, player.age)
+        ]
+
+    def url_with(self, **changes):
+        """Query string for these filters with some changed (None removes one)"""
+        params = self.as_dict()
+        for name, value in changes.items():
+            if value is None:
+                params.pop(name, None)
+            else:
+                params[name] = value
+        return '?' + urlencode([(name, params[name]) for name in FILTER_PARAMS if name in params])
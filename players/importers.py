@@ -0,0 +1,17 @@
+# players/importers.py
+from culer.importing import Importer
+
+from . import squad
+from .models import Player
+
+
+class PlayerImporter(Importer):
+    """Upsert squad players keyed by name; squad snapshots reload once at the end"""
+
+    model = Player
+    fields = ('name', 'position', 'age', 'nationality', 'bio', 'profile_image')
+    required = ('name', 'position', 'age', 'nationality')
+    natural_key = ('name',)
+
+    def finish(self):
+        squad.invalidate()
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0002_alter_player_age_alter_player_bio_alter_player_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['name'], name='players_pla_name_f5b1bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['position', 'name'], name='players_pla_positio_da4bef_idx'),
+        ),
+    ]
@@ -23,6 +23,12 @@ class Player(models.Model):
         ordering = ['name']
         verbose_name = 'Player'
         verbose_name_plural = 'Players'
+        indexes = [
+            models.Index(fields=['name']),
+            models.Index(fields=['position', 'name']),
+            # Covers the grouped facet counts loaded with the squad snapshot
+            models.Index(fields=['position', 'nationality', 'age']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.get_position_display()}"
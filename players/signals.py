@@ -0,0 +1,18 @@
+# players/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import squad
+from .models import Player
+
+
+@receiver(post_save, sender=Player)
+def refresh_squad_on_save(sender, instance, **kwargs):
+    """Squad snapshots reload after a player is created or edited"""
+    squad.invalidate()
+
+
+@receiver(post_delete, sender=Player)
+def refresh_squad_on_delete(sender, instance, **kwargs):
+    """Drop the deleted player from the squad snapshots"""
+    squad.invalidate()
@@ -0,0 +1,76 @@
+# players/squad.py
+"""
+In-process snapshot of the squad for the public player list.
+
+The squad is a few dozen rows, so each process keeps every Player plus
+the facet counts in memory and filters them in Python. A snapshot is
+loaded with two queries: the players in name order, and one grouped
+aggregate over (position, nationality, age) served by the covering index
+of the same name. Player signals bump a generation token kept in the
+default cache, and a process reloads on its next request once the token
+changes; until then a filter change costs a cache lookup, not a database
+round trip. With more than one worker process, CACHES['default'] must be
+shared between them (e.g. Redis) for saves to reach every snapshot.
+"""
+from collections import Counter
+
+from django.db.models import Count
+
+from culer.caching import CacheGeneration
+from .models import Player
+
+
+generation = CacheGeneration('squad:generation')
+
+# (generation token, players, grouped counts) for this process
+_snapshot = None
+
+
+def invalidate():
+    """Make snapshots reload the squad (called from the Player signals)"""
+    generation.bump()
+
+
+def load():
+    """Read the squad and its grouped counts from the database"""
+    players = tuple(Player.objects.all())
+    rows = tuple(
+        (row['position'], row['nationality'], row['age'], row['count'])
+        for row in Player.objects.order_by().values('position', 'nationality', 'age').annotate(
+            count=Count('id')
+        )
+    )
+    return players, rows
+
+
+def snapshot():
+    """(players, grouped counts), reloaded only when the generation changed"""
+    global _snapshot
+    token = generation.token()
+    current = _snapshot
+    if current is None or current[0] != token:
+        current = (token, *load())
+        # A single assignment, so concurrent requests see one snapshot or the other
+        _snapshot = current
+    return current[1], current[2]
+
+
+def facet_counts(rows, filters):
+    """
+    Fold the grouped rows into per-position and per-nationality counts.
+    Each facet ignores its own filter; the age range narrows both.
+    """
+    total = 0
+    positions, nationalities = Counter(), Counter()
+    for position, nationality, age, count in rows:
+        if filters.matches(position, nationality, age):
+            total += count
+        if filters.matches(position, nationality, age, ignore='position'):
+            positions[position] += count
+        if filters.matches(position, nationality, age, ignore='nationality'):
+            nationalities[nationality] += count
+    return {
+        'total': total,
+        'positions': dict(positions),
+        'nationalities': sorted(nationalities.items(), key=lambda item: (-item[1], item[0])),
+    }
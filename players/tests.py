@@ -1,3 +1,95 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from culer.query_plans import QueryPlanTestCase
+from . import squad, views
+from .filters import PlayerFilters
+from .models import Player
+
+
+class PlayerQueryPlanTests(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.player = Player.objects.create(
+            name='Pedri', position='MID', age=22, nationality='Spain', bio='...',
+        )
+
+    def test_squad_snapshot(self):
+        self.assertIndexedQueries(squad.load)
+
+    def test_player_list_uses_snapshot(self):
+        self.run_view(views.player_list)
+        with self.assertNumQueries(0):
+            self.run_view(views.player_list, {'position': 'MID', 'age_min': '20'})
+
+    def test_player_detail(self):
+        self.assertIndexedPlans(views.player_detail, player_id=self.player.pk)
+
+
+class PlayerFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name, position, age, nationality in (
+            ('Pedri', 'MID', 22, 'Spain'),
+            ('Gavi', 'MID', 20, 'Spain'),
+            ('Frenkie de Jong', 'MID', 28, 'Netherlands'),
+            ('Lamine Yamal', 'FWD', 18, 'Spain'),
+            ('Raphinha', 'FWD', 28, 'Brazil'),
+            ('Ronald Araújo', 'DEF', 26, 'Uruguay'),
+            ('Marc-André ter Stegen', 'GK', 33, 'Germany'),
+        ):
+            Player.objects.create(name=name, position=position, age=age, nationality=nationality, bio='...')
+
+    def setUp(self):
+        cache.clear()
+
+    def listing(self, **params):
+        return self.client.get('/players/', params).context
+
+    def names(self, **params):
+        return [player.name for player in self.listing(**params)['players']]
+
+    def test_filters_narrow_the_list(self):
+        self.assertEqual(self.names(position='MID'), ['Frenkie de Jong', 'Gavi', 'Pedri'])
+        self.assertEqual(self.names(nationality='Spain', age_max='20'), ['Gavi', 'Lamine Yamal'])
+        self.assertEqual(self.names(age_min='28', age_max='30'), ['Frenkie de Jong', 'Raphinha'])
+        # Unknown positions and malformed ages are ignored
+        self.assertEqual(len(self.names(position='STRIKER', age_min='old', age_max='-1')), 7)
+
+    def test_facet_counts_match_the_list(self):
+        for params in ({}, {'position': 'MID'}, {'nationality': 'Spain'},
+                       {'position': 'FWD', 'age_max': '25'}, {'age_min': '27'}):
+            context = self.listing(**params)
+            self.assertEqual(context['total_count'], context['page_obj'].paginator.count, params)
+            players = Player.objects.all()
+            by_position = PlayerFilters({**params, 'position': None}).apply(players)
+            for position, count in context['facets']['positions'].items():
+                self.assertEqual(count, sum(p.position == position for p in by_position), params)
+            by_nationality = PlayerFilters({**params, 'nationality': None}).apply(players)
+            for nationality, count in context['facets']['nationalities']:
+                self.assertEqual(count, sum(p.nationality == nationality for p in by_nationality), params)
+
+    def test_facets_ignore_their_own_filter(self):
+        facets = self.listing(position='MID', nationality='Spain')['facets']
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['positions'], {'MID': 2, 'FWD': 1})
+        self.assertEqual(facets['nationalities'], [('Spain', 2), ('Netherlands', 1)])
+
+    def test_saving_a_player_reloads_the_snapshot(self):
+        self.listing()
+        players, _ = squad.snapshot()
+        with self.assertNumQueries(0):
+            self.assertIs(squad.snapshot()[0], players)
+
+        Player.objects.create(name='Dani Olmo', position='MID', age=27, nationality='Spain', bio='...')
+        self.assertIn('Dani Olmo', self.names(position='MID'))
+        self.assertEqual(self.listing(position='MID')['facets']['nationalities'], [('Spain', 3), ('Netherlands', 1)])
+
+        gavi = Player.objects.get(name='Gavi')
+        gavi.position = 'FWD'
+        gavi.save()
+        self.assertEqual(self.listing()['facets']['positions']['FWD'], 3)
+        gavi.delete()
+        self.assertNotIn('Gavi', self.names())
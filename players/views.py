@@ -1,19 +1,60 @@
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
+from .filters import PlayerFilters
 from .models import Player
+from .squad import facet_counts, snapshot
+
+
+def _facet_links(facets, filters):
+    """Facet counts as template-ready links that toggle one filter each"""
+    def link(name, value, label, count, active):
+        return {
+            'value': value,
+            'label': label,
+            'count': count,
+            'active': active,
+            'url': filters.url_with(**{name: None if active else value}),
+        }
+
+    return {
+        'positions': [
+            link('position', value, label, facets['positions'].get(value, 0), filters.position == value)
+            for value, label in Player.POSITION_CHOICES
+        ],
+        'nationalities': [
+            link('nationality', nationality, nationality, count, filters.nationality == nationality)
+            for nationality, count in facets['nationalities']
+        ],
+    }
+
 
 def player_list(request):
-    """Display all players with pagination"""
-    players = Player.objects.all()
-    
+    """
+    Display the squad filtered by position, nationality and age range
+    (age_min/age_max), with facet counts. Served from the in-process squad
+    snapshot, so changing filters doesn't query the database.
+    """
+    filters = PlayerFilters(request.GET)
+    players, rows = snapshot()
+
     # Add pagination
-    paginator = Paginator(players, 12)  # Show 12 players per page
+    paginator = Paginator(filters.apply(players), 12)  # Show 12 players per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    
+
+    facets = facet_counts(rows, filters)
+    # Page links keep the active filters
+    filter_query = filters.url_with()[1:]
+
     context = {
         'players': page_obj,
         'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
+        'filters': filters,
+        'facets': facets,
+        'facet_links': _facet_links(facets, filters),
+        'page_query': f'{filter_query}&' if filter_query else '',
+        'total_count': facets['total'],
     }
     return render(request, 'players/player_list.html', context)
 
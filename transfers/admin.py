@@ -1,10 +1,12 @@
 # transfers/admin.py
 from django.contrib import admin
+
+from culer.bulk import BatchedChangelistMixin
 from .models import Transfer
 
 
 @admin.register(Transfer)
-class TransferAdmin(admin.ModelAdmin):
+class TransferAdmin(BatchedChangelistMixin, admin.ModelAdmin):
     """Admin configuration for Transfer model"""
     
     # List display configuration
@@ -15,6 +17,8 @@ class TransferAdmin(admin.ModelAdmin):
         'transfer_type', 
         'transfer_date', 
         'fee', 
+        'fee_eur',
+        'fee_kind',
         'posted_by',
         'created_at'
     ]
@@ -22,6 +26,7 @@ class TransferAdmin(admin.ModelAdmin):
     # Filters in the right sidebar
     list_filter = [
         'transfer_type',
+        'fee_kind',
         'transfer_date',
         'to_club',
         'created_at',
@@ -51,6 +56,7 @@ class TransferAdmin(admin.ModelAdmin):
     # Additional configurations
     list_per_page = 25
     date_hierarchy = 'transfer_date'
+    # Changelist edits are written with one bulk_update (BatchedChangelistMixin)
     list_editable = ['transfer_type', 'fee']
     
     def save_model(self, request, obj, form, change):
@@ -7,5 +7,8 @@ class TransfersConfig(AppConfig):
     name = 'transfers'
     verbose_name = 'Transfer Management'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
 
 # Template Structure and Files Needed:
\ No newline at end of file
@@ -0,0 +1,111 @@
+# transfers/facets.py
+"""
+Faceted counts for transfer listings.
+
+One grouped query over (transfer_type, to_club, year) - narrowed only by
+the non-facet filters - is folded in Python into per-type, per-club and
+per-year counts. Each facet ignores its own filter, so a listing of
+rumors still learns how many confirmed and history entries there are,
+without a COUNT(*) per facet. The same query sums fees per group, so the
+spend totals for the listing come out of it too; only completed moves
+(timelines.MOVE_TYPES) count towards them, never rumored fees. The
+grouped rows are cached per filter set under a generation token that the Transfer signals
+replace on every save and delete.
+"""
+import hashlib
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractYear
+
+from culer.caching import CacheGeneration
+from .fees import CLUB_NAME
+from .timelines import MOVE_TYPES
+
+
+CACHE_PREFIX = 'transfer-facets:'
+generation = CacheGeneration('transfer-facets:generation')
+
+# Clubs shown in the club facet, busiest first
+CLUB_FACET_LIMIT = 10
+
+
+def invalidate():
+    """Drop every cached facet set (called from the Transfer signals)"""
+    generation.bump()
+
+
+def grouped_counts(queryset):
+    """
+    [(transfer_type, to_club, year, count, fees, fees_from_club, priced), ...]
+    from one GROUP BY query. fees_from_club only sums fees paid by other
+    clubs for players leaving ours.
+    """
+    rows = queryset.order_by().values(
+        'transfer_type', 'to_club', year=ExtractYear('transfer_date')
+    ).annotate(
+        count=Count('id'),
+        fees=Sum('fee_eur'),
+        fees_from_club=Sum('fee_eur', filter=Q(from_club__icontains=CLUB_NAME)),
+        priced=Count('fee_eur'),
+    )
+    return [
+        (row['transfer_type'], row['to_club'], row['year'], row['count'],
+         row['fees'] or Decimal('0'), row['fees_from_club'] or Decimal('0'), row['priced'])
+        for row in rows
+    ]
+
+
+def fold(rows, filters):
+    """Turn grouped rows into facet counts for the active filters"""
+    total = priced = 0
+    spent = received = Decimal('0')
+    types, clubs, years = Counter(), Counter(), Counter()
+    for transfer_type, to_club, year, count, fees, fees_from_club, priced_count in rows:
+        if filters.matches_facets(transfer_type, to_club, year):
+            total += count
+            if transfer_type in MOVE_TYPES:
+                priced += priced_count
+                # Same rule as the SQL icontains: money in when the club is the buyer
+                if CLUB_NAME in to_club.casefold():
+                    spent += fees
+                else:
+                    received += fees_from_club
+        if filters.matches_facets(transfer_type, to_club, year, ignore='type'):
+            types[transfer_type] += count
+        if filters.matches_facets(transfer_type, to_club, year, ignore='club'):
+            clubs[to_club] += count
+        if year is not None and filters.matches_facets(transfer_type, to_club, year, ignore='year'):
+            years[year] += count
+    return {
+        'total': total,
+        'types': dict(types),
+        'any_type': sum(types.values()),
+        'clubs': clubs.most_common(CLUB_FACET_LIMIT),
+        'years': sorted(years.items(), reverse=True),
+        'spend': {
+            'spent': spent,
+            'received': received,
+            'net': spent - received,
+            'priced': priced,
+        },
+    }
+
+
+def transfer_facets(queryset, filters):
+    """
+    Facet counts for `filters` over `queryset` (which must not have the
+    filters applied yet). The grouped rows only depend on the non-facet
+    filters, so they are cached under those.
+    """
+    # Hashed because the search text may contain characters cache keys can't
+    digest = hashlib.md5(filters.base_key().encode()).hexdigest()
+    key = f'{CACHE_PREFIX}{generation.token()}:{digest}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = grouped_counts(filters.apply_base(queryset))
+        cache.set(key, rows, getattr(settings, 'TRANSFER_FACET_CACHE_TIMEOUT', 600))
+    return fold(rows, filters)
@@ -0,0 +1,124 @@
+# transfers/fees.py
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+
+FEE = 'FEE'
+FREE = 'FREE'
+LOAN = 'LOAN'
+UNDISCLOSED = 'UNDISCLOSED'
+
+FEE_KIND_CHOICES = [
+    (FEE, 'Fee'),
+    (FREE, 'Free transfer'),
+    (LOAN, 'Loan'),
+    (UNDISCLOSED, 'Undisclosed'),
+]
+
+# Club whose incoming/outgoing fees count as spend/income
+CLUB_NAME = 'barcelona'
+
+_MULTIPLIERS = {
+    'k': Decimal('1e3'),
+    'thousand': Decimal('1e3'),
+    'm': Decimal('1e6'),
+    'mil': Decimal('1e6'),
+    'mn': Decimal('1e6'),
+    'million': Decimal('1e6'),
+    'b': Decimal('1e9'),
+    'bn': Decimal('1e9'),
+    'billion': Decimal('1e9'),
+}
+
+_NUMBER = r'\d{1,3}(?:[., \u00a0\u202f]\d{3})+(?!\d)|\d+(?:[.,]\d+)?'
+_UNIT = r'thousand|million|billion|mil|mn|bn|k|m|b'
+_CURRENCY = r'€|eur|euros?|£|\$|gbp|usd'
+
+# '€50M', '50m euros', 'EUR 1.5 million', '€120,000,000', '€1.000.000',
+# '€70-80M', '€70M to €80M', '€60M + €10M add-ons' (first amount wins)
+_AMOUNT_RE = re.compile(
+    rf'(?P<currency>{_CURRENCY})?\s*'
+    rf'(?P<number>{_NUMBER})\s*(?:(?P<low_unit>{_UNIT})\b\s*)?'
+    rf'(?:(?:-|–|—|to)\s*(?:{_CURRENCY})?\s*(?P<high>{_NUMBER})\s*)?'
+    rf'(?P<unit>{_UNIT})?\b',
+    re.IGNORECASE,
+)
+_GROUPED_RE = re.compile(r'\d{1,3}([., \u00a0\u202f])\d{3}(?:\1\d{3})*')
+_FREE_RE = re.compile(r'\bfree\b|\bbosman\b|end of contract', re.IGNORECASE)
+_LOAN_RE = re.compile(r'\bloan', re.IGNORECASE)
+
+
+def _to_decimal(number, unit=''):
+    # '120,000,000', '1.000.000', '1 000 000' and '1.5' all occur. Repeated
+    # three-digit groups are thousands; so is a single ',ddd' or ' ddd'
+    # group, and a single '.ddd' unless a unit follows ('€1.500M' is 1.5M)
+    grouped = _GROUPED_RE.fullmatch(number)
+    if grouped and (number.count(grouped.group(1)) > 1 or grouped.group(1) != '.' or not unit):
+        number = number.replace(grouped.group(1), '')
+    else:
+        number = number.replace(',', '.')
+    try:
+        return Decimal(number)
+    except InvalidOperation:
+        return None
+
+
+def _amount(number, unit):
+    value = _to_decimal(number, unit)
+    if value is None:
+        return None
+    return value * _MULTIPLIERS.get(unit, 1)
+
+
+@lru_cache(maxsize=4096)
+def parse_fee(fee):
+    """
+    Parse a free-text fee such as '€50M', 'Free transfer', 'Loan' or
+    '€2M loan fee' into (fee_kind, fee_eur). A range such as '€70-80M'
+    (the unit applies to both ends) is stored as its midpoint, €75M.
+    fee_eur is None when no euro amount can be read; amounts in other
+    currencies are not converted.
+    Cached because the same handful of strings repeat across the table.
+    """
+    text = (fee or '').strip()
+    if not text:
+        return UNDISCLOSED, None
+
+    amount = None
+    match = _AMOUNT_RE.search(text)
+    if match:
+        currency = (match.group('currency') or '').lower()
+        unit = (match.group('unit') or '').lower()
+        low_unit = (match.group('low_unit') or unit).lower()
+        high_unit = unit or low_unit
+        value = _amount(match.group('number'), low_unit)
+        if value is not None and match.group('high'):
+            high = _amount(match.group('high'), high_unit)
+            if high is not None and high >= value:
+                value = (value + high) / 2
+        # A bare number ('Swap deal 2024') is not an amount
+        if value is not None and (currency or low_unit) and currency not in ('£', '$', 'gbp', 'usd'):
+            amount = value.quantize(Decimal('1'))
+
+    if _LOAN_RE.search(text):
+        return LOAN, amount
+    if _FREE_RE.search(text):
+        return FREE, Decimal('0')
+    if amount is not None or (match and match.group('currency')):
+        return FEE, amount
+    return UNDISCLOSED, None
+
+
+def format_eur(amount):
+    """Short display form: 60000000 -> '€60M', 1500000 -> '€1.5M', 800000 -> '€800K'"""
+    if amount is None:
+        return ''
+    amount = Decimal(amount)
+    sign = '-' if amount < 0 else ''
+    amount = abs(amount)
+    for divisor, suffix in ((Decimal('1e9'), 'B'), (Decimal('1e6'), 'M'), (Decimal('1e3'), 'K')):
+        if amount >= divisor:
+            value = (amount / divisor).quantize(Decimal('0.1')).normalize()
+            return f'{sign}€{value:f}{suffix}'
+    return f'{sign}€{amount.quantize(Decimal("1")):f}'
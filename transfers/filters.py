@@ -0,0 +1,134 @@
+# transfers/filters.py
+"""
+One filter engine for every transfer listing.
+
+TransferFilters reads the combinable GET filters (type, destination club,
+year, search and the fee range) once, applies them to a queryset, and
+knows how to build links that change a single filter while keeping the
+others.
+transfer_list, latest_transfers and transfer_rumors differ only in the
+filters they pin (e.g. type=CONFIRMED).
+"""
+import datetime
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlencode
+
+from django.db.models import Q
+
+
+TRANSFER_TYPES = ('RUMOR', 'CONFIRMED', 'HISTORY')
+
+# GET parameters understood by the engine, in the order they appear in links
+FILTER_PARAMS = ('type', 'club', 'year', 'search', 'fee_min', 'fee_max', 'sort')
+
+SORT_OPTIONS = ('fee',)
+
+
+def _fee_bound(value):
+    """Read a fee filter given in millions of euros ('20', '7.5'); None if blank or invalid"""
+    try:
+        amount = Decimal(value) * Decimal('1e6')
+    except (InvalidOperation, TypeError):
+        return None
+    return amount if amount.is_finite() and amount >= 0 else None
+
+
+def _year(value):
+    try:
+        year = int(value)
+    except (TypeError, ValueError):
+        return None
+    return year if datetime.MINYEAR <= year < datetime.MAXYEAR else None
+
+
+class TransferFilters:
+    """The active listing filters, cleaned; invalid values are ignored"""
+
+    def __init__(self, params, pinned=None):
+        pinned = pinned or {}
+        self.pinned = set(pinned)
+        raw = {name: params.get(name) for name in FILTER_PARAMS}
+        raw.update(pinned)
+
+        self.type = raw['type'] if raw['type'] in TRANSFER_TYPES else None
+        self.club = (raw['club'] or '').strip() or None
+        self.year = _year(raw['year'])
+        self.search = (raw['search'] or '').strip() or None
+        self.fee_min = _fee_bound(raw['fee_min'])
+        self.fee_max = _fee_bound(raw['fee_max'])
+        # Not a filter, but carried along so facet links keep the chosen order
+        self.sort = raw['sort'] if raw['sort'] in SORT_OPTIONS else None
+        # Keep the user's spelling of the fee bounds for links and form values
+        self._raw_fees = {
+            'fee_min': raw['fee_min'] if self.fee_min is not None else None,
+            'fee_max': raw['fee_max'] if self.fee_max is not None else None,
+        }
+
+    def as_dict(self):
+        """Active filters as GET parameters (pinned filters excluded)"""
+        values = {
+            'type': self.type,
+            'club': self.club,
+            'year': self.year,
+            'search': self.search,
+            **self._raw_fees,
+            'sort': self.sort,
+        }
+        return {
+            name: value for name, value in values.items()
+            if value is not None and name not in self.pinned
+        }
+
+    def base_key(self):
+        """Stable key for the non-facet filters (search and fee range)"""
+        values = [self.search, self.fee_min, self.fee_max]
+        return '|'.join('' if value is None else str(value) for value in values)
+
+    def apply(self, queryset):
+        return self.apply_facets(self.apply_base(queryset))
+
+    def apply_base(self, queryset):
+        """Filters that are not facets: free-text search and the fee range"""
+        if self.search:
+            queryset = queryset.filter(
+                Q(player_name__icontains=self.search) |
+                Q(from_club__icontains=self.search) |
+                Q(to_club__icontains=self.search)
+            )
+        if self.fee_min is not None:
+            queryset = queryset.filter(fee_eur__gte=self.fee_min)
+        if self.fee_max is not None:
+            queryset = queryset.filter(fee_eur__lte=self.fee_max)
+        return queryset
+
+    def apply_facets(self, queryset):
+        """Filters that are also facets: type, destination club and year"""
+        if self.type:
+            queryset = queryset.filter(transfer_type=self.type)
+        if self.club:
+            queryset = queryset.filter(to_club=self.club)
+        if self.year:
+            # A date range rather than __year so an index on transfer_date can be used
+            queryset = queryset.filter(
+                transfer_date__gte=datetime.date(self.year, 1, 1),
+                transfer_date__lt=datetime.date(self.year + 1, 1, 1),
+            )
+        return queryset
+
+    def matches_facets(self, transfer_type, to_club, year, ignore=None):
+        """Python mirror of apply_facets() for one grouped row, optionally ignoring one facet"""
+        return (
+            (ignore == 'type' or not self.type or transfer_type == self.type) and
+            (ignore == 'club' or not self.club or to_club == self.club) and
+            (ignore == 'year' or not self.year or year == self.year)
+        )
+
+    def url_with(self, **changes):
+        """Query string for these filters with some changed (None removes one)"""
+        params = self.as_dict()
+        for name, value in changes.items():
+            if value is None:
+                params.pop(name, None)
+            else:
+                params[name] = value
+        return '?' + urlencode([(name, params[name]) for name in FILTER_PARAMS if name in params])
@@ -0,0 +1,39 @@
+# transfers/importers.py
+from culer.importing import Importer
+from culer.text import normalize_key
+
+from . import facets, timelines
+from .models import Transfer
+
+
+class TransferImporter(Importer):
+    """
+    Upsert transfers keyed by (player, type, from club, to club, date).
+    Fee columns are parsed as Transfer.save() would; the timelines each
+    batch touches are dropped per batch and the cached facet counts once
+    at the end of the run.
+    """
+
+    model = Transfer
+    fields = (
+        'player_name', 'from_club', 'to_club', 'transfer_type', 'transfer_date',
+        'fee', 'source', 'image_url', 'description',
+    )
+    required = ('player_name', 'from_club', 'transfer_type')
+    natural_key = ('player_key', 'transfer_type', 'from_club', 'to_club', 'transfer_date')
+
+    def normalize(self, instance):
+        super().normalize(instance)
+        instance.player_key = normalize_key(instance.player_name)
+
+    def prepare(self, instance):
+        instance.derive_fields()
+
+    def derived_fields(self):
+        return Transfer.DERIVED_FIELDS
+
+    def after_batch(self, created, updated):
+        timelines.transfers_changed(created + updated)
+
+    def finish(self):
+        facets.invalidate()
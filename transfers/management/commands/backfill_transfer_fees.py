@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from transfers import facets, timelines
+from transfers.models import Transfer
+
+
+class Command(BaseCommand):
+    help = 'Re-parse Transfer.fee into fee_eur/fee_kind for every transfer, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = priced = 0
+        while True:
+            batch = list(
+                Transfer.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                    'id', 'fee', 'fee_eur', 'fee_kind'
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            for transfer in batch:
+                transfer.parse_fee()
+                priced += transfer.fee_eur is not None
+            with transaction.atomic():
+                Transfer.objects.bulk_update(batch, ['fee_eur', 'fee_kind'])
+            total += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {total} transfers processed...')
+
+        # bulk_update skips post_save, so the cached facet counts and timelines are stale
+        facets.invalidate()
+        timelines.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {total} transfers ({priced} with a euro amount).'
+        ))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+from transfers.fees import parse_fee
+
+
+def parse_fees(apps, schema_editor):
+    # Until parsed, every existing row would read as UNDISCLOSED with no amount
+    Transfer = apps.get_model('transfers', 'Transfer')
+    batch = []
+    for transfer in Transfer.objects.only('id', 'fee').iterator():
+        transfer.fee_kind, transfer.fee_eur = parse_fee(transfer.fee)
+        batch.append(transfer)
+        if len(batch) >= 2000:
+            Transfer.objects.bulk_update(batch, ['fee_eur', 'fee_kind'])
+            batch = []
+    if batch:
+        Transfer.objects.bulk_update(batch, ['fee_eur', 'fee_kind'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transfer',
+            name='fee_eur',
+            field=models.DecimalField(blank=True, decimal_places=0, editable=False, help_text='Fee in euros, parsed from the fee text (empty when unknown)', max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='transfer',
+            name='fee_kind',
+            field=models.CharField(choices=[('FEE', 'Fee'), ('FREE', 'Free transfer'), ('LOAN', 'Loan'), ('UNDISCLOSED', 'Undisclosed')], default='UNDISCLOSED', editable=False, help_text='Kind of deal, parsed from the fee text', max_length=11),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['-fee_eur', '-id'], name='transfers_t_fee_eur_8700f8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['transfer_type', '-fee_eur'], name='transfers_t_transfe_ca2ba2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['fee_kind', '-transfer_date'], name='transfers_t_fee_kin_46ba6f_idx'),
+        ),
+        migrations.RunPython(parse_fees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+from culer.text import normalize_key
+
+
+def backfill_player_key(apps, schema_editor):
+    Transfer = apps.get_model('transfers', 'Transfer')
+    batch = []
+    for transfer in Transfer.objects.only('id', 'player_name').iterator():
+        transfer.player_key = normalize_key(transfer.player_name)
+        batch.append(transfer)
+        if len(batch) >= 2000:
+            Transfer.objects.bulk_update(batch, ['player_key'])
+            batch = []
+    if batch:
+        Transfer.objects.bulk_update(batch, ['player_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0002_transfer_fee_amount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transfer',
+            name='player_key',
+            field=models.CharField(blank=True, editable=False, help_text='Normalized player name used to group rumors about the same player', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['player_key', 'transfer_type', '-transfer_date'], name='transfers_t_player__ed4d74_idx'),
+        ),
+        migrations.RunPython(backfill_player_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0003_transfer_player_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transfer',
+            name='transfers_t_transfe_ca2ba2_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transfer',
+            name='transfers_t_player__ed4d74_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['-transfer_date', '-created_at', '-id'], name='transfers_t_transfe_cf02f2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['transfer_type', '-transfer_date', '-created_at', '-id'], name='transfers_t_transfe_345938_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['to_club', '-transfer_date', '-created_at', '-id'], name='transfers_t_to_club_8e54b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['transfer_type', '-fee_eur', '-id'], name='transfers_t_transfe_37d5c3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['transfer_type', 'player_key', '-transfer_date', '-id'], name='transfers_t_transfe_7229e2_idx'),
+        ),
+    ]
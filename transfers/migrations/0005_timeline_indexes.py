@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0004_listing_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['player_key', '-transfer_date', '-created_at', '-id'], name='transfers_t_player__6338f0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['from_club', '-transfer_date', '-created_at', '-id'], name='transfers_t_from_cl_60d952_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# normalize_key now keeps non-Latin letters and transliterates ø/ł/ß and
+# friends, so recompute the keys stored with the ASCII-only version
+
+from django.db import migrations
+
+from culer.text import normalize_key
+
+
+def recompute_player_key(apps, schema_editor):
+    Transfer = apps.get_model('transfers', 'Transfer')
+    batch = []
+    for transfer in Transfer.objects.only('id', 'player_name', 'player_key').iterator():
+        key = normalize_key(transfer.player_name)
+        if key != transfer.player_key:
+            transfer.player_key = key
+            batch.append(transfer)
+        if len(batch) >= 2000:
+            Transfer.objects.bulk_update(batch, ['player_key'])
+            batch = []
+    if batch:
+        Transfer.objects.bulk_update(batch, ['player_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0005_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_player_key, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,9 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
 
+from culer.text import normalize_key
+from .fees import FEE_KIND_CHOICES, UNDISCLOSED, parse_fee
+
 
 class Transfer(models.Model):
     """Model representing a football transfer (rumor, confirmed, or historical)"""
@@ -16,6 +19,12 @@ class Transfer(models.Model):
     
     # Basic transfer information
     player_name = models.CharField(max_length=100, help_text="Name of the player")
+    player_key = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        help_text="Normalized player name used to group rumors about the same player"
+    )
     from_club = models.CharField(max_length=100, help_text="Club the player is transferring from")
     to_club = models.CharField(max_length=100, default="FC Barcelona", help_text="Club the player is transferring to")
     transfer_type = models.CharField(
@@ -36,6 +45,21 @@ class Transfer(models.Model):
         null=True, 
         help_text="Transfer fee (e.g., '€50M', 'Free transfer', 'Loan')"
     )
+    fee_eur = models.DecimalField(
+        max_digits=14,
+        decimal_places=0,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Fee in euros, parsed from the fee text (empty when unknown)"
+    )
+    fee_kind = models.CharField(
+        max_length=11,
+        choices=FEE_KIND_CHOICES,
+        default=UNDISCLOSED,
+        editable=False,
+        help_text="Kind of deal, parsed from the fee text"
+    )
     source = models.URLField(
         blank=True, 
         null=True, 
@@ -65,6 +89,20 @@ class Transfer(models.Model):
         ordering = ['-transfer_date', '-created_at']  # Newest transfers first
         verbose_name = "Transfer"
         verbose_name_plural = "Transfers"
+        indexes = [
+            # Keyset orderings end in -id; SQLite's implicit rowid suffix is
+            # ascending, so the indexes name it to serve all-descending sorts
+            models.Index(fields=['-transfer_date', '-created_at', '-id']),
+            models.Index(fields=['transfer_type', '-transfer_date', '-created_at', '-id']),
+            models.Index(fields=['to_club', '-transfer_date', '-created_at', '-id']),
+            models.Index(fields=['-fee_eur', '-id']),
+            models.Index(fields=['transfer_type', '-fee_eur', '-id']),
+            models.Index(fields=['fee_kind', '-transfer_date']),
+            models.Index(fields=['transfer_type', 'player_key', '-transfer_date', '-id']),
+            # Player and club timelines (see transfers.timelines)
+            models.Index(fields=['player_key', '-transfer_date', '-created_at', '-id']),
+            models.Index(fields=['from_club', '-transfer_date', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         """String representation of the transfer"""
@@ -74,6 +112,36 @@ class Transfer(models.Model):
         """Return the URL for this transfer detail page"""
         return reverse('transfers:transfer_detail', kwargs={'id': self.pk})
     
+    # Columns computed from the others on every save (see derive_fields)
+    DERIVED_FIELDS = ('player_key', 'fee_eur', 'fee_kind')
+    
+    def save(self, *args, **kwargs):
+        self.derive_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
+        super().save(*args, **kwargs)
+    
+    def derive_fields(self):
+        """Fill the DERIVED_FIELDS; also used by bulk writes that skip save()"""
+        self.player_key = normalize_key(self.player_name)
+        self.parse_fee()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember which player and clubs the cached timelines counted this under
+        instance._loaded_state = {
+            name: getattr(instance, name)
+            for name in ('player_key', 'from_club', 'to_club')
+            if name in field_names
+        }
+        return instance
+    
+    def parse_fee(self):
+        """Fill fee_eur/fee_kind from the free-text fee"""
+        self.fee_kind, self.fee_eur = parse_fee(self.fee)
+    
     # Properties for easy transfer type checking
     @property
     def is_confirmed(self):
@@ -0,0 +1,47 @@
+# transfers/rumors.py
+"""
+Rumors grouped by player.
+
+Rumor rows about the same player differ in spelling and source, so they
+are grouped by Transfer.player_key (see culer.text.normalize_key). Both
+queries below are served by the (transfer_type, player_key, -transfer_date)
+index.
+"""
+from django.db.models import Count, F, Max, Min
+
+from .models import Transfer
+
+
+# Upper bound on player rows returned by the grouped rumor view
+RUMOR_CLUSTER_LIMIT = 500
+
+
+def rumor_clusters(queryset, limit=RUMOR_CLUSTER_LIMIT):
+    """
+    One row per rumored player with the rumor count and latest date,
+    from a single GROUP BY query. `queryset` should already be narrowed
+    to rumors (and any other active filters).
+    """
+    return list(
+        queryset.order_by().values('player_key').annotate(
+            # Min() favours capitalised spellings ('Nico' sorts before 'nico')
+            display_name=Min('player_name'),
+            rumor_count=Count('id'),
+            club_count=Count('to_club', distinct=True),
+            latest_date=Max('transfer_date'),
+            latest_id=Max('id'),
+        ).order_by(
+            F('latest_date').desc(nulls_last=True), '-rumor_count', 'player_key'
+        )[:limit]
+    )
+
+
+def player_rumors(player_key):
+    """Every rumor about one player, newest first"""
+    if not player_key:
+        return Transfer.objects.none()
+    return Transfer.objects.filter(
+        player_key=player_key, transfer_type='RUMOR'
+    ).order_by(
+        F('transfer_date').desc(nulls_last=True), '-id'
+    ).only('id', 'player_name', 'from_club', 'to_club', 'fee', 'transfer_date', 'source')
@@ -0,0 +1,40 @@
+# transfers/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from culer.bulk import bulk_saved
+from . import facets, timelines
+from .models import Transfer
+
+
+@receiver(post_save, sender=Transfer)
+def invalidate_facets_on_save(sender, instance, **kwargs):
+    """Cached facet counts no longer reflect the table once a transfer changes"""
+    facets.invalidate()
+
+
+@receiver(post_save, sender=Transfer)
+def refresh_timelines_on_save(sender, instance, raw=False, **kwargs):
+    """Drop the cached timelines of the player and clubs this transfer touches"""
+    if raw:
+        return
+    timelines.transfers_changed([instance])
+
+
+@receiver(post_delete, sender=Transfer)
+def invalidate_facets_on_delete(sender, instance, **kwargs):
+    """Drop cached facet counts when a transfer is deleted"""
+    facets.invalidate()
+
+
+@receiver(post_delete, sender=Transfer)
+def refresh_timelines_on_delete(sender, instance, **kwargs):
+    """Drop the cached timelines a deleted transfer was counted in"""
+    timelines.transfers_changed([instance])
+
+
+@receiver(bulk_saved, sender=Transfer)
+def refresh_caches_on_bulk_save(sender, instances, **kwargs):
+    """Changelist edits are written by bulk_save(), which sends no post_save"""
+    facets.invalidate()
+    timelines.transfers_changed(instances)
@@ -1,3 +1,346 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase
+
+from culer.query_plans import QueryPlanTestCase
+from culer.text import normalize_key
+from . import facets, fees, rumors, timelines, views
+from .models import Transfer
+
+
+class TransferQueryPlanTests(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='editor')
+        cls.transfer = Transfer.objects.create(
+            player_name='Nico Williams', from_club='Athletic Club', transfer_type='RUMOR',
+            transfer_date=date(2025, 6, 1), fee='€58M', posted_by=user,
+        )
+        Transfer.objects.create(
+            player_name='Joan García', from_club='Espanyol', transfer_type='CONFIRMED',
+            transfer_date=date(2025, 6, 15), fee='€25M', posted_by=user,
+        )
+
+    def test_transfer_list(self):
+        self.assertIndexedPlans(views.transfer_list)
+        self.assertIndexedPlans(views.transfer_list, {'type': 'RUMOR'})
+        self.assertIndexedPlans(views.transfer_list, {'club': 'FC Barcelona'})
+        self.assertIndexedPlans(views.transfer_list, {'year': '2025'})
+        self.assertIndexedPlans(views.transfer_list, {'sort': 'fee'})
+        self.assertIndexedPlans(views.transfer_list, {'type': 'CONFIRMED', 'sort': 'fee'})
+
+    def test_latest_transfers(self):
+        self.assertIndexedPlans(views.latest_transfers)
+
+    def test_transfer_rumors(self):
+        self.assertIndexedPlans(views.transfer_rumors)
+
+    def test_rumor_players(self):
+        # Groups stream off the (transfer_type, player_key) index, but the
+        # distinct club count and the ordering by latest date are computed
+        # per player and have to be sorted
+        self.assertIndexedPlans(
+            views.rumor_players,
+            allowed=('USE TEMP B-TREE FOR count(DISTINCT)', 'USE TEMP B-TREE FOR ORDER BY'),
+        )
+
+    def test_transfer_detail(self):
+        self.assertIndexedPlans(views.transfer_detail, id=self.transfer.pk)
+
+    def test_player_timeline(self):
+        self.assertIndexedPlans(views.player_timeline, player_key='joangarcia')
+
+    def test_club_timeline(self):
+        # from_club OR to_club reads both club indexes; merging them needs a
+        # sort, bounded by the one club's history
+        self.assertIndexedPlans(
+            views.club_timeline, allowed=('USE TEMP B-TREE FOR ORDER BY',), club='Espanyol'
+        )
+
+
+class FeeParsingTests(SimpleTestCase):
+
+    def assertFee(self, text, kind, amount):
+        self.assertEqual(fees.parse_fee(text), (kind, None if amount is None else Decimal(amount)))
+
+    def test_amounts(self):
+        self.assertFee('€50M', fees.FEE, '50000000')
+        self.assertFee('50m euros', fees.FEE, '50000000')
+        self.assertFee('EUR 1.5 million', fees.FEE, '1500000')
+        self.assertFee('€60M + €10M add-ons', fees.FEE, '60000000')
+        self.assertFee('£40M', fees.FEE, None)
+        self.assertFee('Swap deal 2024', fees.UNDISCLOSED, None)
+
+    def test_thousands_separators(self):
+        self.assertFee('€120,000,000', fees.FEE, '120000000')
+        self.assertFee('€1.000.000', fees.FEE, '1000000')
+        self.assertFee('€1 000 000', fees.FEE, '1000000')
+        self.assertFee('€1.500', fees.FEE, '1500')
+        self.assertFee('€1.500M', fees.FEE, '1500000')
+
+    def test_ranges_store_the_midpoint(self):
+        self.assertFee('€70-80M', fees.FEE, '75000000')
+        self.assertFee('€70M to €80M', fees.FEE, '75000000')
+        self.assertFee('€500K-1M', fees.FEE, '750000')
+        self.assertFee('80–100 million euros', fees.FEE, '90000000')
+
+    def test_kinds(self):
+        self.assertFee('Free transfer', fees.FREE, '0')
+        self.assertFee('Loan', fees.LOAN, None)
+        self.assertFee('€2M loan fee', fees.LOAN, '2000000')
+        self.assertFee('Loan until 30-06-2025', fees.LOAN, None)
+        self.assertFee('', fees.UNDISCLOSED, None)
+
+
+class TransferSpendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='accountant')
+        for player, from_club, to_club, transfer_type, fee in (
+            ('Dani Olmo', 'RB Leipzig', 'FC Barcelona', 'CONFIRMED', '€55M'),
+            ('Frenkie de Jong', 'Ajax', 'FC Barcelona', 'HISTORY', '€75M'),
+            ('Ousmane Dembélé', 'FC Barcelona', 'PSG', 'CONFIRMED', '€50M'),
+            ('Luis Díaz', 'Liverpool', 'FC Barcelona', 'RUMOR', '€70-80M'),
+            ('Ronald Araújo', 'FC Barcelona', 'Juventus', 'RUMOR', '€60M'),
+        ):
+            Transfer.objects.create(
+                player_name=player, from_club=from_club, to_club=to_club, transfer_type=transfer_type,
+                transfer_date=date(2025, 7, 1), fee=fee, posted_by=user,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rumored_fees_are_left_out_of_the_totals(self):
+        spend = self.client.get('/transfers/').context['spend']
+        self.assertEqual(spend['spent'], Decimal('130000000'))
+        self.assertEqual(spend['received'], Decimal('50000000'))
+        self.assertEqual(spend['net'], Decimal('80000000'))
+        self.assertEqual(spend['priced'], 3)
+
+    def test_rumor_listing_has_no_spend(self):
+        spend = self.client.get('/transfers/', {'type': 'RUMOR'}).context['spend']
+        self.assertEqual((spend['spent'], spend['received'], spend['priced']), (0, 0, 0))
+
+
+class TransferFacetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='desk')
+        for player, to_club, transfer_type, year in (
+            ('Dani Olmo', 'FC Barcelona', 'CONFIRMED', 2024),
+            ('Pau Víctor', 'FC Barcelona', 'CONFIRMED', 2024),
+            ('Clément Lenglet', 'Atlético Madrid', 'CONFIRMED', 2024),
+            ('Nico Williams', 'FC Barcelona', 'RUMOR', 2025),
+            ('Jonathan Tah', 'FC Barcelona', 'RUMOR', 2025),
+            ('Frenkie de Jong', 'FC Barcelona', 'HISTORY', 2019),
+        ):
+            cls.create(player, to_club, transfer_type, year)
+
+    @classmethod
+    def create(cls, player, to_club, transfer_type, year):
+        return Transfer.objects.create(
+            player_name=player, from_club='Elsewhere FC', to_club=to_club, transfer_type=transfer_type,
+            transfer_date=date(year, 7, 1), posted_by=cls.user,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        return self.client.get('/transfers/', params).context['facets']
+
+    def test_each_facet_ignores_its_own_filter(self):
+        facets = self.facets(type='CONFIRMED')
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(facets['types'], {'CONFIRMED': 3, 'RUMOR': 2, 'HISTORY': 1})
+        self.assertEqual(facets['clubs'], [('FC Barcelona', 2), ('Atlético Madrid', 1)])
+        self.assertEqual(facets['years'], [(2024, 3)])
+
+        facets = self.facets(club='FC Barcelona', year='2025')
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['types'], {'RUMOR': 2})
+        self.assertEqual(facets['clubs'], [('FC Barcelona', 2)])
+        self.assertEqual(facets['years'], [(2025, 2), (2024, 2), (2019, 1)])
+
+    def test_counts_match_the_filtered_listing(self):
+        for params in ({}, {'type': 'RUMOR'}, {'club': 'Atlético Madrid'}, {'year': '2019'}):
+            response = self.client.get('/transfers/', params)
+            filters = response.context['filters']
+            self.assertEqual(
+                response.context['total_count'], filters.apply(Transfer.objects.all()).count(), params
+            )
+
+    def test_saves_and_deletes_invalidate_the_cached_counts(self):
+        filters = self.client.get('/transfers/').context['filters']
+        with self.assertNumQueries(0):
+            self.assertEqual(facets.transfer_facets(Transfer.objects.all(), filters)['total'], 6)
+
+        transfer = self.create('Marc Casadó', 'FC Barcelona', 'CONFIRMED', 2024)
+        self.assertEqual(self.facets(type='CONFIRMED')['total'], 4)
+        transfer.transfer_type = 'HISTORY'
+        transfer.save()
+        self.assertEqual(self.facets()['types']['HISTORY'], 2)
+        transfer.delete()
+        self.assertEqual(self.facets()['types'], {'CONFIRMED': 3, 'RUMOR': 2, 'HISTORY': 1})
+
+
+class TransferChangelistTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('editor', 'editor@example.com', 'password')
+        cls.transfers = [
+            Transfer.objects.create(
+                player_name=player, from_club='Elsewhere FC', transfer_type='RUMOR',
+                transfer_date=date(2025, 1, day), fee=fee, posted_by=cls.admin,
+            )
+            for day, (player, fee) in enumerate((('Nico Williams', '€58M'), ('Jonathan Tah', 'Free')), start=1)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def post(self, rows):
+        data = {'form-TOTAL_FORMS': len(rows), 'form-INITIAL_FORMS': len(rows), '_save': 'Save'}
+        for i, (transfer, transfer_type, fee) in enumerate(rows):
+            data.update({f'form-{i}-id': transfer.pk, f'form-{i}-transfer_type': transfer_type, f'form-{i}-fee': fee})
+        return self.client.post('/admin/transfers/transfer/', data)
+
+    def test_edits_are_written_with_one_bulk_update(self):
+        williams, tah = self.transfers
+        self.assertEqual(self.client.get('/transfers/').context['facets']['types'], {'RUMOR': 2})
+        timelines.player_summary(williams.player_key)
+        self.assertIsNotNone(cache.get(timelines._cache_key('player', williams.player_key)))
+
+        with mock.patch.object(Transfer, 'save') as save, \
+                mock.patch.object(QuerySet, 'bulk_update', autospec=True, side_effect=QuerySet.bulk_update) as bulk_update:
+            response = self.post([(tah, 'RUMOR', 'Free'), (williams, 'CONFIRMED', '€62M')])
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(save.called)
+        self.assertEqual(bulk_update.call_count, 1)
+        # Only the changed row, with its derived fee columns
+        self.assertEqual(bulk_update.call_args.args[1], [williams])
+
+        williams.refresh_from_db()
+        self.assertEqual((williams.transfer_type, williams.fee_eur), ('CONFIRMED', Decimal('62000000')))
+        self.assertEqual(self.client.get('/transfers/').context['facets']['types'], {'CONFIRMED': 1, 'RUMOR': 1})
+        self.assertIsNone(cache.get(timelines._cache_key('player', williams.player_key)))
+
+
+class TransferTimelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='archivist')
+        for player, from_club, to_club, transfer_type, day, fee in (
+            ('Dani Olmo', 'Dinamo Zagreb', 'RB Leipzig', 'HISTORY', date(2020, 1, 24), '€20M'),
+            ('Dani Olmo', 'RB Leipzig', 'FC Barcelona', 'CONFIRMED', date(2024, 8, 9), '€55M'),
+            ('Dani Olmo', 'FC Barcelona', 'Manchester City', 'RUMOR', date(2025, 7, 1), '€60M'),
+            ('Pau Víctor', 'Girona', 'FC Barcelona', 'CONFIRMED', date(2024, 7, 1), 'Free transfer'),
+            ('Vitor Roque', 'FC Barcelona', 'Real Betis', 'CONFIRMED', date(2025, 2, 1), '€25M'),
+            ('Ousmane Dembélé', 'FC Barcelona', 'PSG', 'HISTORY', date(2023, 8, 12), '€50M'),
+            ('Mikayil Faye', 'FC Barcelona', 'Rennes', 'CONFIRMED', None, 'Undisclosed'),
+        ):
+            Transfer.objects.create(
+                player_name=player, from_club=from_club, to_club=to_club, transfer_type=transfer_type,
+                transfer_date=day, fee=fee, posted_by=cls.user,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def cached(self, kind, value):
+        return cache.get(timelines._cache_key(kind, value)) is not None
+
+    def test_player_seasons_leave_rumors_out(self):
+        summary = timelines.player_summary('daniolmo')
+        self.assertEqual((summary['name'], summary['moves'], summary['fees']), ('Dani Olmo', 2, Decimal('75000000')))
+        self.assertEqual(
+            [(season['season'], season['moves'], season['fees']) for season in summary['seasons']],
+            [('2024/25', 1, Decimal('55000000')), ('2019/20', 1, Decimal('20000000'))],
+        )
+
+    def test_club_seasons_and_totals(self):
+        summary = timelines.club_summary('FC Barcelona')
+        self.assertEqual(
+            [(season['season'], season['arrivals'], season['departures'], season['net'])
+             for season in summary['seasons']],
+            [
+                ('2024/25', 2, 1, Decimal('30000000')),
+                ('2023/24', 0, 1, Decimal('-50000000')),
+                (None, 0, 1, Decimal('0')),
+            ],
+        )
+        self.assertEqual(summary['moves'], 5)
+        self.assertEqual(
+            (summary['spent'], summary['received'], summary['net']),
+            (Decimal('55000000'), Decimal('75000000'), Decimal('-20000000')),
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(timelines.club_summary('FC Barcelona'), summary)
+
+    def test_saves_and_deletes_drop_only_the_keys_they_touch(self):
+        dembele = Transfer.objects.get(player_key='ousmanedembele')
+        for kind, value in (('player', 'daniolmo'), ('player', 'ousmanedembele'),
+                            ('club', 'FC Barcelona'), ('club', 'PSG'), ('club', 'RB Leipzig')):
+            getattr(timelines, f'{kind}_summary')(value)
+
+        dembele.to_club = 'Paris Saint-Germain'
+        dembele.save()
+        self.assertFalse(self.cached('player', 'ousmanedembele'))
+        self.assertFalse(self.cached('club', 'FC Barcelona'))
+        # The club it was moved away from is dropped as well
+        self.assertFalse(self.cached('club', 'PSG'))
+        self.assertTrue(self.cached('player', 'daniolmo'))
+        self.assertTrue(self.cached('club', 'RB Leipzig'))
+        self.assertEqual(timelines.club_summary('PSG')['moves'], 0)
+        self.assertEqual(timelines.club_summary('Paris Saint-Germain')['arrivals'], 1)
+
+        Transfer.objects.get(player_key='daniolmo', to_club='FC Barcelona').delete()
+        self.assertFalse(self.cached('player', 'daniolmo'))
+        self.assertFalse(self.cached('club', 'RB Leipzig'))
+        self.assertTrue(self.cached('club', 'PSG'))
+        self.assertEqual(timelines.player_summary('daniolmo')['moves'], 1)
+        self.assertEqual(timelines.club_summary('FC Barcelona')['spent'], Decimal('0'))
+
+
+class PlayerKeyTests(SimpleTestCase):
+
+    def test_letters_without_a_decomposition_are_transliterated(self):
+        self.assertEqual(normalize_key('Martin Ødegaard'), normalize_key('Martin Odegaard'))
+        self.assertEqual(normalize_key('Łukasz Piszczek'), 'lukaszpiszczek')
+        self.assertEqual(normalize_key('Robert Straße'), 'robertstrasse')
+        self.assertEqual(normalize_key('İlkay Gündoğan'), normalize_key('ilkay gundogan'))
+
+    def test_other_scripts_keep_their_letters(self):
+        self.assertEqual(normalize_key('Пау Кубарси'), 'паукубарси')
+        self.assertEqual(normalize_key('久保 建英'), '久保建英')
+        self.assertNotEqual(normalize_key('Пау Кубарси'), normalize_key('久保建英'))
+        self.assertEqual(normalize_key('—'), '')
+
+
+class RumorGroupingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='insider')
+        for player in ('Martin Ødegaard', 'martin odegaard', 'Пау Кубарси', '久保建英'):
+            Transfer.objects.create(
+                player_name=player, from_club='Elsewhere', to_club='FC Barcelona', transfer_type='RUMOR',
+                transfer_date=date(2025, 8, 1), fee='Undisclosed', posted_by=user,
+            )
+
+    def test_spellings_group_and_scripts_stay_apart(self):
+        clusters = rumors.rumor_clusters(Transfer.objects.filter(transfer_type='RUMOR'))
+        counts = {cluster['player_key']: cluster['rumor_count'] for cluster in clusters}
+        self.assertEqual(counts, {'martinodegaard': 2, 'паукубарси': 1, '久保建英': 1})
@@ -0,0 +1,181 @@
+# transfers/timelines.py
+"""
+Player and club transfer timelines.
+
+A timeline is every confirmed or historical move of one player (by
+Transfer.player_key) or one club (as from_club or to_club), newest first,
+plus a per-season summary: fees paid for arrivals, fees received for
+departures and the net spend. Seasons run July to June.
+
+The summaries come from one grouped query and are cached per player and
+per club. The Transfer signals drop only the entries a changed transfer
+touches - its player and both clubs, before and after the edit - so an
+edit rebuilds those timelines on their next view and leaves the rest
+cached. Bulk rewrites of the whole table bump a generation token instead.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Min, Q, Sum, Value, When
+from django.db.models.functions import ExtractYear
+
+from culer.caching import CacheGeneration
+from .models import Transfer
+
+
+# Rumors never moved anyone, so they stay out of timelines and totals
+MOVE_TYPES = ('CONFIRMED', 'HISTORY')
+
+CACHE_PREFIX = 'transfer-timeline:'
+generation = CacheGeneration('transfer-timeline:generation')
+
+# Transfers from July onwards belong to the season starting that year
+SEASON_START_MONTH = 7
+
+
+def season_label(start_year):
+    """'2024/25' for the season starting in 2024; None for undated moves"""
+    if start_year is None:
+        return None
+    return f'{start_year}/{(start_year + 1) % 100:02d}'
+
+
+def _season_start():
+    year = ExtractYear('transfer_date')
+    return Case(
+        When(transfer_date__month__gte=SEASON_START_MONTH, then=year),
+        default=year - Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def player_transfers(player_key):
+    """One player's moves; order with the listing ordering (player_key index)"""
+    return Transfer.objects.filter(player_key=player_key, transfer_type__in=MOVE_TYPES)
+
+
+def club_transfers(club):
+    """One club's arrivals and departures (from_club and to_club indexes)"""
+    return Transfer.objects.filter(
+        Q(from_club=club) | Q(to_club=club), transfer_type__in=MOVE_TYPES
+    )
+
+
+def _cache_key(kind, value):
+    # Hashed because club names may contain characters cache keys can't
+    digest = hashlib.md5(value.encode()).hexdigest()
+    return f'{CACHE_PREFIX}{generation.token()}:{kind}:{digest}'
+
+
+def _cached(kind, value, build):
+    key = _cache_key(kind, value)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build(value)
+        cache.set(key, summary, getattr(settings, 'TRANSFER_TIMELINE_CACHE_TIMEOUT', 3600))
+    return summary
+
+
+def _build_player_summary(player_key):
+    rows = player_transfers(player_key).order_by().values(season=_season_start()).annotate(
+        moves=Count('id'),
+        fees=Sum('fee_eur'),
+        display_name=Min('player_name'),
+    )
+    seasons = []
+    moves, fees, names = 0, Decimal('0'), []
+    for row in rows:
+        season_fees = row['fees'] or Decimal('0')
+        seasons.append({
+            'season': season_label(row['season']),
+            'start_year': row['season'],
+            'moves': row['moves'],
+            'fees': season_fees,
+        })
+        moves += row['moves']
+        fees += season_fees
+        names.append(row['display_name'])
+    seasons.sort(key=lambda season: (season['start_year'] is None, -(season['start_year'] or 0)))
+    return {
+        # Same rule as rumor_clusters: Min() favours capitalised spellings
+        'name': min(names) if names else None,
+        'moves': moves,
+        'fees': fees,
+        'seasons': seasons,
+    }
+
+
+def _build_club_summary(club):
+    rows = club_transfers(club).order_by().values(
+        season=_season_start(),
+        arrival=Case(When(to_club=club, then=Value(1)), default=Value(0), output_field=IntegerField()),
+    ).annotate(moves=Count('id'), fees=Sum('fee_eur'))
+
+    by_season = {}
+    for row in rows:
+        season = by_season.setdefault(row['season'], {
+            'season': season_label(row['season']),
+            'start_year': row['season'],
+            'arrivals': 0,
+            'departures': 0,
+            'spent': Decimal('0'),
+            'received': Decimal('0'),
+        })
+        fees = row['fees'] or Decimal('0')
+        if row['arrival']:
+            season['arrivals'] += row['moves']
+            season['spent'] += fees
+        else:
+            season['departures'] += row['moves']
+            season['received'] += fees
+    seasons = sorted(
+        by_season.values(),
+        key=lambda season: (season['start_year'] is None, -(season['start_year'] or 0)),
+    )
+    for season in seasons:
+        season['net'] = season['spent'] - season['received']
+    totals = {
+        name: sum((season[name] for season in seasons), start)
+        for name, start in (
+            ('arrivals', 0), ('departures', 0),
+            ('spent', Decimal('0')), ('received', Decimal('0')), ('net', Decimal('0')),
+        )
+    }
+    return {'name': club, 'moves': totals['arrivals'] + totals['departures'], **totals, 'seasons': seasons}
+
+
+def player_summary(player_key):
+    """Cached per-season summary of one player's moves"""
+    return _cached('player', player_key, _build_player_summary)
+
+
+def club_summary(club):
+    """Cached per-season arrivals, departures and net spend of one club"""
+    return _cached('club', club, _build_club_summary)
+
+
+def transfers_changed(transfers):
+    """
+    Drop the cached summaries a set of saved or deleted transfers touch,
+    using the values they were loaded with as well as the current ones.
+    """
+    keys = set()
+    for transfer in transfers:
+        previous = getattr(transfer, '_loaded_state', {})
+        for state in (previous, vars(transfer)):
+            if state.get('player_key'):
+                keys.add(_cache_key('player', state['player_key']))
+            for name in ('from_club', 'to_club'):
+                if state.get(name):
+                    keys.add(_cache_key('club', state[name]))
+        transfer._loaded_state = {
+            name: getattr(transfer, name) for name in ('player_key', 'from_club', 'to_club')
+        }
+    cache.delete_many(list(keys))
+
+
+def invalidate():
+    """Drop every cached timeline summary (after updates that bypass the signals)"""
+    generation.bump()
@@ -16,6 +16,13 @@ urlpatterns = [
     # Transfer rumors
     path('rumors/', views.transfer_rumors, name='transfer_rumors'),
     
+    # Rumors grouped by player
+    path('rumors/players/', views.rumor_players, name='rumor_players'),
+    
+    # Every move of one player (by normalized name) and of one club
+    path('players/<slug:player_key>/', views.player_timeline, name='player_timeline'),
+    path('clubs/<path:club>/', views.club_timeline, name='club_timeline'),
+    
     # Individual transfer detail view
     path('<int:id>/', views.transfer_detail, name='transfer_detail'),
 ]
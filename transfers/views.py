@@ -1,36 +1,98 @@
-
 # transfers/views.py
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
-from django.db.models import Q
+from culer.pagination import KeysetPaginator, SequencePaginator
+from .facets import transfer_facets
+from .fees import format_eur
+from .filters import TransferFilters
 from .models import Transfer
+from .rumors import player_rumors, rumor_clusters
+from . import timelines
 
 
-def transfer_list(request):
+# Unique sort key matching Transfer.Meta.ordering, used for keyset pagination
+TRANSFER_ORDERING = ('-transfer_date', '-created_at', '-id')
+
+# Biggest fees first, served by the (-fee_eur, -id) index; unknown fees last
+FEE_ORDERING = ('-fee_eur', '-id')
+
+
+def _facet_links(facets, filters):
+    """Facet counts as template-ready links that toggle one filter each"""
+    def link(name, value, label, count, active):
+        return {
+            'value': value,
+            'label': label,
+            'count': count,
+            'active': active,
+            'url': filters.url_with(**{name: None if active else value}),
+        }
+
+    return {
+        'types': [
+            link('type', value, label, facets['types'].get(value, 0), filters.type == value)
+            for value, label in Transfer.TRANSFER_TYPE_CHOICES
+        ],
+        'clubs': [
+            link('club', club, club, count, filters.club == club)
+            for club, count in facets['clubs']
+        ],
+        'years': [
+            link('year', year, year, count, filters.year == year)
+            for year, count in facets['years']
+        ],
+    }
+
+
+def _transfer_listing(request, pinned=None):
+    """
+    Shared engine behind the three listing views: apply the combinable
+    filters (plus any the view pins), paginate with a cursor and attach
+    the cached facet counts, which also supply the total.
     """
-    View to display all transfers with optional filtering by transfer_type.
-    Supports pagination (10 items per page).
-    """
-    # Get all transfers with related user data for efficiency
-    transfers = Transfer.objects.select_related('posted_by').all()
-    
-    # Filter by transfer_type if provided in GET parameters
-    transfer_type = request.GET.get('type')
-    if transfer_type and transfer_type in ['RUMOR', 'CONFIRMED', 'HISTORY']:
-        transfers = transfers.filter(transfer_type=transfer_type)
-    
+    filters = TransferFilters(request.GET, pinned=pinned)
+    base = Transfer.objects.select_related('posted_by')
+    transfers = filters.apply(base)
+
+    ordering = FEE_ORDERING if filters.sort == 'fee' else TRANSFER_ORDERING
+
     # Setup pagination (10 transfers per page)
-    paginator = Paginator(transfers, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+    paginator = KeysetPaginator(transfers, 10, ordering=ordering)
+    page_obj = paginator.get_page(request.GET.get('cursor'), params=request.GET)
+
+    facets = transfer_facets(Transfer.objects.all(), filters)
+
     context = {
         'page_obj': page_obj,
         'transfers': page_obj,  # For template compatibility
-        'current_filter': transfer_type,
-        'total_count': paginator.count,
+        'filters': filters,
+        'current_filter': filters.type,
+        'current_sort': filters.sort or 'latest',
+        'facets': facets,
+        'facet_links': _facet_links(facets, filters),
+        'total_count': facets['total'],
     }
-    
+    return context
+
+
+def transfer_list(request):
+    """
+    View to display all transfers with combinable filters: type, club
+    (destination), year, search and fee range (fee_min/fee_max, in millions
+    of euros), sorted by date or by fee (sort=fee).
+    Supports cursor pagination (10 items per page).
+    """
+    context = _transfer_listing(request)
+
+    # Totals come with the cached facet counts, not from a query of their own
+    spend = context['facets']['spend']
+    context.update({
+        'spend': spend,
+        'spent_display': format_eur(spend['spent']),
+        'received_display': format_eur(spend['received']),
+        'net_display': format_eur(spend['net']),
+    })
+
     return render(request, 'transfers/transfer_list.html', context)
 
 
@@ -39,62 +101,123 @@ def transfer_detail(request, id):
     View to display detailed information about a specific transfer.
     """
     transfer = get_object_or_404(
-        Transfer.objects.select_related('posted_by'), 
+        Transfer.objects.select_related('posted_by'),
         pk=id
     )
-    
+
+    # Every rumor about this player, including differently spelled ones
+    rumor_history = [
+        rumor for rumor in player_rumors(transfer.player_key) if rumor.pk != transfer.pk
+    ]
+
     context = {
         'transfer': transfer,
+        'rumor_history': rumor_history,
     }
-    
+
     return render(request, 'transfers/transfer_detail.html', context)
 
 
 def latest_transfers(request):
     """
     View to display only confirmed transfers, ordered by date descending.
-    Supports pagination (10 items per page).
-    """
-    # Get only confirmed transfers
-    transfers = Transfer.objects.select_related('posted_by').filter(
-        transfer_type='CONFIRMED'
-    ).order_by('-transfer_date', '-created_at')
-    
-    # Setup pagination
-    paginator = Paginator(transfers, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    context = {
-        'page_obj': page_obj,
-        'transfers': page_obj,
-        'page_title': 'Latest Confirmed Transfers',
-        'total_count': paginator.count,
-    }
-    
+    Accepts the same filters as transfer_list (except type).
+    Supports cursor pagination (10 items per page).
+    """
+    context = _transfer_listing(request, pinned={'type': 'CONFIRMED'})
+    context['page_title'] = 'Latest Confirmed Transfers'
+
     return render(request, 'transfers/latest_transfers.html', context)
 
 
 def transfer_rumors(request):
     """
     View to display only transfer rumors, ordered by date descending.
-    Supports pagination (10 items per page).
-    """
-    # Get only rumor transfers
-    transfers = Transfer.objects.select_related('posted_by').filter(
-        transfer_type='RUMOR'
-    ).order_by('-transfer_date', '-created_at')
-    
-    # Setup pagination
-    paginator = Paginator(transfers, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+    Accepts the same filters as transfer_list (except type).
+    Supports cursor pagination (10 items per page).
+    """
+    context = _transfer_listing(request, pinned={'type': 'RUMOR'})
+    context['page_title'] = 'Transfer Rumors'
+
+    return render(request, 'transfers/transfer_rumors.html', context)
+
+
+def rumor_players(request):
+    """
+    View to display rumors grouped by player: one row per player with the
+    number of rumors and the latest rumored date. Accepts the same filters
+    as transfer_list (except type). Supports cursor pagination (20 per page).
+    """
+    filters = TransferFilters(request.GET, pinned={'type': 'RUMOR'})
+    clusters = rumor_clusters(filters.apply(Transfer.objects.all()))
+
+    paginator = SequencePaginator(clusters, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'), params=request.GET)
+
+    context = {
+        'page_obj': page_obj,
+        'clusters': page_obj,
+        'filters': filters,
+        'player_count': len(clusters),
+        'page_title': 'Transfer Rumors by Player',
+    }
+
+    return render(request, 'transfers/rumor_players.html', context)
+
+
+# Money columns of the timeline summaries, shown as '€60M' etc.
+TIMELINE_AMOUNTS = ('fees', 'spent', 'received', 'net')
+
+
+def _display_amounts(row):
+    """Copy of a summary row with a *_display string next to each amount"""
+    row = dict(row)
+    for name in TIMELINE_AMOUNTS:
+        if name in row:
+            row[f'{name}_display'] = format_eur(row[name])
+    return row
+
+
+def _timeline(request, kind, summary, transfers):
+    """Shared rendering for the player and club timelines"""
+    if not summary['moves']:
+        raise Http404('No transfers recorded')
+
+    paginator = KeysetPaginator(transfers.select_related('posted_by'), 20, ordering=TRANSFER_ORDERING)
+    page_obj = paginator.get_page(request.GET.get('cursor'), params=request.GET)
+
     context = {
+        'kind': kind,
+        'summary': _display_amounts(summary),
+        'seasons': [_display_amounts(season) for season in summary['seasons']],
         'page_obj': page_obj,
         'transfers': page_obj,
-        'page_title': 'Transfer Rumors',
-        'total_count': paginator.count,
     }
-    
-    return render(request, 'transfers/transfer_rumors.html', context)
\ No newline at end of file
+    return render(request, 'transfers/timeline.html', context)
+
+
+def player_timeline(request, player_key):
+    """
+    View to display one player's confirmed and historical moves, newest
+    first, with cached per-season totals. Keyed by Transfer.player_key so
+    differently spelled entries land on the same page.
+    Supports cursor pagination (20 items per page).
+    """
+    return _timeline(
+        request, 'player',
+        timelines.player_summary(player_key),
+        timelines.player_transfers(player_key),
+    )
+
+
+def club_timeline(request, club):
+    """
+    View to display one club's arrivals and departures, newest first, with
+    cached per-season spend, income and net spend.
+    Supports cursor pagination (20 items per page).
+    """
+    return _timeline(
+        request, 'club',
+        timelines.club_summary(club),
+        timelines.club_transfers(club),
+    )